@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Measures random playout throughput (position-steps per second) of the NumPy
+BatchBoard for several batch sizes against BitBoard playing one game at a time.
+Run from the root directory:
+    python3 -m benchmarks.bench_batch --rows 4 --cols 5 --sizes 1000 10000 100000
+"""
+
+from src.batch import BatchBoard
+from src.bitboard import BitBoard
+import argparse
+import numpy as np
+import random
+import time
+
+def bench_bitboard(cols, rows, games, seed):
+    """Returns: Position-steps per second of random games played one by one"""
+    rng = random.Random(seed)
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        board = BitBoard(cols, rows)
+        player_one_turn = True
+        while not board.game_over():
+            if not board.move(*rng.choice(board.legal_moves()), player_one_turn):
+                player_one_turn = not player_one_turn
+            steps += 1
+    return steps / (time.perf_counter() - start)
+
+def bench_batch(cols, rows, size, seed):
+    """Returns: Position-steps per second of random playouts of a whole batch"""
+    batch = BatchBoard(cols, rows, size)
+    start = time.perf_counter()
+    steps = batch.playout(np.random.default_rng(seed))
+    return steps / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser("Benchmarks the batched NumPy board engine.")
+    parser.add_argument('--rows', dest='rows', default=4, type=int, help="number of rows on the board")
+    parser.add_argument('--cols', dest='cols', default=5, type=int, help="number of columns on the board")
+    parser.add_argument('--sizes', dest='sizes', nargs='+', default=[100, 1000, 10000, 100000], type=int,
+        help="batch sizes")
+    parser.add_argument('--games', dest='games', default=500, type=int, help="games played with BitBoard")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the random moves")
+    args = parser.parse_args()
+    print("{:<16} {:>14,.0f} steps/s".format("BitBoard", bench_bitboard(args.cols, args.rows, args.games, args.seed)))
+    for size in args.sizes:
+        rate = bench_batch(args.cols, args.rows, size, args.seed)
+        print("{:<16} {:>14,.0f} steps/s".format("batch {:,}".format(size), rate))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Compares move/revert_move and push/pop throughput of the list-of-lists Board and BitBoard.
+Run from the root directory:
+    python3 -m benchmarks.bench_board --rows 4 --cols 5
+"""
+
+from src.board import Board
+from src.bitboard import BitBoard
+import argparse
+import random
+import time
+
+def random_games(cols, rows, games, seed):
+    """Random move orders used to drive every engine through the same states."""
+    edges = [(row, col) for row in range(2 * rows + 1) for col in range(2 * cols + 1) if row % 2 != col % 2]
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(games):
+        order = list(edges)
+        rng.shuffle(order)
+        orders.append(order)
+    return orders
+
+def bench(board_class, cols, rows, orders, repeat, stack=False):
+    """Plays every game forwards with move and backwards with revert_move,
+    or with push and pop if stack.
+    Returns: Best (moves per second, seconds) over the repeats
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        board = board_class(cols, rows)
+        play, undo = (board.push, board.pop) if stack else (board.move, board.revert_move)
+        start = time.perf_counter()
+        for order in orders:
+            player_one_turn = True
+            for row, col in order:
+                if not play(row, col, player_one_turn):
+                    player_one_turn = not player_one_turn
+            if stack:
+                for _ in order:
+                    undo()
+            else:
+                for row, col in reversed(order):
+                    undo(row, col)
+        best = min(best, time.perf_counter() - start)
+    operations = 2 * sum(len(order) for order in orders)
+    return operations / best, best
+
+def main():
+    parser = argparse.ArgumentParser("Benchmarks Board against BitBoard.")
+    parser.add_argument('--rows', dest='rows', default=4, type=int, help="number of rows on the board")
+    parser.add_argument('--cols', dest='cols', default=5, type=int, help="number of columns on the board")
+    parser.add_argument('--games', dest='games', default=2000, type=int, help="random games per repeat")
+    parser.add_argument('--repeat', dest='repeat', default=5, type=int, help="repeats (best is reported)")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the random games")
+    args = parser.parse_args()
+    orders = random_games(args.cols, args.rows, args.games, args.seed)
+    results = {}
+    for board_class in (Board, BitBoard):
+        for stack in (False, True):
+            rate, seconds = bench(board_class, args.cols, args.rows, orders, args.repeat, stack)
+            results[board_class.__name__, stack] = rate
+            print("{:<10} {:<9} {:>12,.0f} ops/s  ({:.3f} s)".format(board_class.__name__,
+                'push/pop' if stack else 'move', rate, seconds))
+    print("speedup    {:<9} {:>12.2f}x".format('move', results['BitBoard', False] / results['Board', False]))
+    print("push/pop   {:<9} {:>12.2f}x".format('Board', results['Board', True] / results['Board', False]))
+    print("push/pop   {:<9} {:>12.2f}x".format('BitBoard', results['BitBoard', True] / results['BitBoard', False]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Measures how the root-parallel search scales with the number of workers.
+Each position is searched to a fixed depth by the sequential Computer and by
+ParallelComputer with every worker count; speedup is relative to sequential.
+Run from the root directory:
+    python3 -m benchmarks.bench_parallel --workers 1 2 4 --depth 7
+"""
+
+from src.computer import Computer
+from src.parallel import ParallelComputer
+from .bench_table import midgame_positions, play
+import argparse
+import time
+
+def timed_search(computer, depth):
+    """Seconds spent on a fixed depth root search"""
+    computer._start_search()
+    start = time.perf_counter()
+    computer._root_search(depth, None)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser("Benchmarks the parallel search against the sequential search.")
+    parser.add_argument('--workers', dest='workers', default=[1, 2, 4], type=int, nargs='+',
+        help="worker counts to measure")
+    parser.add_argument('--depth', dest='depth', default=7, type=int, help="search depth")
+    parser.add_argument('--positions', dest='positions', default=3, type=int, help="positions per board size")
+    parser.add_argument('--moves', dest='moves', default=18, type=int, help="random moves played per position")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the positions")
+    args = parser.parse_args()
+    for cols, rows in ((5, 4), (5, 5)):
+        positions = midgame_positions(cols, rows, args.positions, args.moves, args.seed)
+        sequential = sum(timed_search(Computer(play(cols, rows, moves)), args.depth) for moves in positions)
+        print("{}x{} sequential {:.3f} s".format(rows, cols, sequential))
+        for workers in args.workers:
+            elapsed = 0
+            for moves in positions:
+                computer = ParallelComputer(play(cols, rows, moves), workers)
+                # start the workers before timing
+                timed_search(computer, 1)
+                elapsed += timed_search(computer, args.depth)
+                computer.close()
+            print("{}x{} workers {:<3} {:.3f} s  speedup {:.2f}x".format(rows, cols, workers, elapsed,
+                sequential / elapsed))
+
+if __name__ == "__main__":
+    main()
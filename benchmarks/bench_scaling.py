@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Measures how memory and move latency grow with the board size. For every size
+it reports the memory of the shared geometry tables and of one Board and one
+BitBoard (traced with tracemalloc), and the time per move of the alpha beta and
+Monte Carlo tree search bots under a think time, in positions with a third of
+the edges taken.
+Run from the root directory:
+    python3 -m benchmarks.bench_scaling --sizes 5 10 20 30 --think-ms 200
+"""
+
+from src.board import Board
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.geometry import geometry
+from src.mcts import MctsComputer
+from src.transposition import TranspositionTable
+from .bench_table import midgame_positions, play
+import argparse
+import time
+import tracemalloc
+
+def traced(build):
+    """Returns: (object built, bytes it holds, seconds spent)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return built, size, elapsed
+
+def move_latency(make_bot, positions, cols, rows):
+    """Returns: (mean, max) seconds of the bot's move over the positions"""
+    latencies = []
+    for moves in positions:
+        bot = make_bot(play(cols, rows, moves))
+        start = time.perf_counter()
+        bot.choose_move()
+        latencies.append(time.perf_counter() - start)
+        if hasattr(bot, 'close'):
+            bot.close()
+    return sum(latencies) / len(latencies), max(latencies)
+
+def main():
+    parser = argparse.ArgumentParser("Benchmarks memory and move latency by board size.")
+    parser.add_argument('--sizes', dest='sizes', default=[5, 10, 20, 30], type=int, nargs='+',
+        help="square board sizes to measure")
+    parser.add_argument('--think-ms', dest='think_ms', default=200, type=int, help="think time per move")
+    parser.add_argument('--positions', dest='positions', default=3, type=int, help="positions per board size")
+    parser.add_argument('--tt-entries', dest='tt_entries', default=1 << 16, type=int,
+        help="transposition table slots of the alpha beta bot")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the positions")
+    args = parser.parse_args()
+    bots = (("alphabeta", lambda board: Computer(board, TranspositionTable(args.tt_entries), args.think_ms)),
+        ("mcts", lambda board: MctsComputer(board, think_ms=args.think_ms)))
+    print("{:<6} {:>12} {:>10} {:>12} {:>12}".format("size", "geometry", "setup", "Board", "BitBoard")
+        + "".join(" {:>20}".format(name + " mean/max") for name, _ in bots))
+    for size in args.sizes:
+        geometry.cache_clear()
+        _, geometry_bytes, setup = traced(lambda: geometry(size, size))
+        _, board_bytes, _ = traced(lambda: Board(size, size))
+        _, bitboard_bytes, _ = traced(lambda: BitBoard(size, size))
+        positions = midgame_positions(size, size, args.positions, len(geometry(size, size).edges) // 3, args.seed)
+        line = "{:<6} {:>10,}B {:>9.3f}s {:>10,}B {:>10,}B".format("{}x{}".format(size, size), geometry_bytes,
+            setup, board_bytes, bitboard_bytes)
+        for _, make_bot in bots:
+            mean, longest = move_latency(make_bot, positions, size, size)
+            line += " {:>9.3f}s/{:>8.3f}s".format(mean, longest)
+        print(line, flush=True)
+
+if __name__ == "__main__":
+    main()
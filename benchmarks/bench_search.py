@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the nodes and time the computer's searches need to settle late
+middlegame positions: alpha beta, PVS and MTD(f) search to the end of the game
+for the exact value, the proof-number search decides win, draw or loss.
+Positions are reached by random safe moves (moves that give no box a third
+side) until only a few safe moves are left, so the position is level and the
+fight over the long chains decides the game.
+Run from the root directory:
+    python3 -m benchmarks.bench_search --rows 4 --cols 5 --positions 4
+"""
+
+from src.bitboard import BitBoard
+from src.computer import Computer, ORACLE_EDGES, _SearchTimeout
+from src.proof import ProofSearch, WIN, DRAW
+from src.solver import solver
+from src.transposition import TranspositionTable
+import argparse
+import random
+import time
+
+def late_middlegame_positions(cols, rows, count, safe_edges, seed):
+    """Returns: Seeded (board, whether player one is to move) pairs"""
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        board = BitBoard(cols, rows)
+        player_one_turn = True
+        while True:
+            safe = sorted(edge for edge in board.legal_moves()
+                if all(board.sides_taken(row, col) < 2 for row, col in board.adjacent_boxes(*edge)))
+            if len(safe) <= safe_edges:
+                break
+            board.move(*rng.choice(safe), player_one_turn)
+            player_one_turn = not player_one_turn
+        positions.append((board, player_one_turn))
+    return positions
+
+def solve(board, player_one, search, seconds):
+    """Searches the position to the end of the game.
+    Returns: (advantage or None on timeout, nodes, seconds)
+    """
+    # every search starts without the exact values the others memoized
+    solver.cache_clear()
+    computer = Computer(board, TranspositionTable(1 << 20), player_one=player_one, search=search)
+    computer._start_search()
+    start = time.perf_counter()
+    computer._deadline = start + seconds
+    try:
+        value, _ = computer._root_search(board.edges_remaining, None)
+    except _SearchTimeout:
+        value = None
+    return value, computer._nodes, time.perf_counter() - start
+
+def decide(board, player_one, seconds):
+    """Returns: (outcome or None if undecided, nodes, seconds) of the proof-number search"""
+    solver.cache_clear()
+    start = time.perf_counter()
+    prover = ProofSearch(board, player_one, ORACLE_EDGES, deadline=start + seconds)
+    decided = prover.decide()
+    return None if decided is None else decided[0], prover.nodes, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser("Benchmarks the searches on late middlegame positions.")
+    parser.add_argument('--rows', dest='rows', default=4, type=int, help="number of rows on the board")
+    parser.add_argument('--cols', dest='cols', default=5, type=int, help="number of columns on the board")
+    parser.add_argument('--positions', dest='positions', default=4, type=int, help="number of positions")
+    parser.add_argument('--safe', dest='safe', default=6, type=int, help="safe moves left in the positions")
+    parser.add_argument('--seconds', dest='seconds', default=60, type=float,
+        help="time limit of each search of a position")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the positions")
+    args = parser.parse_args()
+    positions = late_middlegame_positions(args.cols, args.rows, args.positions, args.safe, args.seed)
+    totals = {}
+    for index, (board, player_one) in enumerate(positions):
+        print("position {} ({} free edges)".format(index, board.edges_remaining))
+        results = [(search,) + solve(board, player_one, search, args.seconds) for search in ('alphabeta', 'pvs', 'mtdf')]
+        results.append(('proof',) + decide(board, player_one, args.seconds))
+        for search, value, nodes, seconds in results:
+            if value is None:
+                shown = "timeout" if search != 'proof' else "undecided"
+            elif search == 'proof':
+                shown = {WIN: "win", DRAW: "draw"}.get(value, "loss")
+            else:
+                shown = "{:+d}".format(value)
+            print("  {:<10} {:>10} {:>12,} nodes {:>8.2f} s".format(search, shown, nodes, seconds))
+            nodes_total, seconds_total = totals.get(search, (0, 0))
+            totals[search] = (nodes_total + nodes, seconds_total + seconds)
+    print("total")
+    for search, (nodes, seconds) in totals.items():
+        print("  {:<10} {:>10} {:>12,} nodes {:>8.2f} s".format(search, "", nodes, seconds))
+
+if __name__ == "__main__":
+    main()
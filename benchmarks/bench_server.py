@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Load generator for the game server: N clients play concurrent games of random
+moves and the round trip of every move (the client's move and the bot's
+replies) is timed. Reports p50 and p99 move latency and the moves served per
+second. Without --port or --unix a server is started in this process on a free
+port. Run from the root directory:
+    python3 -m benchmarks.bench_server --clients 16 --games 2 --workers 4
+"""
+
+from src.bitboard import BitBoard
+from src.server import GameServer
+import argparse
+import asyncio
+import json
+import random
+import time
+
+def percentile(values, fraction):
+    """Nearest rank percentile of the values"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def client(connect, games, cols, rows, bot, rng, latencies):
+    """Plays the games over one connection, appending each move's round trip in seconds"""
+    reader, writer = await connect()
+    async def request(message):
+        writer.write((json.dumps(message) + '\n').encode())
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response
+    try:
+        for _ in range(games):
+            board = BitBoard(cols, rows)
+            response = await request({'op': 'new', 'cols': cols, 'rows': rows, 'bot': bot})
+            while not response['over']:
+                row, col = rng.choice(sorted(board.legal_moves()))
+                board.move(row, col, True)
+                start = time.perf_counter()
+                response = await request({'op': 'move', 'edge': [row, col]})
+                latencies.append(time.perf_counter() - start)
+                for row, col in response['moves']:
+                    board.move(row, col, False)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def run(args):
+    server = listener = None
+    if args.port is None and args.unix is None:
+        server = GameServer(args.workers, max(args.clients, 1), args.think_ms)
+        listener = await server.start()
+        port = listener.sockets[0].getsockname()[1]
+        connect = lambda: asyncio.open_connection('127.0.0.1', port)
+    elif args.unix is not None:
+        connect = lambda: asyncio.open_unix_connection(args.unix)
+    else:
+        connect = lambda: asyncio.open_connection(args.host, args.port)
+    latencies = []
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(client(connect, args.games, args.cols, args.rows, args.bot,
+            random.Random(args.seed + index), latencies) for index in range(args.clients)))
+    finally:
+        if server is not None:
+            # let the sessions see their connections close
+            while server.sessions:
+                await asyncio.sleep(0.01)
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+    return latencies, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser("Measures the game server's move latency under concurrent games.")
+    parser.add_argument('--clients', dest='clients', default=16, type=int, help="concurrent games")
+    parser.add_argument('--games', dest='games', default=2, type=int, help="games played by each client")
+    parser.add_argument('--rows', dest='rows', default=4, type=int, help="number of rows on the board")
+    parser.add_argument('--cols', dest='cols', default=5, type=int, help="number of columns on the board")
+    parser.add_argument('--bot', dest='bot', default='computer', help="server's bot")
+    parser.add_argument('--think-ms', dest='think_ms', default=100, type=int,
+        help="bot think time per move of the server started here")
+    parser.add_argument('--workers', dest='workers', default=2, type=int,
+        help="search processes of the server started here")
+    parser.add_argument('--host', dest='host', default='127.0.0.1', help="address of a running server")
+    parser.add_argument('--port', dest='port', default=None, type=int, help="port of a running server")
+    parser.add_argument('--unix', dest='unix', default=None, help="Unix socket of a running server")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the clients' moves")
+    args = parser.parse_args()
+    latencies, elapsed = asyncio.run(run(args))
+    print("{} clients, {} moves in {:.2f} s ({:.1f} moves/s)".format(args.clients, len(latencies), elapsed,
+        len(latencies) / elapsed))
+    print("move latency p50 {:.1f} ms  p99 {:.1f} ms  max {:.1f} ms".format(percentile(latencies, 0.5) * 1000,
+        percentile(latencies, 0.99) * 1000, max(latencies) * 1000))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Measures nodes searched and transposition table entries with and without
+symmetry canonicalization, on positions from early in the game where
+symmetric transpositions are most common.
+Run from the root directory:
+    python3 -m benchmarks.bench_symmetry --rows 4 --cols 4 --depth 6
+"""
+
+from src.computer import Computer
+from src.transposition import TranspositionTable
+from .bench_table import midgame_positions, play
+import argparse
+import time
+
+def main():
+    parser = argparse.ArgumentParser("Benchmarks the search with and without symmetry canonicalization.")
+    parser.add_argument('--rows', dest='rows', default=4, type=int, help="number of rows on the board")
+    parser.add_argument('--cols', dest='cols', default=4, type=int, help="number of columns on the board")
+    parser.add_argument('--depth', dest='depth', default=6, type=int, help="search depth")
+    parser.add_argument('--positions', dest='positions', default=5, type=int, help="number of positions")
+    parser.add_argument('--moves', dest='moves', default=2, type=int, help="random moves played per position")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the positions")
+    args = parser.parse_args()
+    positions = [[]] + midgame_positions(args.cols, args.rows, args.positions, args.moves, args.seed)
+    for symmetry in (False, True):
+        nodes, entries, elapsed = 0, 0, 0
+        for moves in positions:
+            table = TranspositionTable(1 << 20)
+            computer = Computer(play(args.cols, args.rows, moves), table, symmetry=symmetry)
+            computer._start_search()
+            start = time.perf_counter()
+            computer._root_search(args.depth, None)
+            elapsed += time.perf_counter() - start
+            nodes += computer._nodes
+            entries += len(table)
+        print("symmetry {:<5}  nodes {:>10,}  table entries {:>9,}  {:.2f} s".format(str(symmetry), nodes,
+            entries, elapsed))
+
+if __name__ == "__main__":
+    main()
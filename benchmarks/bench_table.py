@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the search depth the computer reaches within a fixed think time with
+and without the transposition table. A one slot table stands in for no table.
+Run from the root directory:
+    python3 -m benchmarks.bench_table --rows 4 --cols 5 --think-ms 1000
+"""
+
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.transposition import TranspositionTable
+import argparse
+import random
+
+def midgame_positions(cols, rows, count, moves, seed):
+    """Seeded positions reached by playing random moves from the start."""
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        order = list(BitBoard(cols, rows).geometry.edges)
+        rng.shuffle(order)
+        positions.append(order[:moves])
+    return positions
+
+def play(cols, rows, moves):
+    """BitBoard after the moves, alternating turns unless a box is taken"""
+    board = BitBoard(cols, rows)
+    player_one_turn = True
+    for row, col in moves:
+        if not board.move(row, col, player_one_turn):
+            player_one_turn = not player_one_turn
+    return board
+
+def main():
+    parser = argparse.ArgumentParser("Benchmarks search depth with and without the transposition table.")
+    parser.add_argument('--rows', dest='rows', default=4, type=int, help="number of rows on the board")
+    parser.add_argument('--cols', dest='cols', default=5, type=int, help="number of columns on the board")
+    parser.add_argument('--think-ms', dest='think_ms', default=1000, type=int, help="think time per position")
+    parser.add_argument('--positions', dest='positions', default=5, type=int, help="number of positions")
+    parser.add_argument('--moves', dest='moves', default=20, type=int, help="random moves played per position")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the positions")
+    args = parser.parse_args()
+    positions = midgame_positions(args.cols, args.rows, args.positions, args.moves, args.seed)
+    for name, entries in (("no table", 1), ("table", 1 << 18)):
+        depths, nodes = [], 0
+        for moves in positions:
+            computer = Computer(play(args.cols, args.rows, moves), TranspositionTable(entries), args.think_ms)
+            computer.choose_move()
+            depths.append(computer.last_stats.depth)
+            nodes += computer.last_stats.nodes
+        print("{:<9} depths {}  mean {:.2f}  nodes {:,}".format(name, depths, sum(depths) / len(depths), nodes))
+
+if __name__ == "__main__":
+    main()
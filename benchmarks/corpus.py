@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed, versioned corpus of positions for the benchmark suite (see suite.py).
+
+Positions are stored one JSON object per line in corpus/positions-vN.jsonl:
+    id        --> "ROWSxCOLS-category-index"
+    category  --> opening (a few random moves), midgame (random moves that do
+                  not give a box a third side) or endgame (the position once
+                  every remaining move gives one, i.e. only chains and loops)
+    rows, cols
+    depth     --> depth of the fixed depth search benchmark
+    position  --> hex of the compact binary encoding (see src/encoding.py)
+The file is generated from a seed, but it is checked in so that a change to the
+generator cannot silently change what is measured: any change to the corpus
+must bump CORPUS_VERSION. Regenerate it from the root directory with:
+    python3 -m benchmarks.corpus
+"""
+
+from src.bitboard import BitBoard
+from src.encoding import to_bytes, from_bytes
+import argparse
+import json
+import os
+import random
+
+CORPUS_VERSION = 1
+
+# (rows, cols) of the corpus and the search depth of each category there
+SIZES = [(3, 3), (4, 4), (4, 5), (5, 5)]
+DEPTHS = {
+    (3, 3): {'opening': 6, 'midgame': 8, 'endgame': 10},
+    (4, 4): {'opening': 5, 'midgame': 6, 'endgame': 8},
+    (4, 5): {'opening': 5, 'midgame': 6, 'endgame': 7},
+    (5, 5): {'opening': 4, 'midgame': 5, 'endgame': 7},
+}
+POSITIONS_PER_CATEGORY = 2
+
+def default_path(version=CORPUS_VERSION):
+    """Location of the corpus file of the version"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus',
+        'positions-v{}.jsonl'.format(version))
+
+def _safe_moves(board):
+    """Free edges that do not give any box a third side"""
+    return [edge for edge in board.legal_moves()
+        if all(board.sides_taken(row, col) < 2 for row, col in board.adjacent_boxes(*edge))]
+
+def _random_position(cols, rows, category, rng):
+    board = BitBoard(cols, rows)
+    player_one_turn = True
+    if category == 'opening':
+        count = rng.randint(2, 4)
+    elif category == 'midgame':
+        count = len(board.geometry.edges) // 3
+    else:
+        count = len(board.geometry.edges)
+    for _ in range(count):
+        moves = _safe_moves(board)
+        if not moves:
+            break
+        if not board.move(*rng.choice(moves), player_one_turn):
+            player_one_turn = not player_one_turn
+    return board
+
+def generate(seed=CORPUS_VERSION):
+    """Returns: Corpus entries (see the module docstring) generated from the seed"""
+    rng = random.Random(seed)
+    entries = []
+    for rows, cols in SIZES:
+        for category, depth in DEPTHS[rows, cols].items():
+            for index in range(POSITIONS_PER_CATEGORY):
+                board = _random_position(cols, rows, category, rng)
+                entries.append({
+                    'id': '{}x{}-{}-{}'.format(rows, cols, category, index),
+                    'category': category,
+                    'rows': rows,
+                    'cols': cols,
+                    'depth': depth,
+                    'position': to_bytes(board).hex(),
+                })
+    return entries
+
+def load(path=None):
+    """Returns: Corpus entries stored in the file (the current version if not given)"""
+    with open(path or default_path()) as stream:
+        return [json.loads(line) for line in stream if line.strip()]
+
+def board_of(entry):
+    """Returns: Fresh BitBoard of the entry's position"""
+    return from_bytes(bytes.fromhex(entry['position']))
+
+def main():
+    parser = argparse.ArgumentParser("Writes the benchmark position corpus.")
+    parser.add_argument('--out', dest='out', default=default_path(), help="corpus file")
+    args = parser.parse_args()
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    entries = generate()
+    with open(args.out, 'w') as stream:
+        for entry in entries:
+            stream.write(json.dumps(entry) + "\n")
+    print("{} positions --> {}".format(len(entries), args.out))
+
+if __name__ == "__main__":
+    main()
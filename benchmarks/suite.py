@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Reproducible benchmark suite over the fixed position corpus (see corpus.py).
+
+Measurements, keyed by name in the results:
+    board/ENGINE/ROWSxCOLS/move_revert --> move + revert_move calls per second
+                                           over seeded random games
+    board/ENGINE/ROWSxCOLS/push_pop    --> push + pop calls per second over the
+                                           same games
+    board/ENGINE/ROWSxCOLS/legal_moves --> legal_moves calls per second over
+                                           the corpus positions of the size
+    search/ID --> nodes, value and seconds of a fixed depth search
+    move/ID   --> seconds of Computer.choose_move (fixed depth, no book)
+    kernel/ID --> nodes, value and nodes per second of the compiled kernel's
+                  search to the same depth (see src/kernel.py)
+    kernel/ID/python --> the same for the computer's own search with the
+                  kernel's settings (score leaves, no quiescence, no exact
+                  solver), the speedup reference; both values must agree
+Kernel results are left out when the kernel is not built, and are not missing
+then in a comparison.
+Every timing is the best of --repeat runs. Results are written as JSON; with
+--baseline they are compared against a stored run and the exit status is 1 on
+a regression: node counts and values must match exactly (the search changed
+otherwise), rates may not drop and times may not grow by more than
+--tolerance (plus 5 ms of slack for very short timings). Timings are scaled by
+a fixed pure Python workload timed in the same run, so a uniformly slower or
+busier machine does not count as a regression; still, the baseline is best
+regenerated with --save-baseline on the machine that runs the comparison.
+Run from the root directory:
+    python3 -m benchmarks.suite --baseline benchmarks/baseline.json --out results.json
+"""
+
+from benchmarks.bench_board import random_games, bench
+from benchmarks.corpus import CORPUS_VERSION, load, board_of
+from src.board import Board
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.evaluation import ScoreEvaluator
+from src import kernel
+from src.transposition import TranspositionTable
+import argparse
+import json
+import platform
+import sys
+import time
+
+# absolute slack in seconds before a timing counts as a regression
+_SLACK = 0.005
+
+def calibrate(repeat):
+    """Returns: Best seconds of a fixed workload of dict, tuple and integer operations"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        table = {}
+        for index in range(200000):
+            key = (index & 0xff, index >> 8)
+            table[key] = table.get(key, 0) ^ index
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _matrix_board(board):
+    """Board with the same edges as the BitBoard (box owners are not kept)"""
+    matrix = Board(board.columns, board.rows)
+    for row, col in board.geometry.edges:
+        if board.taken(row, col):
+            matrix.move(row, col, True)
+    return matrix
+
+def bench_board(entries, games, repeat, seed=0):
+    """Returns: board engine results by name"""
+    results = {}
+    sizes = sorted({(entry['rows'], entry['cols']) for entry in entries})
+    for rows, cols in sizes:
+        orders = random_games(cols, rows, games, seed)
+        positions = [board_of(entry) for entry in entries if (entry['rows'], entry['cols']) == (rows, cols)]
+        for board_class in (Board, BitBoard):
+            name = 'board/{}/{}x{}'.format(board_class.__name__, rows, cols)
+            rate, _ = bench(board_class, cols, rows, orders, repeat)
+            results[name + '/move_revert'] = {'rate': rate}
+            rate, _ = bench(board_class, cols, rows, orders, repeat, stack=True)
+            results[name + '/push_pop'] = {'rate': rate}
+            boards = positions if board_class is BitBoard else [_matrix_board(board) for board in positions]
+            calls = 1000
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for board in boards:
+                    for _ in range(calls):
+                        board.legal_moves()
+                best = min(best, time.perf_counter() - start)
+            results[name + '/legal_moves'] = {'rate': calls * len(boards) / best}
+    return results
+
+def bench_search(entries, repeat):
+    """Returns: search and move results by name"""
+    results = {}
+    for entry in entries:
+        best = float('inf')
+        for _ in range(repeat):
+            computer = Computer(board_of(entry), TranspositionTable())
+            computer._start_search()
+            start = time.perf_counter()
+            value, _ = computer._root_search(entry['depth'], None)
+            best = min(best, time.perf_counter() - start)
+        results['search/' + entry['id']] = {'nodes': computer._nodes, 'value': value, 'seconds': best}
+        best = float('inf')
+        for _ in range(repeat):
+            computer = Computer(board_of(entry), TranspositionTable())
+            start = time.perf_counter()
+            computer.choose_move()
+            best = min(best, time.perf_counter() - start)
+        results['move/' + entry['id']] = {'seconds': best}
+    return results
+
+def bench_kernel(entries, repeat):
+    """Returns: kernel and reference search results by name"""
+    results = {}
+    for entry in entries:
+        board = board_of(entry)
+        best = float('inf')
+        for _ in range(repeat):
+            computer = Computer(board, TranspositionTable(), evaluator=ScoreEvaluator, quiescence=False,
+                oracle_edges=0, symmetry=False)
+            computer._start_search()
+            start = time.perf_counter()
+            value, _ = computer._root_search(entry['depth'], None)
+            best = min(best, time.perf_counter() - start)
+        results['kernel/{}/python'.format(entry['id'])] = {'nodes': computer._nodes, 'value': value,
+            'rate': computer._nodes / best}
+        position = kernel.KernelBoard.from_backend(board)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            kernel_value, _, nodes = position.search(entry['depth'], False)
+            best = min(best, time.perf_counter() - start)
+        if kernel_value != value:
+            raise AssertionError("{}: kernel value {} != {}".format(entry['id'], kernel_value, value))
+        results['kernel/' + entry['id']] = {'nodes': nodes, 'value': kernel_value, 'rate': nodes / best}
+    return results
+
+def kernel_speedup(results):
+    """Returns: Kernel nodes per second over the Python search's, over all
+    kernel entries, or None without them
+    """
+    kernel_rates = [result['rate'] for name, result in results.items()
+        if name.startswith('kernel/') and not name.endswith('/python')]
+    python_rates = [result['rate'] for name, result in results.items()
+        if name.startswith('kernel/') and name.endswith('/python')]
+    if not kernel_rates:
+        return None
+    return (sum(kernel_rates) / len(kernel_rates)) / (sum(python_rates) / len(python_rates))
+
+def run(entries, games=200, repeat=5):
+    """Returns: Results document of the whole suite"""
+    calibration = calibrate(repeat)
+    results = bench_board(entries, games, repeat)
+    results.update(bench_search(entries, repeat))
+    if kernel.AVAILABLE:
+        results.update(bench_kernel(entries, repeat))
+    # averaged over the start and end of the run
+    calibration = (calibration + calibrate(repeat)) / 2
+    return {
+        'corpus_version': CORPUS_VERSION,
+        'calibration': calibration,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'kernel': kernel.AVAILABLE,
+        'results': results,
+    }
+
+def compare(document, baseline, tolerance):
+    """Returns: Descriptions of the regressions of the results against the baseline"""
+    if document['corpus_version'] != baseline['corpus_version']:
+        return ["corpus version {} does not match the baseline's {}".format(
+            document['corpus_version'], baseline['corpus_version'])]
+    regressions = []
+    results = document['results']
+    # > 1 when this run's machine was slower than the baseline's
+    speed = document['calibration'] / baseline['calibration']
+    for name, expected in sorted(baseline['results'].items()):
+        actual = results.get(name)
+        if actual is None and name.startswith('kernel/') and not document.get('kernel'):
+            continue
+        if actual is None:
+            regressions.append("{}: missing".format(name))
+            continue
+        for field in ('nodes', 'value'):
+            if field in expected and actual[field] != expected[field]:
+                regressions.append("{}: {} {} != {}".format(name, field, actual[field], expected[field]))
+        if 'rate' in expected and actual['rate'] * speed < expected['rate'] * (1 - tolerance):
+            regressions.append("{}: rate {:,.0f}/s < {:,.0f}/s (scaled by {:.2f})".format(
+                name, actual['rate'] * speed, expected['rate'], speed))
+        if 'seconds' in expected and actual['seconds'] / speed > expected['seconds'] * (1 + tolerance) + _SLACK:
+            regressions.append("{}: {:.4f} s > {:.4f} s (scaled by {:.2f})".format(
+                name, actual['seconds'] / speed, expected['seconds'], speed))
+    return regressions
+
+def _format(name, result):
+    fields = []
+    if 'rate' in result:
+        fields.append("{:>14,.0f}/s".format(result['rate']))
+    if 'nodes' in result:
+        fields.append("{:>9,} nodes  value {:>3}".format(result['nodes'], result['value']))
+    if 'seconds' in result:
+        fields.append("{:>9.4f} s".format(result['seconds']))
+    return "{:<36} {}".format(name, "  ".join(fields))
+
+def main():
+    parser = argparse.ArgumentParser("Runs the benchmark suite over the position corpus.")
+    parser.add_argument('--corpus', dest='corpus', default=None, help="corpus file (the current version if not present)")
+    parser.add_argument('--games', dest='games', default=200, type=int, help="random games per board size")
+    parser.add_argument('--repeat', dest='repeat', default=5, type=int, help="repeats of each timing (best is kept)")
+    parser.add_argument('--out', dest='out', default=None, help="file the results are written to as JSON")
+    parser.add_argument('--baseline', dest='baseline', default=None, help="results to compare against")
+    parser.add_argument('--tolerance', dest='tolerance', default=0.25, type=float,
+        help="allowed relative slowdown before a timing counts as a regression")
+    parser.add_argument('--save-baseline', dest='save_baseline', default=None,
+        help="file the results are written to as the new baseline")
+    args = parser.parse_args()
+    document = run(load(args.corpus), args.games, args.repeat)
+    for name, result in sorted(document['results'].items()):
+        print(_format(name, result))
+    print("{:<36} {:>9.4f} s".format('calibration', document['calibration']))
+    speedup = kernel_speedup(document['results'])
+    if speedup is not None:
+        print("{:<36} {:>9.1f} x".format('kernel speedup (nodes per second)', speedup))
+    for path in (args.out, args.save_baseline):
+        if path is not None:
+            with open(path, 'w') as stream:
+                json.dump(document, stream, indent=1, sort_keys=True)
+    if args.baseline is not None:
+        with open(args.baseline) as stream:
+            regressions = compare(document, json.load(stream), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        print("{} regressions against {}".format(len(regressions), args.baseline))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Builds the optional compiled board kernel (see src/kernel.py) next to its
+sources:
+    python3 setup.py build_ext --inplace
+The game runs without it, on the pure Python engines.
+"""
+
+from setuptools import Extension, setup
+
+setup(
+    name='dots-and-boxes',
+    ext_modules=[Extension('src._kernel', ['src/_kernel.c'], optional=True)],
+)
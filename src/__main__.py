@@ -3,29 +3,152 @@
 Handles the Dots and Boxes game. Supports multiplayer and singleplayer.
 """
 
+from .background import BackgroundComputer
 from .board import Board
+from .bitboard import BitBoard
 from .gui import Gui
-from .computer import Computer
+from .book import OpeningBook, default_path
+from . import solver
+from .computer import Computer, SEARCHES
+from .evaluation import EVALUATORS
+from .instrumentation import MetricsWriter
+from . import kernel
+from .mcts import MctsComputer
+from .parallel import ParallelComputer
+from .server import GameServer, THINK_MS, serve
+from .transposition import TranspositionTable
 import curses
 import argparse
+import asyncio
+import os
+import sys
+
+# boards with at least this many boxes get a think time per move when none is
+# given, as the fixed depth search does not finish on them
+LARGE_BOARD_BOXES = 64
+LARGE_BOARD_THINK_MS = 1000
 
 class Controller:
     """Parses the command line and initializes the game objects."""
     def __init__(self):
         args = self._get_args()
+        self.serving = args.serve
+        if self.serving:
+            self._server = GameServer(args.workers, args.max_games, args.think_ms or THINK_MS,
+                args.budget_ms, args.idle_s)
+            self._address = args.host, args.port, args.unix
+            return
         self.multiplayer = args.multiplayer
-        self._backend = Board(args.cols, args.rows)
+        board_class = {'kernel': kernel.FastBoard, 'bitboard': BitBoard, 'matrix': Board}[args.engine]
+        self._backend = board_class(args.cols, args.rows)
         self._display = Gui(self._backend)
+        self._show_metrics = args.metrics
+        self._metrics_out = open(args.metrics_out, 'a') if args.metrics_out and not self.multiplayer else None
         if not self.multiplayer:
-            self._computer = Computer(self._backend)
+            if args.think_ms is None and args.rows * args.cols >= LARGE_BOARD_BOXES:
+                args.think_ms = LARGE_BOARD_THINK_MS
+            instrument = args.metrics or args.metrics_out is not None
+            table = TranspositionTable(args.tt_entries)
+            book_path = args.book or default_path(args.cols, args.rows)
+            book = OpeningBook(book_path) if os.path.exists(book_path) else None
+            solved_path = args.solved or solver.default_path(args.cols, args.rows)
+            solved = solver.SolvedTable(solved_path) if os.path.exists(solved_path) else None
+            if args.bot == 'mcts':
+                computer = MctsComputer(self._backend, args.playouts, args.think_ms, workers=args.workers)
+            elif args.bot == 'learned':
+                # NumPy is only imported for the learned bot
+                from .learning import LearnedComputer, PolicyValueNet
+                computer = LearnedComputer(self._backend, PolicyValueNet.load(args.model))
+            elif args.workers > 1:
+                computer = ParallelComputer(self._backend, args.workers, table, args.think_ms, args.tt_entries,
+                    book=book, instrument=instrument, solved=solved, evaluator=EVALUATORS[args.evaluation],
+                    quiescence=args.quiescence)
+            elif args.engine == 'kernel' and args.search == 'alphabeta':
+                # the kernel's search values leaves by the score (see src/kernel.py)
+                computer = kernel.KernelComputer(self._backend, table, args.think_ms, book=book,
+                    instrument=instrument, solved=solved)
+            else:
+                computer = Computer(self._backend, table, args.think_ms, book=book, instrument=instrument,
+                    solved=solved, evaluator=EVALUATORS[args.evaluation], quiescence=args.quiescence,
+                    search=args.search)
+            # stopping a search running in the worker processes waits for the iteration, so they do not ponder
+            # (the tree search ponders in this process); the learned bot has nothing to ponder
+            ponder = args.ponder and args.bot != 'learned' and (args.workers <= 1 or args.bot == 'mcts')
+            self._computer = BackgroundComputer(computer, ponder=ponder)
+            self._searcher = computer
 
     def _get_args(self):
         parser = argparse.ArgumentParser("To play Dots and Boxes, specify the board size " +
             "and whether you want to play singleplayer or multiplayer.")
         parser.add_argument('--rows', dest='rows', default=4, type=int, help="number of rows on the board")
         parser.add_argument('--cols', dest='cols', default=5, type=int, help="number of columns on the board")
+        parser.add_argument('--engine', dest='engine', default='kernel' if kernel.AVAILABLE else 'bitboard',
+            choices=['kernel', 'bitboard', 'matrix'],
+            help="board engine (compiled kernel with its alpha beta search if built with setup.py, "
+            "bitmask or list-of-lists matrix)")
+        parser.add_argument('--tt-entries', dest='tt_entries', default=1 << 18, type=int,
+            help="transposition table slots used by the computer")
+        parser.add_argument('--think-ms', dest='think_ms', default=None, type=int,
+            help="computer think time per move in milliseconds (fixed depth if not present, "
+            "{} on boards of {} boxes and more)".format(LARGE_BOARD_THINK_MS, LARGE_BOARD_BOXES))
+        parser.add_argument('--eval', dest='evaluation', default='chain', choices=sorted(EVALUATORS),
+            help="static evaluation of the search's leaves (see src/evaluation.py)")
+        parser.add_argument('--no-quiescence', dest='quiescence', action='store_false',
+            help="do not take the boxes left at the search's depth limit before evaluating")
+        parser.add_argument('--bot', dest='bot', default='alphabeta', choices=['alphabeta', 'mcts', 'learned'],
+            help="computer's search (alpha beta, Monte Carlo tree search for large boards, or the learned network)")
+        parser.add_argument('--search', dest='search', default='alphabeta', choices=SEARCHES,
+            help="window of the alpha beta bot's search: full, PVS or MTD(f) null windows, or a proof-number "
+            "search deciding a win or draw first (see src/computer.py)")
+        parser.add_argument('--model', dest='model', default=None,
+            help="weights of the learned bot (books/policy.npz if not present)")
+        parser.add_argument('--playouts', dest='playouts', default=2000, type=int,
+            help="playouts per move of the Monte Carlo tree search without --think-ms")
+        parser.add_argument('--workers', dest='workers', default=1, type=int,
+            help="processes searching the computer's root moves in parallel (with --serve, every game's bot moves)")
+        parser.add_argument('--book', dest='book', default=None,
+            help="opening book file (books/ROWSxCOLS.book if not present)")
+        parser.add_argument('--solved', dest='solved', default=None,
+            help="solved table file (books/ROWSxCOLS.solved if not present)")
+        parser.add_argument('--no-ponder', dest='ponder', action='store_false',
+            help="do not let the computer search during your turn")
+        parser.add_argument('--metrics', dest='metrics', action='store_true',
+            help="show the metrics of the computer's searches next to the board")
+        parser.add_argument('--metrics-out', dest='metrics_out', default=None,
+            help="file the metrics of the computer's searches are appended to as JSON lines")
         parser.add_argument('-m', dest='multiplayer', action='store_true', help='multiplayer mode (singleplayer if not present)')
-        return parser.parse_args()
+        parser.add_argument('--serve', dest='serve', action='store_true',
+            help="host games for network clients instead of playing (see src/server.py)")
+        parser.add_argument('--host', dest='host', default='127.0.0.1', help="address the server listens on")
+        parser.add_argument('--port', dest='port', default=8765, type=int, help="TCP port the server listens on")
+        parser.add_argument('--unix', dest='unix', default=None, help="Unix socket the server listens on instead")
+        parser.add_argument('--max-games', dest='max_games', default=64, type=int,
+            help="games the server hosts at once; further clients are refused")
+        parser.add_argument('--budget-ms', dest='budget_ms', default=30000, type=int,
+            help="total think time of the server's bot per game in milliseconds")
+        parser.add_argument('--idle-s', dest='idle_s', default=300, type=float,
+            help="seconds after which the server closes an idle game")
+        args = parser.parse_args()
+        if args.engine == 'kernel' and not kernel.AVAILABLE:
+            parser.error("the kernel is not built, build it with python3 setup.py build_ext --inplace")
+        if args.search != 'alphabeta' and args.workers > 1 and args.bot == 'alphabeta':
+            parser.error("--search needs the single process search (--workers 1)")
+        if args.bot == 'learned' and not args.multiplayer and not args.serve:
+            from .learning import default_path as model_path
+            args.model = args.model or model_path()
+            if not os.path.exists(args.model):
+                parser.error("no weights at {}, train them with python3 -m src.learning".format(args.model))
+        return args
+
+    def serve(self):
+        """Runs the game server until interrupted."""
+        host, port, path = self._address
+        try:
+            asyncio.run(serve(self._server, host, port, path))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.close()
 
     def play_multiplayer(self):
         """Runs the game in multiplayer mode."""
@@ -42,24 +165,46 @@ class Controller:
 
     def play_singleplayer(self):
         """Runs the game in singleplayer mode."""
+        writer = MetricsWriter(self._metrics_out) if self._metrics_out is not None else None
         try:
             player_turn = True
             while not self._backend.game_over():
                 same_turn = False
                 if player_turn:
+                    self._computer.ponder()
                     same_turn = self._display.move(True)
                 else:
-                    same_turn = self._computer.move()
+                    self._computer.think()
+                    same_turn = self._display.wait(self._computer)
+                    metrics = self._computer.metrics
+                    if metrics is not None:
+                        if writer is not None:
+                            writer.write(metrics, rows=self._backend.rows, cols=self._backend.columns,
+                                edges_remaining=self._backend.edges_remaining)
+                        if self._show_metrics:
+                            self._display.draw_metrics(metrics)
                 if not same_turn:
                     player_turn = not player_turn
         except KeyboardInterrupt:
             pass
         finally:
             curses.endwin()
+            self._computer.close()
+            if self._metrics_out is not None:
+                self._metrics_out.close()
+            if isinstance(self._searcher, (ParallelComputer, MctsComputer)):
+                self._searcher.close()
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ['analyze']:
+        # batch analysis without the GUI (see src/analysis.py)
+        from .analysis import main
+        main(sys.argv[2:])
+        sys.exit()
     controller = Controller()
-    if controller.multiplayer:
+    if controller.serving:
+        controller.serve()
+    elif controller.multiplayer:
         controller.play_multiplayer()
     else:
         controller.play_singleplayer()
\ No newline at end of file
@@ -0,0 +1,660 @@
+/*
+ * Compiled board kernel: the state of a board in flat arrays and an alpha beta
+ * search over it. Built by setup.py as the optional extension src._kernel and
+ * wrapped by kernel.py, which falls back to the pure Python engines without it.
+ *
+ * Edges are numbered in raster order of the matrix representation (see
+ * board.py and geometry.py) and boxes row by row. Every edge keeps a taken
+ * flag, every box its number of taken sides and its owner (0 for none, 1 for
+ * player one, 2 for player two). A move and its undo touch the edge and at
+ * most two boxes. The move stack holds one int per move, laid out like the
+ * records of board.py: edge index << 3 | 4 if player one moved | a bit per
+ * box of the edge it completed.
+ *
+ * search releases the GIL, so the board must not be used by another thread
+ * while it searches (KernelComputer searches a private copy).
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <limits.h>
+#include <stddef.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <time.h>
+#endif
+
+typedef struct {
+    PyObject_HEAD
+    int cols;
+    int rows;
+    /* columns of the matrix representation */
+    int width;
+    int edge_count;
+    int box_count;
+    /* edge index --> row * width + col of the edge */
+    int *edge_cell;
+    /* row * width + col --> edge index, or -1 for box coordinates */
+    int *cell_edge;
+    /* edge index --> its two box indices, -1 past the border */
+    int *edge_boxes;
+    unsigned char *taken;
+    unsigned char *sides;
+    unsigned char *owner;
+    int *undo;
+    int undo_depth;
+    int player_one_score;
+    int player_two_score;
+    int edges_remaining;
+    /* search state */
+    int player_one;
+    long long nodes;
+    double deadline;
+    int timed_out;
+    volatile int stopped;
+} KernelObject;
+
+static double
+monotonic_seconds(void)
+{
+#ifdef _WIN32
+    LARGE_INTEGER counter, frequency;
+    QueryPerformanceCounter(&counter);
+    QueryPerformanceFrequency(&frequency);
+    return (double)counter.QuadPart / (double)frequency.QuadPart;
+#else
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return now.tv_sec + now.tv_nsec * 1e-9;
+#endif
+}
+
+static void
+kernel_free_arrays(KernelObject *self)
+{
+    PyMem_Free(self->edge_cell);
+    PyMem_Free(self->cell_edge);
+    PyMem_Free(self->edge_boxes);
+    PyMem_Free(self->taken);
+    PyMem_Free(self->sides);
+    PyMem_Free(self->owner);
+    PyMem_Free(self->undo);
+    self->edge_cell = self->cell_edge = self->edge_boxes = self->undo = NULL;
+    self->taken = self->sides = self->owner = NULL;
+}
+
+static void
+kernel_dealloc(KernelObject *self)
+{
+    kernel_free_arrays(self);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static int
+kernel_init(KernelObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"cols", "rows", NULL};
+    int cols = 4, rows = 5;
+    int row, col, cells, edge, box;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|ii", kwlist, &cols, &rows))
+        return -1;
+    if (cols < 1 || rows < 1 || cols > 1000 || rows > 1000) {
+        PyErr_SetString(PyExc_ValueError, "the board needs between 1 and 1000 rows and columns");
+        return -1;
+    }
+    kernel_free_arrays(self);
+    self->cols = cols;
+    self->rows = rows;
+    self->width = 2 * cols + 1;
+    self->edge_count = 2 * cols * rows + cols + rows;
+    self->box_count = cols * rows;
+    cells = (2 * rows + 1) * self->width;
+    self->edge_cell = PyMem_New(int, self->edge_count);
+    self->cell_edge = PyMem_New(int, cells);
+    self->edge_boxes = PyMem_New(int, 2 * self->edge_count);
+    self->taken = PyMem_Calloc(self->edge_count, 1);
+    self->sides = PyMem_Calloc(self->box_count, 1);
+    self->owner = PyMem_Calloc(self->box_count, 1);
+    self->undo = PyMem_New(int, self->edge_count);
+    if (!self->edge_cell || !self->cell_edge || !self->edge_boxes || !self->taken || !self->sides
+        || !self->owner || !self->undo) {
+        kernel_free_arrays(self);
+        PyErr_NoMemory();
+        return -1;
+    }
+    edge = 0;
+    for (row = 0; row <= 2 * rows; row++) {
+        for (col = 0; col <= 2 * cols; col++) {
+            if (row % 2 != col % 2) {
+                self->edge_cell[edge] = row * self->width + col;
+                self->cell_edge[row * self->width + col] = edge;
+                self->edge_boxes[2 * edge] = self->edge_boxes[2 * edge + 1] = -1;
+                edge++;
+            }
+            else {
+                self->cell_edge[row * self->width + col] = -1;
+            }
+        }
+    }
+    /* boxes in increasing order, like geometry.py's edge_boxes */
+    for (box = 0; box < self->box_count; box++) {
+        int top = 2 * (box / cols) * self->width + 2 * (box % cols) + 1;
+        int sides[4] = {top, top + 2 * self->width, top + self->width - 1, top + self->width + 1};
+        int side;
+        for (side = 0; side < 4; side++) {
+            int *boxes = self->edge_boxes + 2 * self->cell_edge[sides[side]];
+            boxes[boxes[0] < 0 ? 0 : 1] = box;
+        }
+    }
+    self->undo_depth = 0;
+    self->player_one_score = self->player_two_score = 0;
+    self->edges_remaining = self->edge_count;
+    self->stopped = 0;
+    return 0;
+}
+
+static int
+kernel_ready(KernelObject *self)
+{
+    if (self->taken == NULL) {
+        PyErr_SetString(PyExc_RuntimeError, "the board was not initialized");
+        return 0;
+    }
+    return 1;
+}
+
+/* Plays the edge. Returns: bits of the edge's boxes it completed */
+static inline int
+play(KernelObject *self, int edge, int player_one_turn)
+{
+    const int *boxes = self->edge_boxes + 2 * edge;
+    int captured = 0, side;
+    self->taken[edge] = 1;
+    self->edges_remaining--;
+    for (side = 0; side < 2 && boxes[side] >= 0; side++) {
+        if (++self->sides[boxes[side]] == 4) {
+            captured |= 1 << side;
+            if (player_one_turn) {
+                self->owner[boxes[side]] = 1;
+                self->player_one_score++;
+            }
+            else {
+                self->owner[boxes[side]] = 2;
+                self->player_two_score++;
+            }
+        }
+    }
+    return captured;
+}
+
+/* Undoes a move exactly from its record */
+static inline void
+unplay(KernelObject *self, int record)
+{
+    int edge = record >> 3, side;
+    const int *boxes = self->edge_boxes + 2 * edge;
+    self->taken[edge] = 0;
+    self->edges_remaining++;
+    for (side = 0; side < 2 && boxes[side] >= 0; side++) {
+        self->sides[boxes[side]]--;
+        if (record >> side & 1) {
+            self->owner[boxes[side]] = 0;
+            if (record & 4)
+                self->player_one_score--;
+            else
+                self->player_two_score--;
+        }
+    }
+}
+
+/* Returns: Index of the edge at (row, col), or -1 with an exception set */
+static int
+edge_at(KernelObject *self, int row, int col)
+{
+    if (row < 0 || row > 2 * self->rows || col < 0 || col > 2 * self->cols
+        || self->cell_edge[row * self->width + col] < 0) {
+        PyErr_Format(PyExc_ValueError, "(%d, %d) is not an edge of the board", row, col);
+        return -1;
+    }
+    return self->cell_edge[row * self->width + col];
+}
+
+/* Returns: Index of a free edge at (row, col), or -1 with an exception set */
+static int
+free_edge_at(KernelObject *self, PyObject *args, int *player_one_turn)
+{
+    int row, col, edge;
+    if (!kernel_ready(self) || !PyArg_ParseTuple(args, "iip", &row, &col, player_one_turn))
+        return -1;
+    edge = edge_at(self, row, col);
+    if (edge >= 0 && self->taken[edge]) {
+        PyErr_Format(PyExc_ValueError, "edge (%d, %d) is taken", row, col);
+        return -1;
+    }
+    return edge;
+}
+
+static PyObject *
+edge_tuple(KernelObject *self, int edge)
+{
+    int cell = self->edge_cell[edge];
+    return Py_BuildValue("(ii)", cell / self->width, cell % self->width);
+}
+
+static PyObject *
+kernel_move(KernelObject *self, PyObject *args)
+{
+    int player_one_turn, edge = free_edge_at(self, args, &player_one_turn);
+    if (edge < 0)
+        return NULL;
+    return PyBool_FromLong(play(self, edge, player_one_turn) != 0);
+}
+
+static PyObject *
+kernel_revert_move(KernelObject *self, PyObject *args)
+{
+    int row, col, edge, side;
+    const int *boxes;
+    if (!kernel_ready(self) || !PyArg_ParseTuple(args, "ii", &row, &col))
+        return NULL;
+    if ((edge = edge_at(self, row, col)) < 0)
+        return NULL;
+    if (!self->taken[edge]) {
+        PyErr_Format(PyExc_ValueError, "edge (%d, %d) is free", row, col);
+        return NULL;
+    }
+    boxes = self->edge_boxes + 2 * edge;
+    self->taken[edge] = 0;
+    self->edges_remaining++;
+    /* like the other engines, the owners of both boxes are cleared */
+    for (side = 0; side < 2 && boxes[side] >= 0; side++) {
+        self->sides[boxes[side]]--;
+        if (self->owner[boxes[side]] == 1)
+            self->player_one_score--;
+        else if (self->owner[boxes[side]] == 2)
+            self->player_two_score--;
+        self->owner[boxes[side]] = 0;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+kernel_push(KernelObject *self, PyObject *args)
+{
+    int player_one_turn, captured, edge = free_edge_at(self, args, &player_one_turn);
+    if (edge < 0)
+        return NULL;
+    captured = play(self, edge, player_one_turn);
+    self->undo[self->undo_depth++] = edge << 3 | (player_one_turn ? 4 : 0) | captured;
+    return PyBool_FromLong(captured != 0);
+}
+
+static PyObject *
+kernel_pop(KernelObject *self, PyObject *Py_UNUSED(ignored))
+{
+    int record;
+    if (!kernel_ready(self))
+        return NULL;
+    if (self->undo_depth == 0) {
+        PyErr_SetString(PyExc_IndexError, "pop from an empty move stack");
+        return NULL;
+    }
+    record = self->undo[--self->undo_depth];
+    unplay(self, record);
+    return edge_tuple(self, record >> 3);
+}
+
+static PyObject *
+kernel_legal_moves(KernelObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *moves;
+    int edge, index = 0;
+    if (!kernel_ready(self))
+        return NULL;
+    moves = PyList_New(self->edges_remaining);
+    if (moves == NULL)
+        return NULL;
+    for (edge = 0; edge < self->edge_count; edge++) {
+        if (!self->taken[edge]) {
+            PyObject *move = edge_tuple(self, edge);
+            if (move == NULL) {
+                Py_DECREF(moves);
+                return NULL;
+            }
+            PyList_SET_ITEM(moves, index++, move);
+        }
+    }
+    return moves;
+}
+
+static PyObject *
+kernel_taken(KernelObject *self, PyObject *args)
+{
+    int row, col, edge;
+    if (!kernel_ready(self) || !PyArg_ParseTuple(args, "ii", &row, &col))
+        return NULL;
+    if (row < 0 || row > 2 * self->rows || col < 0 || col > 2 * self->cols)
+        Py_RETURN_FALSE;
+    edge = self->cell_edge[row * self->width + col];
+    if (edge >= 0)
+        return PyBool_FromLong(self->taken[edge]);
+    if (row % 2 == 0)
+        return PyBool_FromLong(row < 2 * self->rows && col < 2 * self->cols
+            && self->owner[row / 2 * self->cols + col / 2] == 1);
+    return PyBool_FromLong(self->owner[row / 2 * self->cols + col / 2] == 2);
+}
+
+static PyObject *
+kernel_sides_taken(KernelObject *self, PyObject *args)
+{
+    int row, col;
+    if (!kernel_ready(self) || !PyArg_ParseTuple(args, "ii", &row, &col))
+        return NULL;
+    if (row < 0 || row >= 2 * self->rows || col < 0 || col >= 2 * self->cols || row % 2 || col % 2) {
+        PyErr_Format(PyExc_ValueError, "(%d, %d) is not a player one box coordinate", row, col);
+        return NULL;
+    }
+    return PyLong_FromLong(self->sides[row / 2 * self->cols + col / 2]);
+}
+
+static PyObject *
+kernel_game_over(KernelObject *self, PyObject *Py_UNUSED(ignored))
+{
+    if (!kernel_ready(self))
+        return NULL;
+    return PyBool_FromLong(self->edges_remaining <= 0);
+}
+
+/* Returns: int of the bits set in flags (one byte per bit, 0 or not) */
+static PyObject *
+bits_to_int(const unsigned char *flags, int count, int wanted)
+{
+    int digits = count / 4 + 1, bit;
+    PyObject *value;
+    char *hex = PyMem_Malloc(digits + 1);
+    if (hex == NULL)
+        return PyErr_NoMemory();
+    memset(hex, '0', digits);
+    hex[digits] = '\0';
+    for (bit = 0; bit < count; bit++) {
+        if (wanted ? flags[bit] == wanted : flags[bit] != 0) {
+            char *digit = hex + digits - 1 - bit / 4;
+            int nibble = (*digit <= '9' ? *digit - '0' : *digit - 'a' + 10) | 1 << bit % 4;
+            *digit = "0123456789abcdef"[nibble];
+        }
+    }
+    value = PyLong_FromString(hex, NULL, 16);
+    PyMem_Free(hex);
+    return value;
+}
+
+static PyObject *
+kernel_masks(KernelObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *edges, *player_one_boxes, *player_two_boxes;
+    if (!kernel_ready(self))
+        return NULL;
+    edges = bits_to_int(self->taken, self->edge_count, 0);
+    player_one_boxes = bits_to_int(self->owner, self->box_count, 1);
+    player_two_boxes = bits_to_int(self->owner, self->box_count, 2);
+    if (edges == NULL || player_one_boxes == NULL || player_two_boxes == NULL) {
+        Py_XDECREF(edges);
+        Py_XDECREF(player_one_boxes);
+        Py_XDECREF(player_two_boxes);
+        return NULL;
+    }
+    return Py_BuildValue("(NNN)", edges, player_one_boxes, player_two_boxes);
+}
+
+static PyObject *
+kernel_load(KernelObject *self, PyObject *args)
+{
+    const unsigned char *edges, *player_one_boxes, *player_two_boxes;
+    Py_ssize_t edge_bytes, one_bytes, two_bytes;
+    int edge, box, side;
+    if (!kernel_ready(self) || !PyArg_ParseTuple(args, "y#y#y#", &edges, &edge_bytes, &player_one_boxes,
+            &one_bytes, &player_two_boxes, &two_bytes))
+        return NULL;
+    if (edge_bytes * 8 < self->edge_count || one_bytes * 8 < self->box_count || two_bytes * 8 < self->box_count) {
+        PyErr_SetString(PyExc_ValueError, "masks too short for the board");
+        return NULL;
+    }
+    memset(self->sides, 0, self->box_count);
+    self->edges_remaining = self->edge_count;
+    for (edge = 0; edge < self->edge_count; edge++) {
+        self->taken[edge] = edges[edge / 8] >> edge % 8 & 1;
+        if (self->taken[edge]) {
+            self->edges_remaining--;
+            for (side = 0; side < 2 && self->edge_boxes[2 * edge + side] >= 0; side++)
+                self->sides[self->edge_boxes[2 * edge + side]]++;
+        }
+    }
+    self->player_one_score = self->player_two_score = 0;
+    for (box = 0; box < self->box_count; box++) {
+        if (player_one_boxes[box / 8] >> box % 8 & 1) {
+            self->owner[box] = 1;
+            self->player_one_score++;
+        }
+        else if (player_two_boxes[box / 8] >> box % 8 & 1) {
+            self->owner[box] = 2;
+            self->player_two_score++;
+        }
+        else {
+            self->owner[box] = 0;
+        }
+    }
+    self->undo_depth = 0;
+    Py_RETURN_NONE;
+}
+
+/* Box sides the edge gives: 0 completes a box, 1 is safe, 2 a sacrifice */
+static inline int
+move_class(const KernelObject *self, int edge)
+{
+    const int *boxes = self->edge_boxes + 2 * edge;
+    int most = self->sides[boxes[0]];
+    if (boxes[1] >= 0 && self->sides[boxes[1]] > most)
+        most = self->sides[boxes[1]];
+    return most == 3 ? 0 : most == 2 ? 2 : 1;
+}
+
+/*
+ * Alpha beta over the flat state, valuing leaves by the score like the
+ * computer's search with ScoreEvaluator and without quiescence. Moves are
+ * tried in the order of Computer._ordered_moves: first (if free), then moves
+ * that complete a box, safe moves and sacrifices. The edges are scanned once
+ * per class, so the node needs no move list.
+ * Returns: Advantage of the computer; best receives the best edge
+ */
+static int
+alpha_beta(KernelObject *self, int depth, int maximizer, int alpha, int beta, int first, int *best)
+{
+    int advantage, optimal, optimal_move = -1, pass, edge;
+
+    self->nodes++;
+    if ((self->nodes & 4095) == 0
+        && (self->stopped || (self->deadline >= 0 && monotonic_seconds() > self->deadline))) {
+        self->timed_out = 1;
+        return 0;
+    }
+    advantage = self->player_two_score - self->player_one_score;
+    if (self->player_one)
+        advantage = -advantage;
+    if (depth <= 0 || self->edges_remaining == 0)
+        return advantage;
+    if (first >= 0 && self->taken[first])
+        first = -1;
+    optimal = maximizer ? INT_MIN : INT_MAX;
+    for (pass = first >= 0 ? -1 : 0; pass < 3; pass++) {
+        for (edge = pass < 0 ? first : 0; edge < self->edge_count; edge++) {
+            int player_one_turn, captured, value;
+            if (pass >= 0 && (self->taken[edge] || edge == first || move_class(self, edge) != pass))
+                continue;
+            player_one_turn = maximizer ? self->player_one : !self->player_one;
+            captured = play(self, edge, player_one_turn);
+            /* box aquired --> same player */
+            value = alpha_beta(self, depth - 1, captured ? maximizer : !maximizer, alpha, beta, -1, NULL);
+            unplay(self, edge << 3 | (player_one_turn ? 4 : 0) | captured);
+            if (self->timed_out)
+                return 0;
+            if (maximizer ? value > optimal : value < optimal) {
+                optimal = value;
+                optimal_move = edge;
+            }
+            if (maximizer) {
+                if (value > alpha)
+                    alpha = value;
+            }
+            else if (value < beta) {
+                beta = value;
+            }
+            if (beta <= alpha)
+                goto done;
+            if (pass < 0)
+                break;
+        }
+    }
+done:
+    if (best != NULL)
+        *best = optimal_move;
+    return optimal;
+}
+
+static PyObject *
+kernel_search(KernelObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"depth", "player_one", "first_move", "seconds", NULL};
+    int depth, player_one, first = -1, best = -1, value;
+    PyObject *first_move = Py_None, *seconds = Py_None;
+    double deadline = -1;
+
+    if (!kernel_ready(self) || !PyArg_ParseTupleAndKeywords(args, kwds, "ip|OO", kwlist, &depth, &player_one,
+            &first_move, &seconds))
+        return NULL;
+    if (first_move != Py_None) {
+        int row, col;
+        if (!PyArg_ParseTuple(first_move, "ii", &row, &col) || (first = edge_at(self, row, col)) < 0)
+            return NULL;
+    }
+    if (seconds != Py_None) {
+        double budget = PyFloat_AsDouble(seconds);
+        if (budget == -1 && PyErr_Occurred())
+            return NULL;
+        deadline = monotonic_seconds() + (budget > 0 ? budget : 0);
+    }
+    self->player_one = player_one;
+    self->nodes = 0;
+    self->deadline = deadline;
+    self->timed_out = 0;
+    Py_BEGIN_ALLOW_THREADS
+    value = alpha_beta(self, depth, 1, INT_MIN, INT_MAX, first, &best);
+    Py_END_ALLOW_THREADS
+    if (self->timed_out)
+        return Py_BuildValue("(OOL)", Py_None, Py_None, self->nodes);
+    if (best < 0)
+        return Py_BuildValue("(iOL)", value, Py_None, self->nodes);
+    return Py_BuildValue("(iNL)", value, edge_tuple(self, best), self->nodes);
+}
+
+static PyObject *
+kernel_stop(KernelObject *self, PyObject *Py_UNUSED(ignored))
+{
+    self->stopped = 1;
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+kernel_get_int(KernelObject *self, void *offset)
+{
+    if (!kernel_ready(self))
+        return NULL;
+    return PyLong_FromLong(*(int *)((char *)self + (Py_ssize_t)offset));
+}
+
+static PyMethodDef kernel_methods[] = {
+    {"move", (PyCFunction)kernel_move, METH_VARARGS,
+     "move(row, col, player_one_turn)\n--\n\nPlays the free edge. Returns: Whether a box was aquired due to the move"},
+    {"revert_move", (PyCFunction)kernel_revert_move, METH_VARARGS,
+     "revert_move(row, col)\n--\n\nRemoves the edge and unassigns the boxes it belongs to"},
+    {"push", (PyCFunction)kernel_push, METH_VARARGS,
+     "push(row, col, player_one_turn)\n--\n\nPlays the move like move and records it for pop"},
+    {"pop", (PyCFunction)kernel_pop, METH_NOARGS,
+     "pop()\n--\n\nUndoes the last pushed move exactly. Returns: Its edge"},
+    {"legal_moves", (PyCFunction)kernel_legal_moves, METH_NOARGS,
+     "legal_moves()\n--\n\nFree edges in raster order"},
+    {"taken", (PyCFunction)kernel_taken, METH_VARARGS,
+     "taken(row, col)\n--\n\nWhether the box/edge is taken"},
+    {"sides_taken", (PyCFunction)kernel_sides_taken, METH_VARARGS,
+     "sides_taken(row, col)\n--\n\nNumber of the box's edges that are taken"},
+    {"game_over", (PyCFunction)kernel_game_over, METH_NOARGS,
+     "game_over()\n--\n\nWhether the game is over"},
+    {"masks", (PyCFunction)kernel_masks, METH_NOARGS,
+     "masks()\n--\n\n(edges, player one boxes, player two boxes) bitmasks"},
+    {"load", (PyCFunction)kernel_load, METH_VARARGS,
+     "load(edges, player_one_boxes, player_two_boxes)\n--\n\n"
+     "Sets the state from little endian bytes of the bitmasks and empties the move stack"},
+    {"search", (PyCFunction)(void (*)(void))kernel_search, METH_VARARGS | METH_KEYWORDS,
+     "search(depth, player_one, first_move=None, seconds=None)\n--\n\n"
+     "Alpha beta search to the depth valuing leaves by the score, with the computer (player one if\n"
+     "player_one) to move. It gives up after seconds or once stop is called.\n"
+     "Returns: (advantage or None if it gave up, best move, nodes)"},
+    {"stop", (PyCFunction)kernel_stop, METH_NOARGS,
+     "stop()\n--\n\nEnds a running search from another thread, and every later search at once"},
+    {NULL}
+};
+
+static PyGetSetDef kernel_getset[] = {
+    {"rows", (getter)kernel_get_int, NULL, "Number of rows in the board", (void *)offsetof(KernelObject, rows)},
+    {"columns", (getter)kernel_get_int, NULL, "Number of columns in the board",
+     (void *)offsetof(KernelObject, cols)},
+    {"player_one_score", (getter)kernel_get_int, NULL, "Player one's score",
+     (void *)offsetof(KernelObject, player_one_score)},
+    {"player_two_score", (getter)kernel_get_int, NULL, "Player two's score",
+     (void *)offsetof(KernelObject, player_two_score)},
+    {"edges_remaining", (getter)kernel_get_int, NULL, "Edges remaining",
+     (void *)offsetof(KernelObject, edges_remaining)},
+    {"stack_depth", (getter)kernel_get_int, NULL, "Number of pushed moves not popped yet",
+     (void *)offsetof(KernelObject, undo_depth)},
+    {NULL}
+};
+
+static PyTypeObject KernelType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "src._kernel.Kernel",
+    .tp_doc = "Kernel(cols=4, rows=5)\n--\n\nBoard state in flat arrays with move, undo and alpha beta search",
+    .tp_basicsize = sizeof(KernelObject),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,
+    .tp_new = PyType_GenericNew,
+    .tp_init = (initproc)kernel_init,
+    .tp_dealloc = (destructor)kernel_dealloc,
+    .tp_methods = kernel_methods,
+    .tp_getset = kernel_getset,
+};
+
+static struct PyModuleDef kernel_module = {
+    PyModuleDef_HEAD_INIT,
+    .m_name = "src._kernel",
+    .m_doc = "Compiled board kernel (see kernel.py)",
+    .m_size = -1,
+};
+
+PyMODINIT_FUNC
+PyInit__kernel(void)
+{
+    PyObject *module;
+    if (PyType_Ready(&KernelType) < 0)
+        return NULL;
+    module = PyModule_Create(&kernel_module);
+    if (module == NULL)
+        return NULL;
+    Py_INCREF(&KernelType);
+    if (PyModule_AddObject(module, "Kernel", (PyObject *)&KernelType) < 0) {
+        Py_DECREF(&KernelType);
+        Py_DECREF(module);
+        return NULL;
+    }
+    return module;
+}
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Batch analysis of positions: the best move, value and principal variation of
+each, found by Computer within a think time per position across worker
+processes.
+
+Positions are read from a file or stdin, either as text, one position per line
+    <hex of the position's encoding (see encoding.py)> <player to move, 1 or 2>
+with blank lines and lines starting with # skipped, or as a binary position
+file (see encoding.py). One JSON line is written per position as soon as it
+is analysed, so the output is in completion order:
+    {"index": 0, "position": "0503...", "player": 2, "move": [0, 1],
+     "value": 2, "pv": [[0, 1], [1, 4]], "depth": 9, "nodes": 51234,
+     "ms": 998.7, "cached": false}
+value is the final box advantage of the player to move, including the boxes
+already won; a finished game has no move. A position that cannot be read gets {"index", "position",
+"error"} instead.
+
+Results are kept in an sqlite cache keyed by the canonical position (the
+smallest edge bitmask among its symmetric images, see symmetry.py, with the
+board size and the advantage of the player to move) and the search settings,
+so analysing overlapping corpora or rerunning an interrupted analysis only
+searches the positions not analysed yet. Moves are cached in the canonical
+orientation and mapped back to each position's own. Run from the root
+directory:
+    python3 -m src analyze positions.txt --workers 4 --think-ms 1000 > results.jsonl
+"""
+
+from . import encoding
+from .computer import Computer, SEARCHES
+from .evaluation import EVALUATORS
+from .symmetry import symmetries
+from .transposition import TranspositionTable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from collections import namedtuple
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+# think time per position in milliseconds
+THINK_MS = 1000
+
+DEFAULT_CACHE = 'analysis.sqlite'
+
+# positions submitted to the pool per worker before waiting for results
+_IN_FLIGHT = 4
+
+# what the results depend on besides the position
+Settings = namedtuple('Settings', ['think_ms', 'search', 'evaluation', 'quiescence', 'tt_entries'])
+
+def notation(backend, player_one):
+    """Returns: Text notation of the position with player one (or player two) to move"""
+    return "{} {}".format(encoding.to_bytes(backend).hex(), 1 if player_one else 2)
+
+def parse(text):
+    """Returns: (BitBoard, whether player one is to move) of a text notation"""
+    fields = text.split()
+    if len(fields) != 2 or fields[1] not in ('1', '2'):
+        raise ValueError("expected the position's hex encoding and the player to move (1 or 2)")
+    try:
+        board = encoding.from_bytes(bytes.fromhex(fields[0]))
+    except (ValueError, IndexError):
+        raise ValueError("not a position encoding: {}".format(fields[0])) from None
+    return board, fields[1] == '1'
+
+def read_positions(stream):
+    """Yields the text notations of the positions of a binary stream holding
+    text lines or a position file
+    """
+    head = stream.read(len(encoding.POSITIONS_MAGIC))
+    if head == encoding.POSITIONS_MAGIC:
+        for board, player_one in encoding.PositionReader(stream, magic_read=True):
+            yield notation(board, player_one)
+        return
+    lines = iter(stream)
+    # the bytes read to tell the formats apart start the first line
+    for line in (head + next(lines, b'')).splitlines():
+        yield from _notations(line)
+    for line in lines:
+        yield from _notations(line)
+
+def _notations(line):
+    text = line.decode('ascii', 'replace').strip()
+    if text and not text.startswith('#'):
+        yield text
+
+def canonical_key(board, player_one):
+    """Returns: (cache key of the position, symmetry mapping it onto the canonical orientation)"""
+    canonical, symmetry = symmetries(board.columns, board.rows).canonical(board.edges)
+    advantage = board.player_one_score - board.player_two_score
+    key = "{}x{}/{:x}/{:+d}".format(board.rows, board.columns, canonical, advantage if player_one else -advantage)
+    return key, symmetry
+
+def analyse(text, settings):
+    """Searches the position of the text notation (in a worker process).
+    Returns: Result without index and caching fields (see the module docstring)
+    """
+    board, player_one = parse(text)
+    if board.game_over():
+        advantage = board.player_one_score - board.player_two_score
+        return {'move': None, 'value': advantage if player_one else -advantage, 'pv': [], 'depth': 0, 'nodes': 0,
+            'ms': 0.0}
+    computer = Computer(board, TranspositionTable(settings.tt_entries), settings.think_ms, player_one=player_one,
+        evaluator=EVALUATORS[settings.evaluation], quiescence=settings.quiescence, search=settings.search)
+    move = computer.choose_move()
+    stats = computer.last_stats
+    return {'move': list(move), 'value': stats.value,
+        'pv': [list(edge) for edge in computer.principal_variation(move)], 'depth': stats.depth,
+        'nodes': stats.nodes, 'ms': round(stats.elapsed * 1000, 3)}
+
+class ResultCache:
+    """Results by canonical position and settings in an sqlite file (":memory:"
+    for a cache that is not kept). Moves are stored as edges of the canonical
+    orientation.
+    """
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS results "
+            "(position TEXT, settings TEXT, result TEXT, PRIMARY KEY (position, settings))")
+        self._connection.commit()
+
+    def close(self):
+        """Closes the file"""
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, key, settings):
+        """Returns: Cached result of the canonical position or None"""
+        row = self._connection.execute("SELECT result FROM results WHERE position = ? AND settings = ?",
+            (key, _settings_key(settings))).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key, settings, result):
+        """Stores the result of the canonical position at once, so an
+        interrupted analysis keeps it
+        """
+        self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+            (key, _settings_key(settings), json.dumps(result, separators=(',', ':'))))
+        self._connection.commit()
+
+def _settings_key(settings):
+    return json.dumps(settings._asdict(), sort_keys=True, separators=(',', ':'))
+
+def _orient(result, board, symmetry, to_canonical):
+    """Returns: Result with its moves mapped to (or from) the canonical orientation"""
+    images = symmetries(board.columns, board.rows)
+    convert = images.map_move if to_canonical else images.unmap_move
+    oriented = dict(result)
+    if result['move'] is not None:
+        oriented['move'] = list(convert(tuple(result['move']), symmetry))
+    oriented['pv'] = [list(convert(tuple(edge), symmetry)) for edge in result['pv']]
+    return oriented
+
+def run(stream, out, settings, cache, workers=1):
+    """Analyses the positions of the binary stream across worker processes,
+    writing one JSON line per position to the text stream out as it is
+    done. Positions in the cache are answered without searching, and every
+    search is cached as it finishes; positions sharing a canonical form in
+    the same run are searched once.
+    Returns: (positions, positions searched)
+    """
+    # canonical key --> [(index, text, board, symmetry)] waiting for its search
+    waiting = {}
+    # future --> canonical key
+    futures = {}
+    counts = [0, 0]
+
+    def write(record):
+        out.write(json.dumps(record, separators=(',', ':')) + '\n')
+        out.flush()
+
+    def finish(done):
+        for future in done:
+            key = futures.pop(future)
+            result = future.result()
+            _, _, board, symmetry = waiting[key][0]
+            canonical = _orient(result, board, symmetry, True)
+            cache.put(key, settings, canonical)
+            for index, text, board, symmetry in waiting.pop(key):
+                write(dict(_position_fields(index, text), **_orient(canonical, board, symmetry, False),
+                    cached=False))
+
+    with ProcessPoolExecutor(workers) as pool:
+        try:
+            for index, text in enumerate(read_positions(stream)):
+                counts[0] += 1
+                try:
+                    board, player_one = parse(text)
+                except ValueError as error:
+                    write(dict(_position_fields(index, text), error=str(error)))
+                    continue
+                key, symmetry = canonical_key(board, player_one)
+                if key in waiting:
+                    waiting[key].append((index, text, board, symmetry))
+                    continue
+                cached = cache.get(key, settings)
+                if cached is not None:
+                    write(dict(_position_fields(index, text), **_orient(cached, board, symmetry, False),
+                        cached=True))
+                    continue
+                waiting[key] = [(index, text, board, symmetry)]
+                futures[pool.submit(analyse, text, settings)] = key
+                counts[1] += 1
+                if len(futures) >= _IN_FLIGHT * workers:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    finish(done)
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                finish(done)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return tuple(counts)
+
+def _position_fields(index, text):
+    position, _, player = text.partition(' ')
+    fields = {'index': index, 'position': position}
+    if player.strip() in ('1', '2'):
+        fields['player'] = int(player)
+    return fields
+
+def main(argv=None):
+    parser = argparse.ArgumentParser("python3 -m src analyze",
+        description="Analyses positions and writes the results as JSON lines (see src/analysis.py).")
+    parser.add_argument('input', nargs='?', default='-', help="position file, text or binary (stdin if - or not present)")
+    parser.add_argument('--out', dest='out', default='-', help="file the results are appended to (stdout if -)")
+    parser.add_argument('--workers', dest='workers', default=os.cpu_count() or 1, type=int,
+        help="worker processes searching positions")
+    parser.add_argument('--think-ms', dest='think_ms', default=THINK_MS, type=int,
+        help="think time per position in milliseconds")
+    parser.add_argument('--search', dest='search', default='alphabeta', choices=SEARCHES,
+        help="window of the search (see src/computer.py)")
+    parser.add_argument('--eval', dest='evaluation', default='chain', choices=sorted(EVALUATORS),
+        help="static evaluation of the search's leaves (see src/evaluation.py)")
+    parser.add_argument('--no-quiescence', dest='quiescence', action='store_false',
+        help="do not take the boxes left at the search's depth limit before evaluating")
+    parser.add_argument('--tt-entries', dest='tt_entries', default=1 << 18, type=int,
+        help="transposition table slots of each search")
+    parser.add_argument('--cache', dest='cache', default=DEFAULT_CACHE,
+        help="sqlite file results are cached in ({} if not present)".format(DEFAULT_CACHE))
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help="do not read or keep results")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.think_ms < 1:
+        parser.error("--workers and --think-ms must be positive")
+    settings = Settings(args.think_ms, args.search, args.evaluation, args.quiescence, args.tt_entries)
+    cache = ResultCache(args.cache if args.use_cache else ':memory:')
+    stream = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    out = sys.stdout if args.out == '-' else open(args.out, 'a')
+    try:
+        positions, searched = run(stream, out, settings, cache, args.workers)
+    except KeyboardInterrupt:
+        print("interrupted, {} results cached in {}".format(len(cache), args.cache), file=sys.stderr)
+        sys.exit(130)
+    finally:
+        cache.close()
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        if out is not sys.stdout:
+            out.close()
+    print("{} positions, {} searched".format(positions, searched), file=sys.stderr)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Computer searches running in a worker thread, so the GUI stays responsive.
+
+Each search runs on a copy of the board (see encoding.py), so the GUI can keep
+drawing the real one. While the human thinks, the computer ponders: it predicts
+the human's move from its transposition table and searches the position that
+move leads to. If the human plays it, the running search becomes the
+computer's search (a ponder hit) and its move is usually ready at once;
+otherwise the search is stopped and the new position is searched, still
+sharing the transposition table entries the ponder search stored.
+"""
+
+from .computer import _SearchTimeout
+from .encoding import to_bytes, from_bytes
+import threading
+import time
+
+class _Search:
+    """One position searched by a daemon thread."""
+    def __init__(self, computer, position, ponder):
+        self.computer = computer
+        self.position = position
+        self.ponder = ponder
+        self.start = time.perf_counter()
+        self.move = None
+        self._timer = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self.move = self.computer.choose_move(self.ponder)
+        except _SearchTimeout:
+            pass
+
+    def done(self):
+        """Whether the search has finished"""
+        return not self._thread.is_alive()
+
+    def stop_at(self, deadline):
+        """Stops the search at the perf_counter time deadline"""
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            self.computer.stop()
+        else:
+            self._timer = threading.Timer(remaining, self.computer.stop)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def join(self):
+        """Waits for the search to finish"""
+        self._thread.join()
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def stop(self):
+        """Stops the search and waits for it"""
+        self.computer.stop()
+        self.join()
+
+class BackgroundComputer:
+    """
+    Runs the searches of computer (see Computer) in a worker thread. The
+    controller calls think when it is the computer's turn, polls thinking and
+    then calls finish to play the move; ponder is called at the start of each
+    of the human's turns.
+    """
+    def __init__(self, computer, ponder=True):
+        self._computer = computer
+        self._backend = computer._backend
+        self._think_ms = computer._think_ms
+        self._pondering = ponder
+        self._search = None
+        self.last_stats = None
+        self.metrics = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+    def move(self):
+        """Searches and plays the computer's move, blocking until it is found.
+        Returns: Whether a box was aquired due to the move
+        """
+        self.think()
+        return self.finish()
+
+    def think(self):
+        """Starts searching the current position for the computer's move,
+        continuing the ponder search if the human played the expected move.
+        """
+        position = to_bytes(self._backend)
+        search = self._search
+        if search is not None and search.ponder and search.position == position:
+            self.ponder_hits += 1
+            # pondering counts towards the think time
+            if self._think_ms is not None:
+                search.stop_at(search.start + self._think_ms / 1000)
+            return
+        if search is not None:
+            if search.ponder:
+                self.ponder_misses += 1
+            search.stop()
+        self._search = _Search(self._computer.with_backend(from_bytes(position)), position, False)
+
+    def thinking(self):
+        """Whether the computer's search is still running"""
+        return self._search is not None and not self._search.done()
+
+    def finish(self):
+        """Waits for the computer's search and plays its move.
+        Returns: Whether a box was aquired due to the move
+        """
+        search = self._search
+        self._search = None
+        search.join()
+        computer, move = search.computer, search.move
+        if move is None:
+            # stopped before its first iteration completed
+            computer = self._computer.with_backend(from_bytes(to_bytes(self._backend)))
+            move = computer.choose_move()
+        self.last_stats = computer.last_stats
+        self.metrics = computer.metrics
+        return self._backend.move(*move, self._computer._player_one)
+
+    def ponder(self):
+        """Starts searching the position after the human's expected move,
+        replacing any running search. Nothing is pondered if pondering is
+        disabled or the expected move completes a box.
+        """
+        if self._search is not None:
+            self._search.stop()
+            self._search = None
+        if not self._pondering or self._backend.game_over():
+            return
+        board = from_bytes(to_bytes(self._backend))
+        expected = self._computer.with_backend(board).expected_reply()
+        if expected is None or board.move(*expected, not self._computer._player_one) or board.game_over():
+            return
+        self._search = _Search(self._computer.with_backend(board), to_bytes(board), True)
+
+    def close(self):
+        """Stops any running search"""
+        if self._search is not None:
+            self._search.stop()
+            self._search = None
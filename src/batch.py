@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Batched board engine: many positions of one size advanced together with NumPy.
+
+A BatchBoard holds N positions as arrays, with edges and boxes numbered as in
+geometry.py:
+    edges            --> (N, edges) bool, taken edges
+    sides            --> (N, boxes + 1) int8, taken sides of each box (the last
+                         column absorbs the missing second box of border edges)
+    owners           --> (N, boxes) int8, 0 while free, 1 or 2 for the player
+                         that completed the box
+    scores           --> (N, 2) int16, boxes of player one and player two
+    player_one_turn  --> (N,) bool
+move applies one edge per position in a single vectorized step; box completion
+is found through the edge-to-box incidence table instead of testing boxes one
+by one. This module requires NumPy.
+"""
+
+from .bitboard import BitBoard
+from .geometry import geometry
+import numpy as np
+
+class BatchBoard:
+    """N positions of a board size, all advanced by one move per step."""
+    def __init__(self, cols, rows, count):
+        shape = geometry(cols, rows)
+        self.cols = cols
+        self.rows = rows
+        self._box_count = shape.box_count
+        # edge --> its two boxes, the missing one of border edges being the extra column
+        self._edge_boxes = np.array([boxes + (shape.box_count,) * (2 - len(boxes)) for boxes in shape.edge_boxes],
+            dtype=np.intp)
+        # boxes x edges incidence matrix
+        self.incidence = np.zeros((shape.box_count, shape.edge_count), dtype=np.int8)
+        for edge, boxes in enumerate(shape.edge_boxes):
+            self.incidence[list(boxes), edge] = 1
+        self.edges = np.zeros((count, shape.edge_count), dtype=bool)
+        self.sides = np.zeros((count, shape.box_count + 1), dtype=np.int8)
+        self.owners = np.zeros((count, shape.box_count), dtype=np.int8)
+        self.scores = np.zeros((count, 2), dtype=np.int16)
+        self.player_one_turn = np.ones(count, dtype=bool)
+
+    @classmethod
+    def from_boards(cls, boards, player_one_turn=None):
+        """Batch of the positions of boards of one size (any engine). Player
+        one is to move in every position unless player_one_turn is given.
+        """
+        first = boards[0]
+        batch = cls(first.columns, first.rows, len(boards))
+        shape = geometry(first.columns, first.rows)
+        for index, board in enumerate(boards):
+            edges, player_one_boxes, player_two_boxes = BitBoard.masks_of(board)
+            batch.edges[index] = [edges >> edge & 1 for edge in range(shape.edge_count)]
+            batch.owners[index] = [1 if player_one_boxes >> box & 1 else 2 if player_two_boxes >> box & 1 else 0
+                for box in range(shape.box_count)]
+        batch.sides[:, :-1] = batch.edges.astype(np.int8) @ batch.incidence.T
+        batch.scores[:, 0] = (batch.owners == 1).sum(axis=1)
+        batch.scores[:, 1] = (batch.owners == 2).sum(axis=1)
+        if player_one_turn is not None:
+            batch.player_one_turn[:] = player_one_turn
+        return batch
+
+    def board(self, index):
+        """Returns: BitBoard of one position of the batch"""
+        edges = sum(1 << int(edge) for edge in np.flatnonzero(self.edges[index]))
+        player_one_boxes = sum(1 << int(box) for box in np.flatnonzero(self.owners[index] == 1))
+        player_two_boxes = sum(1 << int(box) for box in np.flatnonzero(self.owners[index] == 2))
+        return BitBoard.from_masks(self.cols, self.rows, edges, player_one_boxes, player_two_boxes)
+
+    def __len__(self):
+        return len(self.edges)
+
+    def legal_mask(self):
+        """Returns: (N, edges) bool array of free edges"""
+        return ~self.edges
+
+    def game_over(self):
+        """Returns: (N,) bool array of finished positions"""
+        return self.edges.all(axis=1)
+
+    def advantage(self):
+        """Returns: (N,) player one's score minus player two's"""
+        return self.scores[:, 0] - self.scores[:, 1]
+
+    def move(self, moves):
+        """Fills one edge per position for the player to move; positions whose
+        move is negative are skipped. The turn passes unless a box is completed.
+        Returns: (N,) number of boxes completed by each move
+        """
+        moves = np.asarray(moves, dtype=np.intp)
+        positions = np.flatnonzero(moves >= 0)
+        moves = moves[positions]
+        self.edges[positions, moves] = True
+        boxes = self._edge_boxes[moves]
+        self.sides[positions, boxes[:, 0]] += 1
+        self.sides[positions, boxes[:, 1]] += 1
+        completed = (self.sides[positions[:, None], boxes] == 4) & (boxes < self._box_count)
+        player_one = self.player_one_turn[positions]
+        for column in range(2):
+            done = completed[:, column]
+            self.owners[positions[done], boxes[done, column]] = np.where(player_one[done], 1, 2)
+        gained = completed.sum(axis=1)
+        self.scores[positions, 0] += np.where(player_one, gained, 0)
+        self.scores[positions, 1] += np.where(player_one, 0, gained)
+        self.player_one_turn[positions] ^= gained == 0
+        result = np.zeros(len(self.edges), dtype=np.int8)
+        result[positions] = gained
+        return result
+
+    def random_moves(self, rng):
+        """Returns: (N,) uniformly random free edge of each position, -1 if it is finished"""
+        weights = rng.random(self.edges.shape)
+        weights[self.edges] = -1
+        moves = weights.argmax(axis=1)
+        moves[self.game_over()] = -1
+        return moves
+
+    def playout(self, rng):
+        """Plays random moves in every position until all are finished.
+        Returns: Number of position-steps played
+        """
+        steps = 0
+        while True:
+            moves = self.random_moves(rng)
+            active = int((moves >= 0).sum())
+            if not active:
+                return steps
+            self.move(moves)
+            steps += active
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Board engine that stores the game state as integer bitmasks.
+
+Edges are bits of a single integer, numbered as described in geometry.py, and
+each player's boxes are bits of another integer. Every edge has precomputed
+(box bit, box edge mask) pairs for its adjacent boxes, so a move, an undo and
+a completion check are each a handful of bitwise operations.
+
+BitBoard shares BaseBoard with Board and keeps its public API, including
+matrix coordinates for moves and the taken() lookup, so Computer and Gui work
+with either engine.
+"""
+
+from .board import BaseBoard
+from .geometry import geometry
+
+class BitBoard(BaseBoard):
+    """Stores the state as bitmasks and handles its manipulation."""
+    def __init__(self, cols=4, rows=5):
+        self._rows = rows
+        self._cols = cols
+        self._geometry = geometry(cols, rows)
+        self._edge_bits = self._geometry.edge_bits
+        self._box_bits = self._geometry.box_bits
+        self._completions = self._geometry.completions
+        self._box_masks = self._geometry.box_coordinate_masks
+        self._free_edges = set(self._geometry.edges)
+        self._edges_remaining = 2 * cols * rows + cols + rows
+        self._edges = 0
+        self._player_one_boxes = 0
+        self._player_two_boxes = 0
+        self._player_one_score = 0
+        self._player_two_score = 0
+        self._init_stack()
+
+    @classmethod
+    def from_masks(cls, cols, rows, edges, player_one_boxes, player_two_boxes):
+        """Board with the given edge and box ownership bitmasks"""
+        board = cls(cols, rows)
+        board._edges = edges
+        board._player_one_boxes = player_one_boxes
+        board._player_two_boxes = player_two_boxes
+        board._player_one_score = player_one_boxes.bit_count()
+        board._player_two_score = player_two_boxes.bit_count()
+        board._edges_remaining -= edges.bit_count()
+        board._free_edges = {edge for edge, bit in board._edge_bits.items() if not edges & bit}
+        return board
+
+    @staticmethod
+    def masks_of(backend):
+        """(edges, player one boxes, player two boxes) bitmasks of any board engine"""
+        shape = geometry(backend.columns, backend.rows)
+        edges = sum(bit for (row, col), bit in shape.edge_bits.items() if backend.taken(row, col))
+        player_one_boxes = sum(bit for (row, col), bit in shape.box_bits.items() if backend.taken(row, col))
+        player_two_boxes = sum(bit for (row, col), bit in shape.box_bits.items() if backend.taken(row + 1, col + 1))
+        return edges, player_one_boxes, player_two_boxes
+
+
+    def move(self, row, col, player_one_turn):
+        """PRE: (row, col) is a valid edge on the board.
+        Updates state to reflect the new edge and boxes it may have filled.
+        If player_one_turn, player one made the move; otherwise, player two
+        Returns: Whether a box was aquired due to the move
+        """
+        edges = self._edges | self._edge_bits[row, col]
+        self._edges = edges
+        self._free_edges.discard((row, col))
+        self._edges_remaining -= 1
+        box_taken = False
+        for box_bit, box_mask in self._completions[row, col]:
+            if edges & box_mask == box_mask:
+                box_taken = True
+                if player_one_turn:
+                    self._player_one_boxes |= box_bit
+                    self._player_one_score += 1
+                else:
+                    self._player_two_boxes |= box_bit
+                    self._player_two_score += 1
+        return box_taken
+
+    def revert_move(self, row, col):
+        """
+        Pre: (row, col) is a valid edge
+        Updates state to remove the edge and unassign boxes it belongs to.
+        Used by the computer's algorithm to determine optimal move.
+        """
+        self._edges &= ~self._edge_bits[row, col]
+        self._free_edges.add((row, col))
+        self._edges_remaining += 1
+        for box_bit, _ in self._completions[row, col]:
+            if self._player_one_boxes & box_bit:
+                self._player_one_boxes &= ~box_bit
+                self._player_one_score -= 1
+            if self._player_two_boxes & box_bit:
+                self._player_two_boxes &= ~box_bit
+                self._player_two_score -= 1
+
+    def push(self, row, col, player_one_turn):
+        """PRE: (row, col) is a free edge on the board.
+        Plays the move like move and records it for pop.
+        Returns: Whether a box was aquired due to the move
+        """
+        # the record of _record, built inline as this is the search's hot path
+        index = self._edge_index[row, col]
+        record = index << 3
+        edges = self._edges | 1 << index
+        self._edges = edges
+        self._free_edges.discard((row, col))
+        self._edges_remaining -= 1
+        flag = 1
+        for box_bit, box_mask in self._completions[row, col]:
+            if edges & box_mask == box_mask:
+                record |= flag
+                if player_one_turn:
+                    self._player_one_boxes |= box_bit
+                    self._player_one_score += 1
+                else:
+                    self._player_two_boxes |= box_bit
+                    self._player_two_score += 1
+            flag = 2
+        if player_one_turn:
+            record |= 4
+        self._undo[self._undo_depth] = record
+        self._undo_depth += 1
+        return record & 3 != 0
+
+    def pop(self):
+        """PRE: A pushed move was not popped yet.
+        Undoes the last pushed move exactly.
+        Returns: Its edge
+        """
+        self._undo_depth -= 1
+        record = self._undo[self._undo_depth]
+        index = record >> 3
+        row, col = self._edge_list[index]
+        self._edges ^= 1 << index
+        self._free_edges.add((row, col))
+        self._edges_remaining += 1
+        if record & 3:
+            for index, (box_bit, _) in enumerate(self._completions[row, col]):
+                if record >> index & 1:
+                    if record & 4:
+                        self._player_one_boxes &= ~box_bit
+                        self._player_one_score -= 1
+                    else:
+                        self._player_two_boxes &= ~box_bit
+                        self._player_two_score -= 1
+        return row, col
+
+    def taken(self, row, col):
+        """PRE: (row, col) is a valid coordinate.
+        Whether the box/edge is taken
+        """
+        edge_bit = self._edge_bits.get((row, col))
+        if edge_bit is not None:
+            return bool(self._edges & edge_bit)
+        if self.is_even(row):
+            return bool(self._player_one_boxes & self._box_bits.get((row, col), 0))
+        return bool(self._player_two_boxes & self._box_bits.get((row - 1, col - 1), 0))
+
+    def sides_taken(self, row, col):
+        """PRE: (row, col) is a player one box coordinate.
+        Number of the box's edges that are taken
+        """
+        return (self._edges & self._box_masks[row, col]).bit_count()
+
+    @property
+    def board(self):
+        """Matrix representation of the state (see board.py), built on demand"""
+        return [[self.taken(row, col) for col in range(self.column_bound + 1)]
+            for row in range(self.row_bound + 1)]
+
+    @property
+    def geometry(self):
+        """Edge and box indexing shared by boards of this size"""
+        return self._geometry
+
+    @property
+    def edges(self):
+        """Bitmask of the taken edges"""
+        return self._edges
+
+    @property
+    def player_one_boxes(self):
+        """Bitmask of the boxes won by player one"""
+        return self._player_one_boxes
+
+    @property
+    def player_two_boxes(self):
+        """Bitmask of the boxes won by player two"""
+        return self._player_two_boxes
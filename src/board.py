@@ -29,17 +29,146 @@ For each box (row, col) in the graph representation, the matrix representation d
 (2 * row, 2 * col + 2) --> Bottom edge taken
 (2 * row + 1, 2 * col) --> Left edge taken
 (2 * row + 2, 2 * col) --> Right edge taken
+
+Besides move and revert_move, the engines keep a move stack for the search:
+push plays a move and records what it changed in a preallocated list, one
+integer per move (see _record), and pop undoes the last pushed move exactly
+from its record, without checking any box. revert_move instead clears the
+owners of both boxes next to the edge, so it is only right for the last move.
 """
 
-class Board:
+from .geometry import geometry
+
+class BaseBoard:
+    """Coordinate predicates and accessors shared by the board engines.
+    Subclasses set _rows, _cols, _edges_remaining, _free_edges and the score
+    attributes.
+    """
+
+    def edge_is_out_of_bounds(self, row, col):
+        """Whether the coordinate is in the bounds of the board"""
+        return row < 0 or row > self.row_bound or col < 0 or col > self.column_bound
+
+    def is_edge(self, row, col):
+        """Whether the coordinate corresponds to an edge"""
+        return not self.is_even(row) == self.is_even(col)
+
+    def is_player_one_box(self, row, col):
+        """Whether the coordinate corresponds to a player one box coordinate"""
+        return self.is_even(row) and self.is_even(col)
+
+    def is_player_two_box(self, row, col):
+        """Whether the coordinate corresponds to a player two box coordinate"""
+        return not self.is_even(row) and not self.is_even(col)
+
+    def is_horizontal_edge(self, row, col):
+        """Whether the coordinate corresponds to a horizontal edge"""
+        return self.is_even(row) and not self.is_even(col)
+
+    def is_vertical_edge(self, row, col):
+        """Whether the coordinate corresponds to a vertical edge"""
+        return not self.is_even(row) and self.is_even(col)
+
+    def _init_stack(self):
+        shape = geometry(self._cols, self._rows)
+        self._edge_list = shape.edges
+        self._edge_index = shape.edge_index
+        # a game has at most one move per edge
+        self._undo = [0] * shape.edge_count
+        self._undo_depth = 0
+
+    def _record(self, row, col, player_one_turn, captured):
+        """Pushes the move's record: its edge index, whether player one made it
+        and a bit per box of geometry's edge_boxes order it completed.
+        """
+        self._undo[self._undo_depth] = self._edge_index[row, col] << 3 | (4 if player_one_turn else 0) | captured
+        self._undo_depth += 1
+
+    def _unrecord(self):
+        """Pops the last record.
+        Returns: (row, col, whether player one made the move, completed box bits)
+        """
+        self._undo_depth -= 1
+        record = self._undo[self._undo_depth]
+        row, col = self._edge_list[record >> 3]
+        return row, col, record & 4, record & 3
+
+    @property
+    def stack_depth(self):
+        """Number of pushed moves not popped yet"""
+        return self._undo_depth
+
+    def legal_moves(self):
+        """Free edges, maintained incrementally by move and revert_move"""
+        return list(self._free_edges)
+
+    def adjacent_boxes(self, row, col):
+        """PRE: (row, col) is a valid edge.
+        Player one box coordinates of the boxes next to the edge
+        """
+        return geometry(self._cols, self._rows).adjacent_boxes[row, col]
+
+    def game_over(self):
+        """Whether the game is over"""
+        return self._edges_remaining <= 0
+
+    @property
+    def rows(self):
+        """Number of rows in the board"""
+        return self._rows
+
+    @property
+    def columns(self):
+        """Number of columns in the board"""
+        return self._cols
+
+    @property
+    def row_bound(self):
+        """Highest row index in matrix representation"""
+        return 2 * self._rows
+
+    @property
+    def column_bound(self):
+        """Highest column index in matrix representation"""
+        return 2 * self._cols
+
+    @property
+    def player_one_score(self):
+        """Player one's score"""
+        return self._player_one_score
+
+    @property
+    def player_two_score(self):
+        """Player two's score"""
+        return self._player_two_score
+
+    @property
+    def edges_remaining(self):
+        """Edges remaining"""
+        return self._edges_remaining
+    
+    def _box_is_out_of_bounds(self, row, col):
+        return row < 0 or row > (self.row_bound - 2) or col < 0 or col > (self.column_bound - 2)
+
+    @staticmethod
+    def is_even(num):
+        """PRE: num is an integer
+        Whether num is even
+        """
+        return num % 2 == 0
+
+class Board(BaseBoard):
     """Stores the state and handles its manipulation."""
     def __init__(self, cols=4, rows=5):
         self._rows = rows
         self._cols = cols
         self._edges_remaining = 2 * cols * rows + cols + rows
         self.board = [[False] * (2 * cols + 1) for _ in range(2 * rows + 1)]
+        self._free_edges = set(geometry(cols, rows).edges)
         self._player_one_score = 0
         self._player_two_score = 0
+        self._adjacent = geometry(cols, rows).adjacent_boxes
+        self._init_stack()
 
     def move(self, row, col, player_one_turn):
         """PRE: (row, col) is a valid edge on the board.
@@ -104,29 +233,37 @@ class Board:
             if not self._box_is_out_of_bounds(right_box_row, right_box_col):
                 self._unassign_box(right_box_row, right_box_col)
 
-    def edge_is_out_of_bounds(self, row, col):
-        """Whether the coordinate is in the bounds of the board"""
-        return row < 0 or row > self.row_bound or col < 0 or col > self.column_bound
-
-    def is_edge(self, row, col):
-        """Whether the coordinate corresponds to an edge"""
-        return not self.is_even(row) == self.is_even(col)
-
-    def is_player_one_box(self, row, col):
-        """Whether the coordinate corresponds to a player one box coordinate"""
-        return self.is_even(row) and self.is_even(col)
-
-    def is_player_two_box(self, row, col):
-        """Whether the coordinate corresponds to a player two box coordinate"""
-        return not self.is_even(row) and not self.is_even(col)
-
-    def is_horizontal_edge(self, row, col):
-        """Whether the coordinate corresponds to a horizontal edge"""
-        return self.is_even(row) and not self.is_even(col)
+    def push(self, row, col, player_one_turn):
+        """PRE: (row, col) is a free edge on the board.
+        Plays the move like move and records it for pop.
+        Returns: Whether a box was aquired due to the move
+        """
+        self._fill_edge(row, col)
+        captured = 0
+        for index, (box_row, box_col) in enumerate(self._adjacent[row, col]):
+            if self._is_box_full(box_row, box_col):
+                captured |= 1 << index
+                self._assign_box(box_row, box_col, player_one_turn)
+        self._record(row, col, player_one_turn, captured)
+        return captured != 0
 
-    def is_vertical_edge(self, row, col):
-        """Whether the coordinate corresponds to a vertical edge"""
-        return not self.is_even(row) and self.is_even(col)
+    def pop(self):
+        """PRE: A pushed move was not popped yet.
+        Undoes the last pushed move exactly.
+        Returns: Its edge
+        """
+        row, col, player_one_turn, captured = self._unrecord()
+        self._unfill_edge(row, col)
+        if captured:
+            for index, (box_row, box_col) in enumerate(self._adjacent[row, col]):
+                if captured >> index & 1:
+                    if player_one_turn:
+                        self.board[box_row][box_col] = False
+                        self._player_one_score -= 1
+                    else:
+                        self.board[box_row + 1][box_col + 1] = False
+                        self._player_two_score -= 1
+        return row, col
 
     def taken(self, row, col):
         """PRE: (row, col) is a valid coordinate.
@@ -134,51 +271,21 @@ class Board:
         """
         return self.board[row][col]
 
-    def game_over(self):
-        """Whether the game is over"""
-        return self._edges_remaining <= 0
-
-    @property
-    def rows(self):
-        """Number of rows in the board"""
-        return self._rows
-
-    @property
-    def columns(self):
-        """Number of columns in the board"""
-        return self._cols
-
-    @property
-    def row_bound(self):
-        """Highest row index in matrix representation"""
-        return 2 * self._rows
-
-    @property
-    def column_bound(self):
-        """Highest column index in matrix representation"""
-        return 2 * self._cols
-
-    @property
-    def player_one_score(self):
-        """Player one's score"""
-        return self._player_one_score
-
-    @property
-    def player_two_score(self):
-        """Player two's score"""
-        return self._player_two_score
+    def sides_taken(self, row, col):
+        """PRE: (row, col) is a player one box coordinate.
+        Number of the box's edges that are taken
+        """
+        return (self.board[row][col + 1] + self.board[row + 2][col + 1]
+            + self.board[row + 1][col] + self.board[row + 1][col + 2])
 
-    @property
-    def edges_remaining(self):
-        """Edges remaining"""
-        return self._edges_remaining
-    
     def _fill_edge(self, row, col):
         self.board[row][col] = True
+        self._free_edges.discard((row, col))
         self._edges_remaining -= 1
 
     def _unfill_edge(self, row, col):
         self.board[row][col] = False
+        self._free_edges.add((row, col))
         self._edges_remaining += 1
 
     def _assign_box(self, row, col, player_one_turn):
@@ -202,14 +309,3 @@ class Board:
     def _is_box_full(self, row, col):
         return (self.board[row][col + 1] and self.board[row + 2][col + 1]
             and self.board[row + 1][col] and self.board[row + 1][col + 2])
-
-    def _box_is_out_of_bounds(self, row, col):
-        return row < 0 or row > (self.row_bound - 2) or col < 0 or col > (self.column_bound - 2)
-
-    @staticmethod
-    def is_even(num):
-        """PRE: num is an integer
-        Whether num is even
-        """
-        return num % 2 == 0
-
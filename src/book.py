@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Opening book of precomputed moves, keyed by canonical position.
+
+The book is generated offline by searching every position (up to symmetry,
+see symmetry.py) reachable in the first few moves, and stored as a file of
+fixed size records sorted by key, which is memory mapped and binary searched:
+    header --> magic b"DBB1", columns, rows, key length (bytes), record count
+    record --> canonical edge bitmask (big endian), canonical move edge index
+               (2 bytes), value (1 signed byte, net boxes for the player to move)
+Build the books for the standard sizes from the root directory with:
+    python3 -m src.book --sizes 3x3 4x4 4x5 5x5 --plies 2 --think-ms 1000
+"""
+
+from .bitboard import BitBoard
+from .computer import Computer
+from .geometry import geometry
+from .symmetry import symmetries
+from collections import namedtuple
+import argparse
+import mmap
+import os
+import struct
+
+MAGIC = b"DBB1"
+_HEADER = struct.Struct("<4sBBBxI")
+_ENTRY = struct.Struct("<Hb")
+
+# sizes the game is usually played on, as (rows, cols)
+STANDARD_SIZES = [(3, 3), (4, 4), (4, 5), (5, 5)]
+
+# move to play in the current orientation and net boxes for the player to move
+BookEntry = namedtuple('BookEntry', ['move', 'value'])
+
+def default_path(cols, rows):
+    """Location of the book for the board size in the books directory"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'books',
+        '{}x{}.book'.format(rows, cols))
+
+class OpeningBook:
+    """Read only view of a book file."""
+    def __init__(self, path):
+        with open(path, 'rb') as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.cols, self.rows, self._key_length, self._count = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError("not an opening book")
+        self._record_length = self._key_length + _ENTRY.size
+        self._edges = geometry(self.cols, self.rows).edges
+        self._symmetries = symmetries(self.cols, self.rows)
+
+    def close(self):
+        """Unmaps the file"""
+        self._map.close()
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, backend):
+        """Returns: BookEntry for the position or None if it is not in the book"""
+        if (backend.columns, backend.rows) != (self.cols, self.rows):
+            return None
+        edges = backend.edges if isinstance(backend, BitBoard) else BitBoard.masks_of(backend)[0]
+        canonical, symmetry = self._symmetries.canonical(edges)
+        key = canonical.to_bytes(self._key_length, 'big')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = _HEADER.size + middle * self._record_length
+            record_key = self._map[offset:offset + self._key_length]
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                move, value = _ENTRY.unpack_from(self._map, offset + self._key_length)
+                return BookEntry(self._symmetries.unmap_move(self._edges[move], symmetry), value)
+        return None
+
+def build(cols, rows, plies, think_ms, path, progress=None):
+    """Searches every canonical position reachable in at most plies moves
+    without a box being taken, and writes the book to path.
+    Returns: Number of positions in the book
+    """
+    shape = geometry(cols, rows)
+    group = symmetries(cols, rows)
+    entries = {}
+    frontier = {0}
+    for ply in range(plies + 1):
+        following = set()
+        for edges in frontier:
+            board = BitBoard.from_masks(cols, rows, edges, 0, 0)
+            computer = Computer(board, think_ms=think_ms)
+            row, col = computer.choose_move()
+            entries[edges] = (shape.edge_index[row, col], max(-128, min(127, round(computer.last_stats.value))))
+            if progress is not None:
+                progress(len(entries))
+            if ply == plies:
+                continue
+            for row, col in board.legal_moves():
+                if not board.push(row, col, False):
+                    following.add(group.canonical(board.edges)[0])
+                board.pop()
+        frontier = following - entries.keys()
+    key_length = (shape.edge_count + 7) // 8
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as stream:
+        stream.write(_HEADER.pack(MAGIC, cols, rows, key_length, len(entries)))
+        for edges in sorted(entries):
+            stream.write(edges.to_bytes(key_length, 'big') + _ENTRY.pack(*entries[edges]))
+    return len(entries)
+
+def main():
+    parser = argparse.ArgumentParser("Builds opening books by searching the first moves of the game.")
+    parser.add_argument('--sizes', dest='sizes', nargs='+',
+        default=['{}x{}'.format(*size) for size in STANDARD_SIZES], help="board sizes as ROWSxCOLS")
+    parser.add_argument('--plies', dest='plies', default=2, type=int, help="moves from the start covered by the book")
+    parser.add_argument('--think-ms', dest='think_ms', default=1000, type=int, help="search time per position")
+    parser.add_argument('--dir', dest='dir', default=None, help="output directory (the books directory if not present)")
+    args = parser.parse_args()
+    for size in args.sizes:
+        rows, cols = (int(part) for part in size.split('x'))
+        path = default_path(cols, rows)
+        if args.dir is not None:
+            path = os.path.join(args.dir, os.path.basename(path))
+        count = build(cols, rows, args.plies, args.think_ms, path,
+            lambda done: print("\r{} {} positions".format(size, done), end='', flush=True))
+        print("\r{} {} positions --> {}".format(size, count, path))
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,269 @@
+from . import endgame
+from .evaluation import ChainEvaluator
+from .geometry import geometry
+from .instrumentation import SearchMetrics, TimedBoard
+from .proof import ProofSearch
+from .solver import solver, edges_of
+from .symmetry import symmetries
+from .transposition import TranspositionTable, zobrist_keys, EXACT, LOWER, UPPER
+from collections import namedtuple
+import copy
 import math
+import time
+
+# depth reached, nodes visited, seconds spent and advantage of a search
+SearchStats = namedtuple('SearchStats', ['depth', 'nodes', 'elapsed', 'value'])
+
+_KEY_MASK = (1 << 64) - 1
+
+# positions with at most this many free edges are solved exactly (see solver.py)
+ORACLE_EDGES = 10
+
+# searches of the computer:
+#   alphabeta --> alpha beta with a full window
+#   pvs       --> principal variation search: moves after the first are
+#                 searched with a null window, and again fully if they beat it
+#   mtdf      --> MTD(f): null window searches converging on the value through
+#                 the transposition table
+#   proof     --> a proof-number search decides a win or a draw first and plays
+#                 its move (see proof.py); alpha beta otherwise
+SEARCHES = ('alphabeta', 'pvs', 'mtdf', 'proof')
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the think time runs out."""
 
 class Computer:
     """
     Bot that utilizes a min-max search tree with finite depth to 
-    determine the best move.
+    determine the best move. It plays as player two unless player_one is set.
     """
 
-    def __init__(self, backend):
+    def __init__(self, backend, table=None, think_ms=None, player_one=False, symmetry=True, book=None,
+        instrument=False, solved=None, oracle_edges=ORACLE_EDGES, evaluator=ChainEvaluator, quiescence=True,
+        search='alphabeta'):
+        if search not in SEARCHES:
+            raise ValueError("unknown search {!r}".format(search))
         self._backend = backend
+        self._book = book
+        if solved is not None and (solved.cols, solved.rows) != (backend.columns, backend.rows):
+            solved = None
+        self._solved = solved
+        self._oracle_edges = oracle_edges
+        self._solver = solver(backend.columns, backend.rows)
+        self._player_one = player_one
+        self._table = table if table is not None else TranspositionTable()
+        self._think_ms = think_ms
+        self._keys = zobrist_keys(backend.columns, backend.rows)
+        # with symmetry, the hash packs the hashes of every symmetric image
+        self._symmetries = symmetries(backend.columns, backend.rows) if symmetry else None
+        if self._symmetries is None:
+            self._edge_keys, self._turn_key = self._keys.edge_keys, self._keys.turn_key
+        else:
+            self._edge_keys, self._turn_key = self._keys.packed(self._symmetries)
+        shape = geometry(backend.columns, backend.rows)
+        # edge --> indices of its boxes
+        self._edge_boxes = {edge: shape.edge_boxes[index] for index, edge in enumerate(shape.edges)}
+        # evaluator class valuing the leaves (see evaluation.py) and its instance following the search
+        self._evaluation = evaluator
+        self._evaluator = evaluator(backend.columns, backend.rows)
+        self._evaluator.reset(backend)
+        self._quiescence = quiescence
+        self._search = search
+        self._pvs = search == 'pvs'
+        # MTD(f)'s first guess, the value of the previous iteration
+        self._guess = 0
+        self._hash = 0
+        self._nodes = 0
+        self._deadline = None
+        self._stopped = False
+        self._search_depth = 0
+        self._instrument = instrument
+        self.last_stats = None
+        # SearchMetrics of the last search if instrumented (see instrumentation.py)
+        self.metrics = None
+
+    def with_backend(self, backend):
+        """Returns: Copy of the computer searching backend instead (a board of
+        the same size), sharing the transposition table, book and settings
+        """
+        computer = copy.copy(self)
+        computer._backend = backend
+        computer._evaluator = self._evaluation(backend.columns, backend.rows)
+        computer._evaluator.reset(backend)
+        computer._hash = 0
+        computer._nodes = 0
+        computer._deadline = None
+        computer._stopped = False
+        computer.last_stats = None
+        computer.metrics = None
+        return computer
+
+    def stop(self):
+        """Ends a running search from another thread, or the next one if none
+        is running. An iteratively deepening search returns its deepest
+        completed iteration; a fixed depth search is abandoned.
+        """
+        self._stopped = True
 
     def move(self):
-        """Uses the min max algorithm to choose an edge. The depth of the
-        algorithm is roughly based off the movespace size.
+        """Chooses an edge (see choose_move) and plays it.
+        Returns: Whether a box was aquired due to the move
+        """
+        row, col = self.choose_move()
+        return self._backend.move(row, col, self._player_one)
+
+    def choose_move(self, ponder=False):
+        """Uses the min max algorithm to choose an edge without playing it.
+        With a think time, the search deepens iteratively until the time runs
+        out; otherwise, the depth is roughly based off the movespace size.
+        When pondering, the search deepens iteratively with no time limit up to
+        that depth (or to the end of the game with a think time) until stop is
+        called.
+        Boards with a solved table are played perfectly from it. Otherwise,
+        opening book moves are played without searching, and so are exact
+        moves in chain and loop endgames and once at most oracle_edges edges
+        are free; deeper in the search, such positions are leaves with exact
+        values.
+        With the proof search, a move proven to win or draw is played (with
+        the value 1 or 0, the advantage proven) unless pondering.
+        Statistics of the search are stored in last_stats, and its metrics in
+        metrics if the computer is instrumented.
         """
+        try:
+            if not self._instrument:
+                return self._choose_move(ponder)
+            self.metrics = SearchMetrics()
+            backend = self._backend
+            self._backend = TimedBoard(backend, self.metrics)
+            table_hits = self._table.hits
+            try:
+                return self._choose_move(ponder)
+            finally:
+                self._backend = backend
+                self.metrics.finish(self._nodes, self._table.hits - table_hits)
+        finally:
+            # stop ends the running search (or the next one to start), not the ones after it
+            self._stopped = False
+
+    def _choose_move(self, ponder):
+        start = time.perf_counter()
+        if self._solved is not None or self._backend.edges_remaining <= self._oracle_edges:
+            exact = self._solved if self._solved is not None else self._solver
+            value, edge = exact.best_move(edges_of(self._backend))
+            value += self._computer_advantage()
+            self.last_stats = SearchStats(self._backend.edges_remaining, 0, time.perf_counter() - start, value)
+            return geometry(self._backend.columns, self._backend.rows).edges[edge]
+        entry = self._book.lookup(self._backend) if self._book is not None else None
+        if entry is not None and not self._backend.taken(*entry.move):
+            value = self._computer_advantage() + entry.value
+            self.last_stats = SearchStats(0, 0, time.perf_counter() - start, value)
+            return entry.move
+        solved = endgame.analyse(self._backend)
+        if solved is not None:
+            value = self._computer_advantage() + solved.value
+            self.last_stats = SearchStats(self._backend.edges_remaining, 0, time.perf_counter() - start, value)
+            return solved.move
+        self._start_search()
+        self._table.new_search()
+        self._nodes = 0
+        self._search_depth = 0
+        if self._search == 'proof' and not ponder:
+            deadline = None if self._think_ms is None else start + self._think_ms / 1000
+            prover = ProofSearch(self._backend, self._player_one, self._oracle_edges, deadline=deadline,
+                stopped=lambda: self._stopped)
+            decided = prover.decide()
+            self._nodes = prover.nodes
+            if decided is not None and decided[1] is not None:
+                outcome, optimal_move = decided
+                self.last_stats = SearchStats(self._backend.edges_remaining, self._nodes,
+                    time.perf_counter() - start, outcome)
+                return optimal_move
+        if ponder:
+            max_depth = self._fixed_depth() if self._think_ms is None else self._backend.edges_remaining
+            depth, value, optimal_move = self._iterative_deepening(float('inf'), max_depth)
+        elif self._think_ms is None:
+            depth = self._fixed_depth()
+            value, optimal_move = self._timed_root_search(depth, None)
+        else:
+            depth, value, optimal_move = self._iterative_deepening(start + self._think_ms / 1000)
+        self.last_stats = SearchStats(depth, self._nodes, time.perf_counter() - start, value)
+        return optimal_move
+
+    def _start_search(self):
+        """Sets the hash and the evaluator to the backend's position"""
+        self._hash = self._position_hash()
+        self._evaluator.reset(self._backend)
+        self._guess = self._computer_advantage()
+
+    def _fixed_depth(self):
+        """Search depth used without a think time"""
         time_estimate = 2 << 24
         if self._backend.edges_remaining <= 10:
-            depth = 10
-        else:
-            depth = math.log(time_estimate, self._backend.edges_remaining)
-        _, (row, col) = self._alpha_beta_minimax(depth, True, float('-inf'), float('inf'))
-        return self._backend.move(row, col, False)
+            return 10
+        return math.ceil(math.log(time_estimate, self._backend.edges_remaining))
+
+    def _iterative_deepening(self, deadline, max_depth=None):
+        """Searches with increasing depth until the deadline passes, the
+        search is stopped, max_depth is reached or the game tree is exhausted.
+        Each iteration searches the previous best move first. If even the
+        first iteration is cut short (on very large boards), the first move in
+        search order is played, so the time per move stays bounded.
+        Returns: (depth, advantage, move) of the deepest completed iteration
+        """
+        if max_depth is None:
+            max_depth = self._backend.edges_remaining
+        depth, value, optimal_move = 0, self._computer_advantage(), None
+        self._deadline = deadline
+        try:
+            # the first iteration starts even if the search was stopped before
+            while depth < min(max_depth, self._backend.edges_remaining) and (depth == 0
+                or not self._stopped and time.perf_counter() < deadline):
+                value, optimal_move = self._timed_root_search(depth + 1, optimal_move)
+                depth += 1
+        except _SearchTimeout:
+            if optimal_move is None:
+                optimal_move = self._ordered_moves(None)[0]
+        finally:
+            self._deadline = None
+        return depth, value, optimal_move
+
+    def _timed_root_search(self, depth, first_move):
+        """Runs _root_search, recording the iteration in the metrics"""
+        self._search_depth = depth
+        result = self._root_search(depth, first_move)
+        if self.metrics is not None:
+            self.metrics.iteration(depth, self._nodes)
+        return result
+
+    def _root_search(self, depth, first_move):
+        """Searches the current position to the depth with a full window, or
+        with MTD(f).
+        Returns: (advantage, move)
+        """
+        if self._search == 'mtdf':
+            return self._mtdf(depth, first_move)
+        return self._alpha_beta_minimax(depth, True, float('-inf'), float('inf'), first_move)
+
+    def _mtdf(self, depth, first_move):
+        """Narrows bounds on the value with null window searches around a guess,
+        starting from the previous iteration's value. Each search fails high
+        (a lower bound, with a move reaching it) or low (an upper bound), and
+        the transposition table keeps the subtrees the searches share.
+        Returns: (advantage, move of the last search that failed high)
+        """
+        guess, optimal_move = self._guess, first_move
+        lower, upper = float('-inf'), float('inf')
+        while lower < upper:
+            beta = guess + 1 if guess == lower else guess
+            guess, move = self._alpha_beta_minimax(depth, True, beta - 1, beta, optimal_move)
+            if guess < beta:
+                upper = guess
+            else:
+                lower = guess
+                if move is not None:
+                    optimal_move = move
+        self._guess = guess
+        return guess, optimal_move
 
     def _minimax(self, depth, maximizer):
         """The min-max algorithm is a search tree that exhausts all moves
@@ -38,36 +282,32 @@ class Computer:
         if maximizer:
             max_advantage = float('-inf')
             optimal_move = None
-            for row in range(self._backend.row_bound + 1):
-                for col in range(self._backend.column_bound + 1):
-                    if self._backend.is_edge(row, col) and not self._backend.taken(row, col):
-                        same_turn = self._backend.move(row, col, False)
-                        # box aquired --> maximizer; else --> minimizer
-                        move_advantage, _ = self._minimax(depth - 1, same_turn)
-                        if move_advantage > max_advantage:
-                            max_advantage = move_advantage
-                            optimal_move = (row, col)
-                        # return to original state
-                        self._backend.revert_move(row, col)
+            for row, col in self._backend.legal_moves():
+                same_turn = self._backend.push(row, col, self._player_one)
+                # box aquired --> maximizer; else --> minimizer
+                move_advantage, _ = self._minimax(depth - 1, same_turn)
+                if move_advantage > max_advantage:
+                    max_advantage = move_advantage
+                    optimal_move = (row, col)
+                # return to original state
+                self._backend.pop()
             return max_advantage, optimal_move
         # player move
         else:
             min_advantage = float('inf')
             optimal_move = None
-            for row in range(self._backend.row_bound + 1):
-                for col in range(self._backend.column_bound + 1):
-                    if self._backend.is_edge(row, col) and not self._backend.taken(row, col):
-                        same_turn = self._backend.move(row, col, True)
-                        # box aquired --> minimizer; else --> maximizer
-                        move_advantage, _ = self._minimax(depth - 1, not same_turn)
-                        if move_advantage < min_advantage:
-                            min_advantage = move_advantage
-                            optimal_move = (row, col)
-                        # return to original state
-                        self._backend.revert_move(row, col)
+            for row, col in self._backend.legal_moves():
+                same_turn = self._backend.push(row, col, not self._player_one)
+                # box aquired --> minimizer; else --> maximizer
+                move_advantage, _ = self._minimax(depth - 1, not same_turn)
+                if move_advantage < min_advantage:
+                    min_advantage = move_advantage
+                    optimal_move = (row, col)
+                # return to original state
+                self._backend.pop()
             return min_advantage, optimal_move
 
-    def _alpha_beta_minimax(self, depth, maximizer, alpha, beta):
+    def _alpha_beta_minimax(self, depth, maximizer, alpha, beta, first_move=None):
         """Alpha beta pruning is where subtrees can be skipped (pruned)
         based on the current optimal value. 
         Say a maximizing parent evaluates 1 move with a value of x. Additionally,
@@ -75,47 +315,253 @@ class Computer:
         Then, the minimizing child can skip it's remaining moves because it's
         optimal value will be at most y. Since y <= x, the original maximizing
         parent will not select this move.
+        Positions reached through different move orders share results through
+        the transposition table. Values are stored relative to the advantage
+        at the node, and first_move or the stored best move is searched first.
+        With symmetry, entries are keyed by the smallest hash of the position's
+        symmetric images and moves are stored in that image's orientation.
+        Leaves at the depth limit are valued by the score plus the evaluator's
+        estimate of the boxes still to come; with quiescence, the boxes the
+        player to move can complete are taken first, one node per capture.
         """
-        if depth <= 0 or self._backend.game_over():
-            return self._computer_advantage(), None
+        self._nodes += 1
+        if self._nodes & 1023 == 0 and (self._stopped
+            or self._deadline is not None and time.perf_counter() > self._deadline):
+            raise _SearchTimeout()
+        advantage = self._computer_advantage()
+        if self._backend.edges_remaining <= self._oracle_edges:
+            if self.metrics is not None:
+                self.metrics.leaf(self._search_depth - depth)
+            value = self._solver.value(edges_of(self._backend))
+            return advantage + value if maximizer else advantage - value, None
+        if self._backend.game_over():
+            if self.metrics is not None:
+                self.metrics.leaf(self._search_depth - depth)
+            return advantage, None
+        if depth <= 0:
+            capture = self._evaluator.capture() if self._quiescence else None
+            if capture is not None:
+                return self._quiescence_capture(capture, maximizer, alpha, beta), None
+            if self.metrics is not None:
+                self.metrics.leaf(self._search_depth - depth)
+            value = self._evaluator.evaluate()
+            return advantage + value if maximizer else advantage - value, None
+        key = self._hash ^ self._turn_key if maximizer else self._hash
+        if self._symmetries is not None:
+            key, symmetry = self._canonical_key(key)
+        entry = self._table.probe(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, bound, value, table_move = entry
+            if table_move is not None and self._symmetries is not None:
+                table_move = self._symmetries.unmap_move(table_move, symmetry)
+            if entry_depth >= depth:
+                value += advantage
+                if bound == EXACT:
+                    return value, table_move
+                if bound == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return value, table_move
+        if first_move is not None:
+            table_move = first_move
+        window_alpha, window_beta = alpha, beta
+        optimal_move = None
+        moves = self._ordered_moves(table_move)
         # computer move
         if maximizer:
-            max_advantage = float('-inf')
-            optimal_move = None
-            for row in range(self._backend.row_bound + 1):
-                for col in range(self._backend.column_bound + 1):
-                    if self._backend.is_edge(row, col) and not self._backend.taken(row, col):
-                        same_turn = self._backend.move(row, col, False)
-                        # box aquired --> maximizer; else --> minimizer
+            optimal_advantage = float('-inf')
+            for row, col in moves:
+                self._hash ^= self._edge_keys[row, col]
+                same_turn = self._backend.push(row, col, self._player_one)
+                self._evaluator.move(row, col)
+                try:
+                    # box aquired --> maximizer; else --> minimizer
+                    if self._pvs and (row, col) != moves[0]:
+                        # a null window proves the move is no better than alpha
+                        move_advantage, _ = self._alpha_beta_minimax(depth - 1, same_turn, alpha, alpha + 1)
+                        if alpha < move_advantage < beta:
+                            move_advantage, _ = self._alpha_beta_minimax(depth - 1, same_turn, alpha, beta)
+                    else:
                         move_advantage, _ = self._alpha_beta_minimax(depth - 1, same_turn, alpha, beta)
-                        # return to original state
-                        self._backend.revert_move(row, col)
-                        if move_advantage > max_advantage:
-                            max_advantage = move_advantage
-                            optimal_move = (row, col)
-                        alpha = max(alpha, move_advantage)
-                        if beta <= alpha:
-                            return max_advantage, optimal_move
-            return max_advantage, optimal_move
+                finally:
+                    # return to original state
+                    self._backend.pop()
+                    self._evaluator.revert(row, col)
+                    self._hash ^= self._edge_keys[row, col]
+                if move_advantage > optimal_advantage:
+                    optimal_advantage = move_advantage
+                    optimal_move = (row, col)
+                alpha = max(alpha, move_advantage)
+                if beta <= alpha:
+                    if self.metrics is not None:
+                        self.metrics.cutoff((row, col) == moves[0])
+                    break
         # player move
         else:
-            min_advantage = float('inf')
-            optimal_move = None
-            for row in range(self._backend.row_bound + 1):
-                for col in range(self._backend.column_bound + 1):
-                    if self._backend.is_edge(row, col) and not self._backend.taken(row, col):
-                        same_turn = self._backend.move(row, col, True)
-                        # box aquired --> minimizer; else --> maximizer
+            optimal_advantage = float('inf')
+            for row, col in moves:
+                self._hash ^= self._edge_keys[row, col]
+                same_turn = self._backend.push(row, col, not self._player_one)
+                self._evaluator.move(row, col)
+                try:
+                    # box aquired --> minimizer; else --> maximizer
+                    if self._pvs and (row, col) != moves[0]:
+                        # a null window proves the move is no better than beta
+                        move_advantage, _ = self._alpha_beta_minimax(depth - 1, not same_turn, beta - 1, beta)
+                        if alpha < move_advantage < beta:
+                            move_advantage, _ = self._alpha_beta_minimax(depth - 1, not same_turn, alpha, beta)
+                    else:
                         move_advantage, _ = self._alpha_beta_minimax(depth - 1, not same_turn, alpha, beta)
-                        # return to original state
-                        self._backend.revert_move(row, col)
-                        if move_advantage < min_advantage:
-                            min_advantage = move_advantage
-                            optimal_move = (row, col)
-                        beta = min(beta, move_advantage)
-                        if beta <= alpha:
-                            return min_advantage, optimal_move
-            return min_advantage, optimal_move
-           
+                finally:
+                    # return to original state
+                    self._backend.pop()
+                    self._evaluator.revert(row, col)
+                    self._hash ^= self._edge_keys[row, col]
+                if move_advantage < optimal_advantage:
+                    optimal_advantage = move_advantage
+                    optimal_move = (row, col)
+                beta = min(beta, move_advantage)
+                if beta <= alpha:
+                    if self.metrics is not None:
+                        self.metrics.cutoff((row, col) == moves[0])
+                    break
+        if optimal_advantage <= window_alpha:
+            bound = UPPER
+        elif optimal_advantage >= window_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        if optimal_move is not None and self._symmetries is not None:
+            self._table.store(key, depth, bound, optimal_advantage - advantage,
+                self._symmetries.map_move(optimal_move, symmetry))
+        else:
+            self._table.store(key, depth, bound, optimal_advantage - advantage, optimal_move)
+        return optimal_advantage, optimal_move
+
+    def _quiescence_capture(self, capture, maximizer, alpha, beta):
+        """Plays the capture at the depth limit and values the position after it.
+        Returns: Advantage
+        """
+        row, col = capture
+        self._hash ^= self._edge_keys[row, col]
+        self._backend.push(row, col, self._player_one if maximizer else not self._player_one)
+        self._evaluator.move(row, col)
+        try:
+            # the box keeps the turn with the same player
+            value, _ = self._alpha_beta_minimax(0, maximizer, alpha, beta)
+        finally:
+            self._backend.pop()
+            self._evaluator.revert(row, col)
+            self._hash ^= self._edge_keys[row, col]
+        return value
+
+    def expected_reply(self):
+        """Predicts the opponent's move in the current position (opponent to
+        move) from the best move the transposition table holds for it, e.g.
+        from the computer's previous search, or the first move in search order.
+        """
+        self._start_search()
+        key = self._hash
+        if self._symmetries is not None:
+            key, symmetry = self._canonical_key(key)
+        entry = self._table.probe(key)
+        if entry is not None and entry[3] is not None:
+            move = entry[3]
+            if self._symmetries is not None:
+                move = self._symmetries.unmap_move(move, symmetry)
+            if not self._backend.taken(*move):
+                return move
+        moves = self._ordered_moves(None)
+        return moves[0] if moves else None
+
+    def principal_variation(self, first_move):
+        """Moves the search expects from the current position (computer to
+        move): first_move, then the best move the transposition table holds
+        for each following position, continued by the exact solver once at
+        most oracle_edges edges are free. The backend is left as it was.
+        Returns: List of (row, col) edges
+        """
+        self._start_search()
+        backend = self._backend
+        edges = geometry(backend.columns, backend.rows).edges
+        moves = []
+        maximizer = True
+        move = first_move
+        try:
+            while move is not None and not backend.taken(*move):
+                self._hash ^= self._edge_keys[move]
+                same_turn = backend.push(*move, self._player_one if maximizer else not self._player_one)
+                moves.append(move)
+                if not same_turn:
+                    maximizer = not maximizer
+                move = None
+                if backend.game_over():
+                    break
+                if backend.edges_remaining <= self._oracle_edges:
+                    _, edge = self._solver.best_move(edges_of(backend))
+                    move = edges[edge]
+                    continue
+                key = self._hash ^ self._turn_key if maximizer else self._hash
+                if self._symmetries is not None:
+                    key, symmetry = self._canonical_key(key)
+                entry = self._table.probe(key)
+                if entry is not None and entry[3] is not None:
+                    move = entry[3]
+                    if self._symmetries is not None:
+                        move = self._symmetries.unmap_move(move, symmetry)
+        finally:
+            for move in moves:
+                backend.pop()
+                self._hash ^= self._edge_keys[move]
+        return moves
+
+    def _position_hash(self):
+        """Hash of the backend's edge set computed from scratch"""
+        key = 0
+        for (row, col), edge_key in self._edge_keys.items():
+            if self._backend.taken(row, col):
+                key ^= edge_key
+        return key
+
+    def _canonical_key(self, key):
+        """Returns: (smallest 64 bit hash packed in key, symmetry it belongs to)"""
+        best, best_symmetry = key & _KEY_MASK, 0
+        for symmetry in range(1, len(self._symmetries)):
+            key >>= 64
+            if key & _KEY_MASK < best:
+                best, best_symmetry = key & _KEY_MASK, symmetry
+        return best, best_symmetry
+
+    def _ordered_moves(self, first_move):
+        """Free edges ordered for pruning: first_move (e.g. the transposition
+        table's best move) if it is still free, then moves that complete a
+        box, then safe moves, then sacrifices that give a box a third side.
+        Box sides are read from the evaluator, which follows the search.
+        """
+        if first_move is not None and self._backend.taken(*first_move):
+            first_move = None
+        captures, safe, sacrifices = [], [], []
+        sides = self._evaluator.sides
+        for edge in self._backend.legal_moves():
+            if edge == first_move:
+                continue
+            boxes = self._edge_boxes[edge]
+            most_sides = sides[boxes[0]]
+            if len(boxes) == 2 and sides[boxes[1]] > most_sides:
+                most_sides = sides[boxes[1]]
+            if most_sides == 3:
+                captures.append(edge)
+            elif most_sides == 2:
+                sacrifices.append(edge)
+            else:
+                safe.append(edge)
+        if first_move is not None:
+            captures.insert(0, first_move)
+        return captures + safe + sacrifices
+
     def _computer_advantage(self):
-        return self._backend.player_two_score - self._backend.player_one_score
\ No newline at end of file
+        advantage = self._backend.player_two_score - self._backend.player_one_score
+        return -advantage if self._player_one else advantage
\ No newline at end of file
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Compact binary encodings of positions and games.
+
+Position: varint columns, varint rows, then one little endian integer holding
+the edge bits, player one's box bits and player two's box bits (in that order,
+numbered as in geometry.py) in ceil((edges + 2 * boxes) / 8) bytes. Scores are
+the box bit counts, so they are not stored separately.
+
+Game record file: the magic bytes b"DBG1", then one record per game made of
+varint columns, varint rows, varint move count and one varint edge index per
+move. Records are self delimiting, so files can be appended to and read as a
+stream.
+
+Position file: the magic bytes b"DBP1", then one record per position made of
+the varint length of the position's encoding, the encoding and one byte for
+the player to move (1 or 2).
+"""
+
+from .bitboard import BitBoard
+from .geometry import geometry
+from collections import namedtuple
+
+MAGIC = b"DBG1"
+POSITIONS_MAGIC = b"DBP1"
+
+GameRecord = namedtuple('GameRecord', ['cols', 'rows', 'moves'])
+
+def write_varint(out, value):
+    """Writes a non-negative integer 7 bits at a time, low bits first"""
+    out.write(encode_varint(value))
+
+def encode_varint(value):
+    """Returns: Bytes of the varint encoding of a non-negative integer"""
+    data = bytearray()
+    while value >= 0x80:
+        data.append(value & 0x7f | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+def read_varint(stream):
+    """Returns: Next varint in the stream or None at the end of the stream"""
+    value, shift = 0, 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise ValueError("truncated varint")
+            return None
+        value |= (byte[0] & 0x7f) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+def _decode_varint(data, offset):
+    value, shift = 0, 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def to_int(backend):
+    """Edge bits, player one's box bits and player two's box bits packed into one integer"""
+    shape = geometry(backend.columns, backend.rows)
+    edges, player_one_boxes, player_two_boxes = BitBoard.masks_of(backend)
+    return (edges | player_one_boxes << shape.edge_count
+        | player_two_boxes << (shape.edge_count + shape.box_count))
+
+def from_int(cols, rows, packed):
+    """Returns: BitBoard for the integer produced by to_int"""
+    shape = geometry(cols, rows)
+    edges = packed & shape.full_mask
+    player_one_boxes = packed >> shape.edge_count & (1 << shape.box_count) - 1
+    player_two_boxes = packed >> (shape.edge_count + shape.box_count)
+    return BitBoard.from_masks(cols, rows, edges, player_one_boxes, player_two_boxes)
+
+def to_bytes(backend):
+    """Canonical binary encoding of the position (see the module docstring)"""
+    shape = geometry(backend.columns, backend.rows)
+    length = (shape.edge_count + 2 * shape.box_count + 7) // 8
+    return (encode_varint(backend.columns) + encode_varint(backend.rows)
+        + to_int(backend).to_bytes(length, 'little'))
+
+def from_bytes(data):
+    """Returns: BitBoard for the bytes produced by to_bytes"""
+    cols, offset = _decode_varint(data, 0)
+    rows, offset = _decode_varint(data, offset)
+    return from_int(cols, rows, int.from_bytes(data[offset:], 'little'))
+
+def replay(record):
+    """Returns: BitBoard after playing the record's moves, player one first"""
+    board = BitBoard(record.cols, record.rows)
+    edges = board.geometry.edges
+    player_one_turn = True
+    for move in record.moves:
+        if not board.move(*edges[move], player_one_turn):
+            player_one_turn = not player_one_turn
+    return board
+
+class GameRecordWriter:
+    """Appends game records to a binary stream."""
+    def __init__(self, stream):
+        self._stream = stream
+        if stream.tell() == 0:
+            stream.write(MAGIC)
+
+    def write(self, cols, rows, moves):
+        """Writes one game given its moves as edge indices"""
+        data = bytearray(encode_varint(cols) + encode_varint(rows) + encode_varint(len(moves)))
+        for move in moves:
+            data += encode_varint(move)
+        self._stream.write(bytes(data))
+
+    def flush(self):
+        """Flushes the underlying stream"""
+        self._stream.flush()
+
+class GameRecordReader:
+    """Iterates over the GameRecords of a binary stream."""
+    def __init__(self, stream):
+        self._stream = stream
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a game record file")
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        cols = read_varint(self._stream)
+        if cols is None:
+            raise StopIteration
+        rows = read_varint(self._stream)
+        count = read_varint(self._stream)
+        if rows is None or count is None:
+            raise ValueError("truncated game record")
+        moves = [read_varint(self._stream) for _ in range(count)]
+        if None in moves:
+            raise ValueError("truncated game record")
+        return GameRecord(cols, rows, moves)
+
+class PositionWriter:
+    """Appends (position, player to move) records to a binary stream."""
+    def __init__(self, stream):
+        self._stream = stream
+        if stream.tell() == 0:
+            stream.write(POSITIONS_MAGIC)
+
+    def write(self, backend, player_one):
+        """Writes the position with player one (or player two) to move"""
+        data = to_bytes(backend)
+        self._stream.write(encode_varint(len(data)) + data + bytes([1 if player_one else 2]))
+
+    def flush(self):
+        """Flushes the underlying stream"""
+        self._stream.flush()
+
+class PositionReader:
+    """Iterates over the (BitBoard, whether player one is to move) records of
+    a binary stream. With magic_read, the stream is past the magic bytes.
+    """
+    def __init__(self, stream, magic_read=False):
+        self._stream = stream
+        if not magic_read and stream.read(len(POSITIONS_MAGIC)) != POSITIONS_MAGIC:
+            raise ValueError("not a position file")
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        length = read_varint(self._stream)
+        if length is None:
+            raise StopIteration
+        data = self._stream.read(length + 1)
+        if len(data) != length + 1 or data[-1] not in (1, 2):
+            raise ValueError("truncated position record")
+        return from_bytes(data[:-1]), data[-1] == 1
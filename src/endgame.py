@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Exact analysis of endgames made up of independent chains and loops.
+
+Once every box that is not won has at most two free edges, any move gives
+boxes away, and the position splits into components:
+    chain --> boxes joined in a line, each end on the edge of the board
+    loop  --> boxes joined in a cycle
+A component is opened once one of its end boxes has three sides taken.
+The player to move either opens a component or, if one is open, takes its
+boxes. When taking an opened chain they may stop two boxes short (four for a
+loop) and hand those boxes over with a single move, which forces the opponent
+to open the next component. This is the "all but two" double dealing play.
+
+Opening a chain at its end (a two chain in the middle) and choosing between
+taking everything and double dealing is optimal for these simple endgames, so
+the values computed here are exact.
+"""
+
+from .geometry import geometry
+from collections import namedtuple
+from functools import lru_cache
+
+# boxes in order; edges[i] is the free edge before boxes[i] (None for a
+# capturable end) and edges[-1] the edge after the last box (edges[0] for
+# loops); capturable is the number of ends with three sides taken
+Component = namedtuple('Component', ['boxes', 'edges', 'loop', 'capturable'])
+
+# net boxes for the player to move from here on and the edge they should play
+Endgame = namedtuple('Endgame', ['value', 'move'])
+
+def components(backend):
+    """Splits the boxes that are not won into chains and loops.
+    Returns: List of Components or None if a box has more than two free edges
+    """
+    shape = geometry(backend.columns, backend.rows)
+    free = {}
+    for box, (row, col) in enumerate(shape.boxes):
+        if backend.taken(row, col) or backend.taken(row + 1, col + 1):
+            continue
+        edges = [edge for edge in shape.box_edges[box] if not backend.taken(*shape.edges[edge])]
+        if len(edges) > 2:
+            return None
+        free[box] = edges
+    found = []
+    visited = set()
+    # chains start at a box with a ground edge or a single free edge
+    for box, edges in free.items():
+        if box in visited:
+            continue
+        ground = [edge for edge in edges if len(shape.edge_boxes[edge]) == 1]
+        if ground:
+            found.append(_walk(shape, free, visited, box, ground[0]))
+        elif len(edges) == 1:
+            found.append(_walk(shape, free, visited, box, None))
+    # whatever is left over is a cycle
+    for box in free:
+        if box not in visited:
+            found.append(_walk(shape, free, visited, box, free[box][0], loop=True))
+    return found
+
+def _walk(shape, free, visited, box, start_edge, loop=False):
+    boxes, edges = [], [start_edge]
+    incoming = start_edge
+    while True:
+        visited.add(box)
+        boxes.append(box)
+        outgoing = [edge for edge in free[box] if edge != incoming]
+        if not outgoing:
+            edges.append(None)
+            break
+        edge = outgoing[0]
+        edges.append(edge)
+        following = [other for other in shape.edge_boxes[edge] if other != box]
+        if not following or following[0] in visited:
+            break
+        box, incoming = following[0], edge
+    coordinates = [shape.edges[edge] if edge is not None else None for edge in edges]
+    if loop:
+        return Component(boxes, coordinates[:-1], True, 0)
+    return Component(boxes, coordinates, False, coordinates.count(None))
+
+def analyse(backend):
+    """Solves the position if it is a simple chain and loop endgame.
+    Returns: Endgame for the player to move or None if the position does not qualify
+    """
+    found = components(backend)
+    if not found:
+        return None
+    opened = [component for component in found if component.capturable]
+    closed = [component for component in found if not component.capturable]
+    rest = _value(*_lengths(closed))
+    if not opened:
+        component = _best_opening(closed)
+        return Endgame(rest, _opening_move(component))
+    taken = sum(len(component.boxes) for component in opened)
+    value, dealt = taken + rest, None
+    for component in opened:
+        cost = _dealing_cost(component)
+        if cost is not None and taken - cost - rest > value:
+            value, dealt = taken - cost - rest, component
+    # take the boxes of every component that is not being dealt first
+    for component in opened:
+        if component is not dealt:
+            return Endgame(value, _capture_move(component))
+    return Endgame(value, _dealing_move(dealt))
+
+def _lengths(closed):
+    chains = tuple(sorted(len(component.boxes) for component in closed if not component.loop))
+    loops = tuple(sorted(len(component.boxes) for component in closed if component.loop))
+    return chains, loops
+
+@lru_cache(maxsize=None)
+def _value(chains, loops):
+    """Net boxes for the player who must open one of the components"""
+    if not chains and not loops:
+        return 0
+    best = float('-inf')
+    for length in set(chains):
+        best = max(best, _opening_value(chains, loops, length, False))
+    for length in set(loops):
+        best = max(best, _opening_value(chains, loops, length, True))
+    return best
+
+def _opening_value(chains, loops, length, loop):
+    """Net boxes for the player opening a component of the length"""
+    if loop:
+        loops = _without(loops, length)
+    else:
+        chains = _without(chains, length)
+    rest = _value(chains, loops)
+    # opponent takes everything and moves next, or double deals
+    if loop:
+        return -max(length + rest, length - 8 - rest)
+    if length <= 2:
+        return -(length + rest)
+    return -max(length + rest, length - 4 - rest)
+
+def _without(lengths, length):
+    index = lengths.index(length)
+    return lengths[:index] + lengths[index + 1:]
+
+def _best_opening(closed):
+    chains, loops = _lengths(closed)
+    best, best_value = None, float('-inf')
+    for component in closed:
+        value = _opening_value(chains, loops, len(component.boxes), component.loop)
+        if value > best_value:
+            best, best_value = component, value
+    return best
+
+def _opening_move(component):
+    # two chains are opened in the middle so they cannot be double dealt
+    if not component.loop and len(component.boxes) == 2:
+        return component.edges[1]
+    return component.edges[0]
+
+def _dealing_cost(component):
+    """Boxes lost by handing over the end of an opened component, or None if it cannot be dealt"""
+    if component.capturable == 1 and len(component.boxes) >= 2:
+        return 4
+    if component.capturable == 2 and len(component.boxes) >= 4:
+        return 8
+    return None
+
+def _capture_move(component):
+    # the capturable box at either end has a single free edge
+    if component.edges[0] is None:
+        return component.edges[1]
+    return component.edges[-2]
+
+def _dealing_move(component):
+    edges = component.edges
+    if edges[0] is not None:
+        edges = edges[::-1]
+    if component.capturable == 1:
+        # take until two remain, then fill the far end
+        return edges[1] if len(component.boxes) > 2 else edges[-1]
+    # take until four remain, then split them into two dominoes
+    return edges[1] if len(component.boxes) > 4 else edges[2]
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Static evaluation of the leaves of the depth limited search.
+
+An evaluator estimates the net boxes the player to move wins from the position
+on (the quantity solver.value computes exactly), which the search adds to the
+score at its depth limit:
+    ScoreEvaluator --> 0, the leaf is valued by the score alone
+    ChainEvaluator --> the mover first takes every box it can (boxes with three
+                       sides taken and the chains they open), then both
+                       players fill the safe edges, which give no box a third
+                       side, in turn. The player left to move must open a
+                       chain or loop, and the remaining chains and loops are
+                       valued as a simple endgame (see endgame.py): this is
+                       the long chain rule, as its parity decides who gets
+                       control of the long chains.
+Evaluators follow the search through move and revert, so the taken edges, the
+sides of each box and the counts of boxes with three sides and of safe edges
+are kept incrementally rather than read from the board at every leaf (the
+search orders its moves by the same sides). Call reset with the board before a
+search.
+"""
+
+from . import endgame
+from .geometry import geometry
+
+# safe edges left up to which the parity of the safe edges is trusted
+CONTROL_SAFE_EDGES = 2
+
+class ScoreEvaluator:
+    """
+    Keeps the taken edges, the sides of each box, the number of boxes with three
+    sides and the number of safe edges incrementally, and values every leaf by
+    the score alone. Base of the other evaluators.
+    """
+    def __init__(self, cols, rows):
+        shape = geometry(cols, rows)
+        self._edges = shape.edges
+        self._edge_index = shape.edge_index
+        self._box_edges = shape.box_edges
+        self._edge_boxes = shape.edge_boxes
+        self._edge_count = shape.edge_count
+        # box --> {edge: other box of the edge, None on the border}
+        self._across = [{edge: next((other for other in shape.edge_boxes[edge] if other != box), None)
+            for edge in edges} for box, edges in enumerate(shape.box_edges)]
+        self.edges = 0
+        self.sides = [0] * shape.box_count
+        self.threes = 0
+        self.safe = shape.edge_count
+
+    def reset(self, backend):
+        """Sets the counts to the position of the board"""
+        self.edges = 0
+        self.sides = [0] * len(self.sides)
+        for index, (row, col) in enumerate(self._edges):
+            if backend.taken(row, col):
+                self.edges |= 1 << index
+                for box in self._edge_boxes[index]:
+                    self.sides[box] += 1
+        self.threes = self.sides.count(3)
+        self.safe = sum(1 for index in range(self._edge_count)
+            if not self.edges >> index & 1 and all(self.sides[box] < 2 for box in self._edge_boxes[index]))
+
+    def move(self, row, col):
+        """Follows a move of the search"""
+        index = self._edge_index[row, col]
+        sides = self.sides
+        self.edges |= 1 << index
+        # the edge was safe if no box had two sides before
+        safe = True
+        for box in self._edge_boxes[index]:
+            taken = sides[box] + 1
+            sides[box] = taken
+            if taken == 2:
+                # the box's free edges are no longer safe
+                self.safe -= self._safe_edges_of(box)
+            elif taken == 3:
+                safe = False
+                self.threes += 1
+            elif taken == 4:
+                safe = False
+                self.threes -= 1
+        if safe:
+            self.safe -= 1
+
+    def revert(self, row, col):
+        """Follows the revert of a move of the search"""
+        index = self._edge_index[row, col]
+        sides = self.sides
+        safe = True
+        for box in self._edge_boxes[index]:
+            taken = sides[box]
+            if taken == 2:
+                self.safe += self._safe_edges_of(box)
+            elif taken == 3:
+                safe = False
+                self.threes -= 1
+            elif taken == 4:
+                safe = False
+                self.threes += 1
+            sides[box] = taken - 1
+        self.edges &= ~(1 << index)
+        if safe:
+            self.safe += 1
+
+    def _safe_edges_of(self, box):
+        """Free edges of the box whose other box has fewer than two sides"""
+        count = 0
+        edges, sides = self.edges, self.sides
+        for edge, other in self._across[box].items():
+            if not edges >> edge & 1 and (other is None or sides[other] < 2):
+                count += 1
+        return count
+
+    def capture(self):
+        """Returns: Edge completing a box, or None"""
+        if not self.threes:
+            return None
+        box = self.sides.index(3)
+        for edge in self._box_edges[box]:
+            if not self.edges >> edge & 1:
+                return self._edges[edge]
+
+    def evaluate(self):
+        """Net boxes for the player to move from the position on (estimated)"""
+        return 0
+
+class ChainEvaluator(ScoreEvaluator):
+    """Captures, safe edge parity and the chain endgame value (see the module docstring)."""
+    # the control term is only counted with at most this many safe edges left
+    control_safe_edges = CONTROL_SAFE_EDGES
+
+    def evaluate(self):
+        if not self.threes and self.safe > self.control_safe_edges:
+            return 0
+        edges = self.edges
+        sides = self.sides[:]
+        box_edges, edge_boxes = self._box_edges, self._edge_boxes
+        # the mover takes the boxes with three sides, which may give others a third side
+        captured = 0
+        capturable = [box for box, taken in enumerate(sides) if taken == 3]
+        while capturable:
+            box = capturable.pop()
+            if sides[box] != 3:
+                continue
+            edge = next(edge for edge in box_edges[box] if not edges >> edge & 1)
+            edges |= 1 << edge
+            for other in edge_boxes[edge]:
+                sides[other] += 1
+                if sides[other] == 4:
+                    captured += 1
+                elif sides[other] == 3:
+                    capturable.append(other)
+        # safe edges are filled greedily in edge order
+        safe = 0
+        for edge in range(self._edge_count):
+            if not edges >> edge & 1 and all(sides[box] < 2 for box in edge_boxes[edge]):
+                safe += 1
+                if safe > self.control_safe_edges:
+                    return captured
+                edges |= 1 << edge
+                for box in edge_boxes[edge]:
+                    sides[box] += 1
+        chains, loops = self._components(edges, sides)
+        rest = endgame._value(chains, loops)
+        # with an even number of safe edges the mover is left to open a component
+        return captured + (rest if safe % 2 == 0 else -rest)
+
+    def _components(self, edges, sides):
+        """Chains and loops of the boxes with two sides taken. A junction (a
+        box with more free edges) joins two of its arms once another arm is
+        taken, so its two longest arms are merged through it.
+        Returns: (sorted chain lengths, sorted loop lengths)
+        """
+        box_edges, edge_boxes = self._box_edges, self._edge_boxes
+        component_of = {}
+        lengths, loops = [], []
+        for start, taken in enumerate(sides):
+            if taken != 2 or start in component_of:
+                continue
+            component = len(lengths)
+            component_of[start] = component
+            length, closed, stack = 0, True, [start]
+            while stack:
+                box = stack.pop()
+                length += 1
+                for edge in box_edges[box]:
+                    if edges >> edge & 1:
+                        continue
+                    following = [other for other in edge_boxes[edge] if other != box]
+                    # the chain ends on the border or at a junction
+                    if not following or sides[following[0]] != 2:
+                        closed = False
+                    elif following[0] not in component_of:
+                        component_of[following[0]] = component
+                        stack.append(following[0])
+            lengths.append(length)
+            loops.append(closed)
+        merged = list(range(len(lengths)))
+        def root(component):
+            while merged[component] != component:
+                component = merged[component]
+            return component
+        for junction, taken in enumerate(sides):
+            if taken >= 2:
+                continue
+            # arms are components, or None for border edges and neighbouring junctions
+            arms = []
+            for edge in box_edges[junction]:
+                if not edges >> edge & 1:
+                    following = [other for other in edge_boxes[edge] if other != junction]
+                    arms.append(root(component_of[following[0]])
+                        if following and sides[following[0]] == 2 else None)
+            arms.sort(key=lambda arm: -1 if arm is None else lengths[arm])
+            first, second = arms[-2], arms[-1]
+            if second is None:
+                lengths.append(1)
+                loops.append(False)
+                merged.append(len(merged))
+            elif first is None:
+                lengths[second] += 1
+            elif first == second:
+                lengths[second] += 1
+                loops[second] = True
+            else:
+                merged[first] = second
+                lengths[second] += lengths[first] + 1
+        chains = tuple(sorted(lengths[component] for component in range(len(lengths))
+            if merged[component] == component and not loops[component]))
+        return chains, tuple(sorted(lengths[component] for component in range(len(lengths))
+            if merged[component] == component and loops[component]))
+
+# evaluators by name, for the command line
+EVALUATORS = {'chain': ChainEvaluator, 'score': ScoreEvaluator}
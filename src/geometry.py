@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed indexing for the edges and boxes of a board size.
+
+Edges are numbered in raster order of the matrix representation (see board.py),
+so edge 0 is the top-left horizontal edge (0, 1) and the last edge is the
+bottom-right horizontal edge. Boxes are numbered row by row and are identified
+in matrix coordinates by their player one marker (2 * row, 2 * col).
+"""
+
+from functools import lru_cache
+
+class Geometry:
+    """Lookup tables shared by every board of the same size."""
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        # edges in raster order of the matrix representation
+        self.edges = [(row, col) for row in range(2 * rows + 1) for col in range(2 * cols + 1)
+            if row % 2 != col % 2]
+        self.edge_index = {edge: index for index, edge in enumerate(self.edges)}
+        self.edge_bits = {edge: 1 << index for index, edge in enumerate(self.edges)}
+        # boxes by player one marker coordinate
+        self.boxes = [(2 * row, 2 * col) for row in range(rows) for col in range(cols)]
+        self.box_index = {box: index for index, box in enumerate(self.boxes)}
+        self.box_bits = {box: 1 << index for index, box in enumerate(self.boxes)}
+        # edge indices of each box: top, bottom, left, right
+        self.box_edges = [(self.edge_index[row, col + 1], self.edge_index[row + 2, col + 1],
+            self.edge_index[row + 1, col], self.edge_index[row + 1, col + 2]) for row, col in self.boxes]
+        self.box_masks = [sum(1 << edge for edge in edges) for edges in self.box_edges]
+        self.box_coordinate_masks = dict(zip(self.boxes, self.box_masks))
+        # box indices adjacent to each edge
+        self.edge_boxes = [[] for _ in self.edges]
+        for box, edges in enumerate(self.box_edges):
+            for edge in edges:
+                self.edge_boxes[edge].append(box)
+        self.edge_boxes = [tuple(boxes) for boxes in self.edge_boxes]
+        # box coordinates adjacent to each edge coordinate
+        self.adjacent_boxes = {edge: tuple(self.boxes[box] for box in self.edge_boxes[index])
+            for index, edge in enumerate(self.edges)}
+        # (box bit, box edge mask) pairs checked when an edge is filled
+        self.completions = {edge: tuple((1 << box, self.box_masks[box]) for box in self.edge_boxes[index])
+            for index, edge in enumerate(self.edges)}
+
+    @property
+    def edge_count(self):
+        """Number of edges on the board"""
+        return len(self.edges)
+
+    @property
+    def box_count(self):
+        """Number of boxes on the board"""
+        return len(self.boxes)
+
+    @property
+    def full_mask(self):
+        """Bitmask with every edge set"""
+        return (1 << len(self.edges)) - 1
+
+@lru_cache(maxsize=None)
+def geometry(cols, rows):
+    """Shared Geometry instance for the board size"""
+    return Geometry(cols, rows)
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 """
 Terminal based GUI operating on the curses library.
+The board is drawn on a pad and shown through a viewport that scrolls with the
+cursor, so boards larger than the terminal (20x20 and up) can be played.
 Adapted from stephenroller's Dots and Boxes game https://gist.github.com/stephenroller/3163995.
 """
 
+from .geometry import geometry
 import curses
 
 class Gui:
@@ -13,10 +16,16 @@ class Gui:
 
     # padding between terminal edges
     _OFFSET_X = _OFFSET_Y = 2
+    # cells kept between the cursor and the edge of the viewport when scrolling
+    _MARGIN_X = 4
+    _MARGIN_Y = 2
     # color classes
     _YELLOW_BLACK = 1
     _BLUE_BLACK = 2
     _BLACK_RED = 3
+    # input polling interval and animation frames while the computer thinks
+    _POLL_MS = 100
+    _SPINNER = "|/-\\"
 
     def __init__(self, backend):
         # curses initialization
@@ -29,22 +38,39 @@ class Gui:
         self.stdscr.keypad(True)
         self.stdscr.clear()
         self.backend = backend
+        # the whole board (one spare column, as curses cannot write the last cell)
+        self._pad = curses.newpad(backend.row_bound + 1, backend.column_bound * 2 + 2)
+        # pad cell at the top left of the viewport and the viewport's size
+        self._top = self._left = 0
+        self._view_height = self._view_width = 0
+        self._fit_view()
+        self._edges = geometry(backend.columns, backend.rows).edges
+        self._boxes = geometry(backend.columns, backend.rows).boxes
+        # what is on screen: taken edges, box owners and edges remaining then
+        self._drawn_edges = set()
+        self._drawn_boxes = {}
+        self._drawn_remaining = None
+        self._draw_board()
 
     def move(self, is_player_one):
         """Handles a player's move in the GUI. Updates the backend with
         the player's chosen move.
+        Only the cells that changed (the cursor and edges or boxes taken since
+        the last update) are redrawn, so a keypress costs the same on any board.
         Returns: Whether a box was aquired due to the move
         """
+        self.update()
         row, col = 1, 0
         c = None
         # allows player to maneuver through board edges
         while not c == ord("\n") or self.backend.taken(row, col):
-            self._draw_board()
             # red background line for invalid selection
             if self.backend.taken(row, col):
                 self._draw_line(row, col, self._BLACK_RED)
             else:
                 self._draw_line(row, col, self._determine_color(is_player_one))
+            self._follow(row, col)
+            self._refresh()
             c = self.stdscr.getch()
 
             # handle arrow inputs
@@ -75,33 +101,154 @@ class Gui:
                     temp_col += 1
                 else:
                     temp_col += 2
+            elif c == curses.KEY_RESIZE:
+                self._fit_view()
+                self._draw_board()
 
+            # restore the cell under the old cursor
+            self._draw_edge(row, col)
             if not self.backend.edge_is_out_of_bounds(temp_row, temp_col):
                 row, col = temp_row, temp_col 
 
-            self.stdscr.clear()
-
         # make move; keep track of whether box was aquired
         box_drawn = self.backend.move(row, col, is_player_one)
-        self._draw_board()
+        self.update()
+        return box_drawn
+
+    def wait(self, computer):
+        """Keeps the GUI responsive while computer (see BackgroundComputer)
+        searches in the background, showing a spinner, then plays its move.
+        Returns: Whether a box was aquired due to the computer's move
+        """
+        self.stdscr.timeout(self._POLL_MS)
+        frame = 0
+        try:
+            while computer.thinking():
+                self._draw_status("Computer is thinking " + self._SPINNER[frame % len(self._SPINNER)])
+                self._refresh()
+                if self.stdscr.getch() == curses.KEY_RESIZE:
+                    self._fit_view()
+                    self._draw_board()
+                frame += 1
+        finally:
+            self.stdscr.timeout(-1)
+        self._draw_status("")
+        box_drawn = computer.finish()
+        self.update()
         return box_drawn
 
+    def update(self):
+        """Draws the edges and boxes that changed since the last update, e.g.
+        the computer's moves. The board is only scanned if the number of
+        remaining edges changed.
+        """
+        if self.backend.edges_remaining != self._drawn_remaining:
+            for row, col in self._edges:
+                if self.backend.taken(row, col) != ((row, col) in self._drawn_edges):
+                    self._draw_edge(row, col)
+            for row, col in self._boxes:
+                owner = (True if self.backend.taken(row, col)
+                    else False if self.backend.taken(row + 1, col + 1) else None)
+                if owner != self._drawn_boxes.get((row, col)):
+                    self._draw_box_cell(row, col, owner)
+            self._drawn_remaining = self.backend.edges_remaining
+        self._refresh()
+
+    def _refresh(self):
+        self.stdscr.noutrefresh()
+        self._pad.noutrefresh(self._top, self._left, self._OFFSET_Y, self._OFFSET_X,
+            self._OFFSET_Y + self._view_height - 1, self._OFFSET_X + self._view_width - 1)
+        curses.doupdate()
+
+    def _fit_view(self):
+        """Sizes the viewport to the terminal, leaving room for the status line"""
+        height, width = self.stdscr.getmaxyx()
+        pad_height, pad_width = self._pad.getmaxyx()
+        self._view_height = max(1, min(pad_height, height - self._OFFSET_Y - 2))
+        self._view_width = max(1, min(pad_width - 1, width - self._OFFSET_X - 1))
+        self._top = max(0, min(self._top, pad_height - self._view_height))
+        self._left = max(0, min(self._left, pad_width - 1 - self._view_width))
+
+    def _follow(self, row, col):
+        """Scrolls the viewport so that the edge and a margin around it are shown"""
+        pad_height, pad_width = self._pad.getmaxyx()
+        self._top = self._scrolled(self._top, row, self._view_height, pad_height, self._MARGIN_Y)
+        self._left = self._scrolled(self._left, col * 2, self._view_width, pad_width - 1, self._MARGIN_X)
+
+    @staticmethod
+    def _scrolled(start, position, view, total, margin):
+        """Returns: First cell of a view of the given size on total cells
+        showing position, moved as little as possible from start
+        """
+        margin = min(margin, (view - 1) // 2)
+        start = min(start, position - margin)
+        start = max(start, position + margin - view + 1)
+        return max(0, min(start, total - view))
+
     def _draw_board(self):
-        for row in range(self.backend.row_bound + 1):
-            for col in range(self.backend.column_bound + 1):
-                if self.backend.is_player_one_box(row, col):
-                    self._draw_dot(row, col)
-                    if self.backend.taken(row, col):
-                        self._draw_box(row, col, True)
-                elif self.backend.is_horizontal_edge(row, col) and self.backend.taken(row, col):
-                    self._draw_horizontal(row, col)
-                elif self.backend.is_vertical_edge(row, col) and self.backend.taken(row, col):
-                    self._draw_vertical(row, col)
-                elif self.backend.is_player_two_box(row, col) and self.backend.taken(row, col):
-                    self._draw_box(row - 1, col - 1, False)
+        """Draws the whole board from scratch"""
+        self.stdscr.erase()
+        self._pad.erase()
+        self._drawn_edges.clear()
+        self._drawn_boxes.clear()
+        for row in range(0, self.backend.row_bound + 1, 2):
+            for col in range(0, self.backend.column_bound + 1, 2):
+                self._draw_dot(row, col)
+        self._drawn_remaining = None
+        self.update()
+
+    def _draw_edge(self, row, col):
+        """Draws the edge as it is on the backend (taken or blank)"""
+        if self.backend.taken(row, col):
+            self._drawn_edges.add((row, col))
+            self._draw_line(row, col)
+        else:
+            self._drawn_edges.discard((row, col))
+            if self.backend.is_horizontal_edge(row, col):
+                self._pad.addstr(row, (col // 2) * 4 + 1, "   ")
+            else:
+                self._pad.addstr(row, col * 2, " ")
+
+    def _draw_box_cell(self, row, col, owner):
+        """Draws the box's owner (True for player one, None for no owner)"""
+        if owner is None:
+            self._drawn_boxes.pop((row, col), None)
+            self._pad.addstr(row + 1, col * 2 + 2, " ")
+        else:
+            self._drawn_boxes[row, col] = owner
+            self._draw_box(row, col, owner)
+
+    def draw_metrics(self, metrics):
+        """Shows the metrics of the computer's last search (see
+        instrumentation.py) in a panel to the right of the board, or below the
+        status line when the terminal is too narrow for it. Lines are cut at
+        the terminal's edge and the panel is skipped when nothing fits.
+        """
+        lines = ["{:<24}{}".format(name, value) for name, value in metrics.as_dict().items()
+            if name != 'iterations']
+        for depth, nodes, seconds in metrics.iterations:
+            lines.append("depth {:<3} {:>10} {:>9.3f}s".format(depth, nodes, seconds))
+        height, width = self.stdscr.getmaxyx()
+        # curses cannot write the last cell of the screen, so lines end one column early
+        x, top = self._OFFSET_X + self._view_width + 5, self._OFFSET_Y
+        if x + max(map(len, lines)) >= width:
+            x, top = self._OFFSET_X, self._OFFSET_Y + self._view_height + 3
+        if x >= width - 1 or top >= height:
+            return
+        for index in range(height - top):
+            self.stdscr.move(top + index, x)
+            self.stdscr.clrtoeol()
+            if index < len(lines):
+                self.stdscr.addnstr(lines[index], width - x - 1)
+        self._refresh()
+
+    def _draw_status(self, text):
+        self.stdscr.move(self._OFFSET_Y + self._view_height + 1, self._OFFSET_X)
+        self.stdscr.clrtoeol()
+        self.stdscr.addstr(text)
 
     def _draw_dot(self, row, col):
-        self.stdscr.addstr(self._OFFSET_Y + row, self._OFFSET_X + col * 2, "o")
+        self._pad.addstr(row, col * 2, "o")
 
     def _draw_line(self, row, col, color=0):
         if self.backend.is_horizontal_edge(row, col):
@@ -110,13 +257,13 @@ class Gui:
             self._draw_vertical(row, col, color)
 
     def _draw_horizontal(self, row, col, color=0):
-        self.stdscr.addstr(self._OFFSET_Y + row, self._OFFSET_X + (col // 2) * 4 + 1, "---", curses.color_pair(color))
+        self._pad.addstr(row, (col // 2) * 4 + 1, "---", curses.color_pair(color))
 
     def _draw_vertical(self, row, col, color=0):
-        self.stdscr.addstr(self._OFFSET_Y + row, self._OFFSET_X + col * 2, "|", curses.color_pair(color))
+        self._pad.addstr(row, col * 2, "|", curses.color_pair(color))
 
     def _draw_box(self, row, col, is_player_one):
-        self.stdscr.addstr(self._OFFSET_Y + row + 1, self._OFFSET_X + col * 2 + 2, "U" if is_player_one else "C", curses.color_pair(self._determine_color(is_player_one)))
+        self._pad.addstr(row + 1, col * 2 + 2, "U" if is_player_one else "C", curses.color_pair(self._determine_color(is_player_one)))
 
     def _determine_color(self, is_player_one):
         return self._YELLOW_BLACK if is_player_one else self._BLUE_BLACK
\ No newline at end of file
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics of the computer's searches.
+
+A Computer created with instrument=True collects a SearchMetrics per move;
+otherwise it only pays for an attribute check at each beta cutoff and leaf.
+Time spent in the board engine is measured by wrapping the backend in a
+TimedBoard for the duration of the search. MetricsWriter appends metrics as
+JSON lines, e.g. for `python3 -m src --metrics-out metrics.jsonl`.
+"""
+
+import json
+import time
+
+class SearchMetrics:
+    """Counters of one search (one computer move)."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        self.nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.max_depth = 0
+        self.leaves = 0
+        self.table_probes = 0
+        self.table_hits = 0
+        self.board_calls = 0
+        self.board_time = 0.0
+        # (depth, nodes, seconds) of each completed iteration
+        self.iterations = []
+        self._iteration_nodes = 0
+
+    def cutoff(self, first_move):
+        """Counts a beta cutoff, caused by the first move searched or a later one"""
+        self.cutoffs += 1
+        if first_move:
+            self.first_move_cutoffs += 1
+
+    def leaf(self, ply):
+        """Records a leaf reached ply moves below the root"""
+        self.leaves += 1
+        if ply > self.max_depth:
+            self.max_depth = ply
+
+    def iteration(self, depth, nodes):
+        """Records a completed iteration given the nodes searched so far"""
+        self.iterations.append((depth, nodes - self._iteration_nodes, time.perf_counter() - self.start))
+        self._iteration_nodes = nodes
+
+    def finish(self, nodes, table_hits):
+        """Records the totals at the end of the search. Every node that is
+        not a leaf probes the transposition table.
+        """
+        self.nodes = nodes
+        self.table_probes = nodes - self.leaves
+        self.table_hits = table_hits
+        self.elapsed = time.perf_counter() - self.start
+
+    @property
+    def first_move_cutoff_ratio(self):
+        """Fraction of cutoffs caused by the first move searched (move ordering quality)"""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def branching_factor(self):
+        """Effective branching factor: the depth-th root of the nodes of the deepest iteration"""
+        if not self.iterations:
+            return 0.0
+        depth, nodes, _ = self.iterations[-1]
+        return nodes ** (1 / depth) if depth else 0.0
+
+    def as_dict(self):
+        """Metrics as a JSON serializable dict"""
+        return {
+            'elapsed': round(self.elapsed, 6),
+            'nodes': self.nodes,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoff_ratio': round(self.first_move_cutoff_ratio, 4),
+            'branching_factor': round(self.branching_factor, 3),
+            'max_depth': self.max_depth,
+            'table_probes': self.table_probes,
+            'table_hits': self.table_hits,
+            'board_calls': self.board_calls,
+            'board_time': round(self.board_time, 6),
+            'iterations': [[depth, nodes, round(seconds, 6)] for depth, nodes, seconds in self.iterations],
+        }
+
+class TimedBoard:
+    """Board engine proxy that adds the time spent in move and revert_move to metrics."""
+    def __init__(self, backend, metrics):
+        self._backend = backend
+        self._metrics = metrics
+
+    def move(self, row, col, player_one_turn):
+        start = time.perf_counter()
+        same_turn = self._backend.move(row, col, player_one_turn)
+        self._metrics.board_time += time.perf_counter() - start
+        self._metrics.board_calls += 1
+        return same_turn
+
+    def revert_move(self, row, col):
+        start = time.perf_counter()
+        self._backend.revert_move(row, col)
+        self._metrics.board_time += time.perf_counter() - start
+        self._metrics.board_calls += 1
+
+    def push(self, row, col, player_one_turn):
+        start = time.perf_counter()
+        same_turn = self._backend.push(row, col, player_one_turn)
+        self._metrics.board_time += time.perf_counter() - start
+        self._metrics.board_calls += 1
+        return same_turn
+
+    def pop(self):
+        start = time.perf_counter()
+        edge = self._backend.pop()
+        self._metrics.board_time += time.perf_counter() - start
+        self._metrics.board_calls += 1
+        return edge
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+class MetricsWriter:
+    """Appends one JSON line per search to a text stream."""
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, metrics, **fields):
+        """Writes the metrics' dict merged with fields (e.g. the move number)"""
+        record = dict(fields)
+        record.update(metrics.as_dict())
+        self._stream.write(json.dumps(record) + "\n")
+        self._stream.flush()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Optional compiled board kernel.
+
+_kernel.c keeps the state in flat arrays (a taken flag per edge, the sides and
+owner of every box) and implements move, revert_move, the push/pop move stack,
+legal move generation and an alpha beta search over that state in C. Build it
+in place with
+    python3 setup.py build_ext --inplace
+Without a compiler the build is skipped and everything here falls back to the
+pure Python engines:
+    FastBoard      --> KernelBoard when the kernel is built, BitBoard otherwise
+    KernelComputer --> searches in the kernel when it is built, with the
+                       computer's own alpha beta otherwise
+"""
+
+from .bitboard import BitBoard
+from .board import BaseBoard
+from .computer import Computer, _SearchTimeout
+from .evaluation import ScoreEvaluator
+from .geometry import geometry
+import time
+
+try:
+    from . import _kernel
+except ImportError:
+    _kernel = None
+
+# whether the compiled kernel was built
+AVAILABLE = _kernel is not None
+
+if AVAILABLE:
+    class KernelBoard(_kernel.Kernel, BaseBoard):
+        """Board engine of the compiled kernel, with the API of Board and
+        BitBoard. The state and the move stack live in C; BaseBoard supplies
+        the coordinate predicates.
+        """
+        def __init__(self, cols=4, rows=5):
+            super().__init__(cols, rows)
+            self._cols = cols
+            self._rows = rows
+
+        @classmethod
+        def from_masks(cls, cols, rows, edges, player_one_boxes, player_two_boxes):
+            """Board with the given edge and box ownership bitmasks"""
+            board = cls(cols, rows)
+            edge_bytes, box_bytes = board.geometry.edge_count // 8 + 1, cols * rows // 8 + 1
+            board.load(edges.to_bytes(edge_bytes, 'little'), player_one_boxes.to_bytes(box_bytes, 'little'),
+                player_two_boxes.to_bytes(box_bytes, 'little'))
+            return board
+
+        @classmethod
+        def from_backend(cls, backend):
+            """Board in the position of any board engine (without its move stack)"""
+            return cls.from_masks(backend.columns, backend.rows, *BitBoard.masks_of(backend))
+
+        def __reduce__(self):
+            return KernelBoard.from_masks, (self._cols, self._rows) + self.masks()
+
+        @property
+        def board(self):
+            """Matrix representation of the state (see board.py), built on demand"""
+            return [[self.taken(row, col) for col in range(self.column_bound + 1)]
+                for row in range(self.row_bound + 1)]
+
+        @property
+        def geometry(self):
+            """Edge and box indexing shared by boards of this size"""
+            return geometry(self._cols, self._rows)
+
+        @property
+        def edges(self):
+            """Bitmask of the taken edges"""
+            return self.masks()[0]
+
+        @property
+        def player_one_boxes(self):
+            """Bitmask of the boxes won by player one"""
+            return self.masks()[1]
+
+        @property
+        def player_two_boxes(self):
+            """Bitmask of the boxes won by player two"""
+            return self.masks()[2]
+
+    FastBoard = KernelBoard
+else:
+    KernelBoard = None
+    FastBoard = BitBoard
+
+class KernelComputer(Computer):
+    """Computer whose alpha beta search runs in the compiled kernel. The
+    kernel values leaves by the score, without quiescence, transposition
+    table or exact solver, so the computer is set up with ScoreEvaluator and
+    no quiescence, and its Python search is the fallback without the kernel.
+    Solved tables, the opening book, endgame analysis and the exact solver
+    at the root work as for Computer.
+    """
+    def __init__(self, backend, table=None, think_ms=None, player_one=False, **kwargs):
+        super().__init__(backend, table, think_ms, player_one, evaluator=ScoreEvaluator, quiescence=False,
+            **kwargs)
+        if self._search != 'alphabeta':
+            raise ValueError("the kernel only searches with alpha beta")
+        # board of the running search, to stop it from another thread
+        self._kernel = None
+
+    def stop(self):
+        super().stop()
+        kernel = self._kernel
+        if kernel is not None:
+            kernel.stop()
+
+    def _root_search(self, depth, first_move):
+        if not AVAILABLE:
+            return super()._root_search(depth, first_move)
+        # the kernel searches a private copy of the position with the GIL released
+        kernel = KernelBoard.from_backend(self._backend)
+        self._kernel = kernel
+        if self._stopped:
+            kernel.stop()
+        seconds = None
+        if self._deadline is not None and self._deadline != float('inf'):
+            seconds = self._deadline - time.perf_counter()
+        try:
+            value, move, nodes = kernel.search(depth, self._player_one, first_move, seconds)
+        finally:
+            self._kernel = None
+        self._nodes += nodes
+        if value is None:
+            raise _SearchTimeout()
+        return value, move
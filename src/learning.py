@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+Learned bot: a small policy/value network evaluated with NumPy only.
+
+The network does not depend on the board size. Every free edge is described by
+the same FEATURES numbers (see Encoder): the sides taken of its boxes, how many
+of their neighbours have two sides, and features of the whole position (edges
+and safe edges left, their parity, the score). One hidden layer is shared by
+all edges:
+    hidden --> relu(features @ w1 + b1)                    (edges x HIDDEN)
+    policy --> softmax over the free edges of hidden @ wp
+    value  --> tanh(mean of hidden over the edges @ wv + bv), the final score
+               difference of the player to move over the number of boxes
+A move is one forward pass, with no search, so it takes about a millisecond on
+small boards and grows only linearly with the edges.
+
+Training reads self-play records (see selfplay.py): the policy learns the moves
+played and the value the final score. Run from the root directory:
+    python3 -m src.selfplay --games 500 --player-one computer --player-two computer --out games.jsonl
+    python3 -m src.learning --data games.jsonl --epochs 10
+This module requires NumPy.
+"""
+
+from .bitboard import BitBoard
+from .computer import SearchStats
+from .geometry import geometry
+import argparse
+import copy
+import json
+import numpy as np
+import os
+import time
+
+FEATURES = 16
+HIDDEN = 32
+
+def default_path():
+    """Location of the network's weights in the books directory"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'books', 'policy.npz')
+
+class Encoder:
+    """Turns positions of one board size into (edges, FEATURES) arrays."""
+    def __init__(self, cols, rows):
+        shape = geometry(cols, rows)
+        self.cols = cols
+        self.rows = rows
+        self.edge_count = shape.edge_count
+        self.box_count = shape.box_count
+        padding = shape.box_count
+        # edge --> its two boxes, the missing box of border edges being the padding column
+        self._edge_boxes = np.array([boxes + (padding,) * (2 - len(boxes)) for boxes in shape.edge_boxes],
+            dtype=np.intp)
+        self._box_edges = np.array(shape.box_edges, dtype=np.intp)
+        # box --> its neighbouring boxes, padded
+        neighbours = [[] for _ in range(shape.box_count + 1)]
+        for boxes in shape.edge_boxes:
+            if len(boxes) == 2:
+                neighbours[boxes[0]].append(boxes[1])
+                neighbours[boxes[1]].append(boxes[0])
+        self._neighbours = np.array([boxes + [padding] * (4 - len(boxes)) for boxes in neighbours], dtype=np.intp)
+
+    def taken_of(self, backend):
+        """Returns: (edges,) bool array of the backend's taken edges"""
+        edges, _, _ = BitBoard.masks_of(backend)
+        data = np.frombuffer(edges.to_bytes((self.edge_count + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, bitorder='little')[:self.edge_count].astype(bool)
+
+    def encode(self, taken, margins):
+        """Features of N positions given as (N, edges) taken edges and (N,)
+        score differences of the players to move.
+        Returns: (N, edges, FEATURES) float32 array
+        """
+        count = len(taken)
+        sides = np.empty((count, self.box_count + 1), dtype=np.int8)
+        sides[:, :-1] = taken[:, self._box_edges].sum(axis=2)
+        # the padding box counts as absent
+        sides[:, -1] = -1
+        pair = sides[:, self._edge_boxes]
+        pair.sort(axis=2)
+        high, low = pair[:, :, 1], pair[:, :, 0]
+        two = sides == 2
+        two[:, -1] = False
+        chained = two[:, self._neighbours].sum(axis=2)
+        pair_chained = chained[:, self._edge_boxes]
+        free = ~taken
+        safe = free & (sides[:, self._edge_boxes] < 2).all(axis=2)
+        safe_count = safe.sum(axis=1)
+        features = np.empty((count, self.edge_count, FEATURES), dtype=np.float32)
+        for value in range(4):
+            features[:, :, value] = high == value
+            features[:, :, 4 + value] = low == value
+        features[:, :, 8] = low >= 0
+        features[:, :, 9] = pair_chained.sum(axis=2) / 4
+        features[:, :, 10] = pair_chained.max(axis=2) / 4
+        features[:, :, 11] = (free.sum(axis=1) / self.edge_count)[:, None]
+        features[:, :, 12] = (safe_count / self.edge_count)[:, None]
+        features[:, :, 13] = (safe_count % 2)[:, None]
+        features[:, :, 14] = (sides == 3).any(axis=1)[:, None]
+        features[:, :, 15] = (np.asarray(margins) / self.box_count)[:, None]
+        return features
+
+class PolicyValueNet:
+    """The network of the module docstring; weights are NumPy arrays."""
+    _NAMES = ('w1', 'b1', 'wp', 'wv', 'bv')
+
+    def __init__(self, weights):
+        self.weights = weights
+
+    @classmethod
+    def initial(cls, hidden=HIDDEN, seed=0):
+        rng = np.random.default_rng(seed)
+        return cls({'w1': (rng.standard_normal((FEATURES, hidden)) / np.sqrt(FEATURES)).astype(np.float32),
+            'b1': np.zeros(hidden, dtype=np.float32),
+            'wp': (rng.standard_normal(hidden) / np.sqrt(hidden)).astype(np.float32),
+            'wv': (rng.standard_normal(hidden) / np.sqrt(hidden)).astype(np.float32),
+            'bv': np.zeros(1, dtype=np.float32)})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in cls._NAMES})
+
+    def save(self, path):
+        np.savez(path, **self.weights)
+
+    def forward(self, features, legal):
+        """Returns: ((N, edges) logits, -inf on illegal edges, (N,) values)"""
+        weights = self.weights
+        hidden = np.maximum(features @ weights['w1'] + weights['b1'], 0)
+        logits = np.where(legal, hidden @ weights['wp'], -np.inf)
+        values = np.tanh(hidden.mean(axis=1) @ weights['wv'] + weights['bv'][0])
+        return logits, values
+
+    def gradients(self, features, legal, targets, outcomes, value_weight=1.0):
+        """Cross entropy of the target moves plus value_weight times the
+        squared error of the values, averaged over the positions.
+        Returns: (loss, gradient of each weight)
+        """
+        weights = self.weights
+        count, edge_count, _ = features.shape
+        rows = np.arange(count)
+        before = features @ weights['w1'] + weights['b1']
+        hidden = np.maximum(before, 0)
+        logits = np.where(legal, hidden @ weights['wp'], -np.inf)
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        pooled = hidden.mean(axis=1)
+        values = np.tanh(pooled @ weights['wv'] + weights['bv'][0])
+        loss = (-np.log(probabilities[rows, targets] + 1e-12).mean()
+            + value_weight * ((values - outcomes) ** 2).mean())
+        # back propagation
+        d_logits = probabilities
+        d_logits[rows, targets] -= 1
+        d_logits /= count
+        d_value = value_weight * 2 * (values - outcomes) / count * (1 - values ** 2)
+        d_hidden = d_logits[:, :, None] * weights['wp'] + (d_value[:, None] * weights['wv'])[:, None, :] / edge_count
+        d_before = d_hidden * (before > 0)
+        grads = {'w1': np.tensordot(features, d_before, axes=([0, 1], [0, 1])),
+            'b1': d_before.sum(axis=(0, 1)),
+            'wp': np.tensordot(hidden, d_logits, axes=([0, 1], [0, 1])),
+            'wv': pooled.T @ d_value,
+            'bv': np.array([d_value.sum()], dtype=np.float32)}
+        return loss, grads
+
+class Adam:
+    """Adam optimizer updating the network's weights in place."""
+    def __init__(self, network, rate=0.003, beta1=0.9, beta2=0.999):
+        self._network = network
+        self._rate, self._beta1, self._beta2 = rate, beta1, beta2
+        self._first = {name: np.zeros_like(value) for name, value in network.weights.items()}
+        self._second = {name: np.zeros_like(value) for name, value in network.weights.items()}
+        self._steps = 0
+
+    def step(self, grads):
+        self._steps += 1
+        for name, grad in grads.items():
+            self._first[name] = self._beta1 * self._first[name] + (1 - self._beta1) * grad
+            self._second[name] = self._beta2 * self._second[name] + (1 - self._beta2) * grad ** 2
+            first = self._first[name] / (1 - self._beta1 ** self._steps)
+            second = self._second[name] / (1 - self._beta2 ** self._steps)
+            self._network.weights[name] -= (self._rate * first / (np.sqrt(second) + 1e-8)).astype(np.float32)
+
+def examples(records, skip=0):
+    """Training positions of self-play records, the first skip moves of each
+    game (the random opening) left out.
+    Returns: {(cols, rows): (taken, margins, targets, outcomes)} arrays
+    """
+    grouped = {}
+    for record in records:
+        cols, rows = record['cols'], record['rows']
+        shape = geometry(cols, rows)
+        final = record['score'][0] - record['score'][1]
+        taken = np.zeros(shape.edge_count, dtype=bool)
+        player_one_turn, margin = True, 0
+        group = grouped.setdefault((cols, rows), ([], [], [], []))
+        for ply, move in enumerate(record['moves']):
+            sign = 1 if player_one_turn else -1
+            if ply >= skip:
+                group[0].append(taken.copy())
+                group[1].append(sign * margin)
+                group[2].append(move)
+                group[3].append(sign * final / shape.box_count)
+            taken[move] = True
+            gained = sum(1 for box in shape.edge_boxes[move] if all(taken[edge] for edge in shape.box_edges[box]))
+            margin += sign * gained
+            if not gained:
+                player_one_turn = not player_one_turn
+    return {size: (np.array(group[0]), np.array(group[1]), np.array(group[2]), np.array(group[3], dtype=np.float32))
+        for size, group in grouped.items() if group[0]}
+
+def train(network, grouped, epochs=10, batch_size=256, rate=0.003, seed=0, report=None):
+    """Trains the network on the examples of each board size in shuffled
+    minibatches. report(epoch, mean loss) is called after every epoch.
+    """
+    rng = np.random.default_rng(seed)
+    optimizer = Adam(network, rate)
+    encoded = []
+    for (cols, rows), (taken, margins, targets, outcomes) in grouped.items():
+        encoder = Encoder(cols, rows)
+        encoded.append((encoder.encode(taken, margins), ~taken, targets, outcomes))
+    for epoch in range(epochs):
+        losses, batches = [], []
+        for index, (features, _, _, _) in enumerate(encoded):
+            order = rng.permutation(len(features))
+            batches.extend((index, order[start:start + batch_size]) for start in range(0, len(order), batch_size))
+        for position in rng.permutation(len(batches)):
+            index, chosen = batches[position]
+            features, legal, targets, outcomes = encoded[index]
+            loss, grads = network.gradients(features[chosen], legal[chosen], targets[chosen], outcomes[chosen])
+            optimizer.step(grads)
+            losses.append(loss)
+        if report is not None:
+            report(epoch, float(np.mean(losses)))
+
+def batch_moves(network, batch):
+    """Batched inference: the network's move in every position of a
+    BatchBoard (see batch.py), for the player to move in each.
+    Returns: (N,) edge indices, -1 for finished positions
+    """
+    encoder = Encoder(batch.cols, batch.rows)
+    margins = np.where(batch.player_one_turn, 1, -1) * batch.advantage()
+    logits, _ = network.forward(encoder.encode(batch.edges, margins), ~batch.edges)
+    moves = logits.argmax(axis=1)
+    moves[batch.game_over()] = -1
+    return moves
+
+class LearnedComputer:
+    """
+    Bot playing the network's most likely move. It plays as player two unless
+    player_one is set. Offers the interface of Computer used by
+    BackgroundComputer and the Controller.
+    """
+    def __init__(self, backend, network, player_one=False):
+        self._backend = backend
+        self._network = network
+        self._player_one = player_one
+        # moves take no think time
+        self._think_ms = None
+        self._encoder = Encoder(backend.columns, backend.rows)
+        self._edges = geometry(backend.columns, backend.rows).edges
+        self.last_stats = None
+        self.metrics = None
+
+    def with_backend(self, backend):
+        """Returns: Copy of the bot playing on backend instead (a board of the same size)"""
+        computer = copy.copy(self)
+        computer._backend = backend
+        computer.last_stats = None
+        return computer
+
+    def stop(self):
+        """Moves take a single forward pass, so there is nothing to stop"""
+
+    def move(self):
+        """Chooses an edge (see choose_move) and plays it.
+        Returns: Whether a box was aquired due to the move
+        """
+        row, col = self.choose_move()
+        return self._backend.move(row, col, self._player_one)
+
+    def choose_move(self, ponder=False):
+        """Returns: The network's most likely free edge for the computer.
+        last_stats holds the elapsed time and the predicted final advantage.
+        """
+        start = time.perf_counter()
+        edge, value = self._predict(self._player_one)
+        self.last_stats = SearchStats(0, 1, time.perf_counter() - start, value)
+        return edge
+
+    def expected_reply(self):
+        """Returns: The network's most likely move for the opponent, or None"""
+        if self._backend.game_over():
+            return None
+        return self._predict(not self._player_one)[0]
+
+    def _predict(self, player_one):
+        """Returns: (most likely edge, predicted final score difference) for the player"""
+        backend = self._backend
+        taken = self._encoder.taken_of(backend)[None, :]
+        margin = backend.player_one_score - backend.player_two_score
+        if not player_one:
+            margin = -margin
+        logits, values = self._network.forward(self._encoder.encode(taken, [margin]), ~taken)
+        return self._edges[int(logits[0].argmax())], float(values[0]) * self._encoder.box_count
+
+def agent(backend, player_one, options):
+    """Agent factory for selfplay.py ("src.learning:agent"), loading the
+    weights from options['model'] or the books directory
+    """
+    return LearnedComputer(backend, PolicyValueNet.load(options.get('model') or default_path()), player_one)
+
+def win_rate(network, cols, rows, games, seed=0):
+    """Returns: Share of games won by the network moving first against random moves"""
+    from .batch import BatchBoard
+    batch = BatchBoard(cols, rows, games)
+    rng = np.random.default_rng(seed)
+    while not batch.game_over().all():
+        moves = np.where(batch.player_one_turn, batch_moves(network, batch), batch.random_moves(rng))
+        moves[batch.game_over()] = -1
+        batch.move(moves)
+    return float((batch.advantage() > 0).mean())
+
+def main():
+    parser = argparse.ArgumentParser("Trains the learned bot's network on self-play records.")
+    parser.add_argument('--data', dest='data', nargs='+', default=['games.jsonl'],
+        help="JSON lines self-play records (see src/selfplay.py)")
+    parser.add_argument('--out', dest='out', default=None, help="weights file (books/policy.npz if not present)")
+    parser.add_argument('--epochs', dest='epochs', default=10, type=int, help="passes over the positions")
+    parser.add_argument('--batch', dest='batch', default=256, type=int, help="positions per gradient step")
+    parser.add_argument('--rate', dest='rate', default=0.003, type=float, help="learning rate")
+    parser.add_argument('--skip', dest='skip', default=4, type=int,
+        help="moves left out at the start of each game (selfplay's random opening)")
+    parser.add_argument('--resume', dest='resume', action='store_true', help="start from the weights in --out")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the weights and batches")
+    args = parser.parse_args()
+    out = args.out or default_path()
+    records = []
+    for path in args.data:
+        with open(path) as data:
+            records.extend(json.loads(line) for line in data if line.strip())
+    grouped = examples(records, args.skip)
+    print("{} games, {} positions".format(len(records), sum(len(group[0]) for group in grouped.values())))
+    network = PolicyValueNet.load(out) if args.resume else PolicyValueNet.initial(seed=args.seed)
+    train(network, grouped, args.epochs, args.batch, args.rate, args.seed,
+        lambda epoch, loss: print("epoch {:<3} loss {:.4f}".format(epoch, loss), flush=True))
+    network.save(out)
+    for cols, rows in grouped:
+        print("{}x{} wins against random moves {:.0%}".format(rows, cols, win_rate(network, cols, rows, 200)))
+    print("--> {}".format(out))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo tree search bot for boards too large for the alpha beta search.
+
+Each iteration walks down the tree by UCB1, expands one untried move and
+finishes the game with a playout on the edge bitmask (no board object):
+    heuristic --> complete a box if possible, else play a random move that
+                  gives no box a third side, else a random move
+    random    --> random moves
+The playout's result (win, draw or loss for player one) is added to every
+node on the path; each node stores it from player one's side, and its parent
+reads it from the side of the player moving there, as turns do not alternate
+when a box is completed. The most visited move is played. The tree below the
+position reached after the opponent's reply is kept for the next move.
+Untried moves are expanded in the order the heuristic playout prefers them. With
+several workers, each process grows its own tree from the position and the
+root visit counts are summed (root parallelization).
+"""
+
+from .computer import SearchStats
+from .encoding import to_bytes, from_bytes
+from .geometry import geometry
+from .solver import edges_of
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import math
+import random
+import time
+
+# exploration constant of UCB1
+EXPLORATION = math.sqrt(2)
+
+class _Node:
+    __slots__ = ('move', 'player_one', 'children', 'untried', 'visits', 'wins', 'margin')
+
+    def __init__(self, move, player_one, untried):
+        # edge index leading to the node and whether player one moves next
+        self.move = move
+        self.player_one = player_one
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        # player one's wins (draws count half) and summed final score difference
+        self.wins = 0.0
+        self.margin = 0
+
+class _Tree:
+    """Tree kept between moves, shared by the copies made by with_backend."""
+    def __init__(self):
+        self.root = None
+        # edges and player one's score minus player two's of the root's position
+        self.edges = None
+        self.score = None
+
+def _search_worker(state, player_one, playouts, deadline, seed, policy):
+    """Grows a tree in a worker process.
+    Returns: (move, visits, wins, margin) of each root child and the playouts run
+    """
+    computer = MctsComputer(from_bytes(state), playouts=playouts, player_one=player_one, seed=seed, policy=policy)
+    root, count, _ = computer._grow(None, deadline, playouts)
+    return [(child.move, child.visits, child.wins, child.margin) for child in root.children], count
+
+class MctsComputer:
+    """
+    Bot choosing moves by Monte Carlo tree search within a budget of playouts
+    or of think time (think_ms takes precedence). It plays as player two
+    unless player_one is set.
+    """
+    def __init__(self, backend, playouts=2000, think_ms=None, player_one=False, workers=1, seed=None,
+        policy='heuristic'):
+        self._backend = backend
+        self._playouts = playouts
+        self._think_ms = think_ms
+        self._player_one = player_one
+        self._workers = workers
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._policy = policy
+        shape = geometry(backend.columns, backend.rows)
+        self._edges = shape.edges
+        self._full_mask = shape.full_mask
+        self._box_masks = shape.box_masks
+        self._box_edges = shape.box_edges
+        self._edge_boxes = shape.edge_boxes
+        self._pool = ProcessPoolExecutor(workers) if workers > 1 else None
+        self._tree = _Tree()
+        self._stopped = False
+        self.last_stats = None
+        self.metrics = None
+
+    def close(self):
+        """Shuts down the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    def with_backend(self, backend):
+        """Returns: Copy of the bot searching backend instead (a board of the same size)"""
+        computer = copy.copy(self)
+        computer._backend = backend
+        computer._rng = random.Random(self._rng.random())
+        computer._stopped = False
+        computer.last_stats = None
+        return computer
+
+    def stop(self):
+        """Ends a running search from another thread; the tree so far is used"""
+        self._stopped = True
+
+    def move(self):
+        """Chooses an edge (see choose_move) and plays it.
+        Returns: Whether a box was aquired due to the move
+        """
+        row, col = self.choose_move()
+        return self._backend.move(row, col, self._player_one)
+
+    def choose_move(self, ponder=False):
+        """Searches the position within the budget and returns the most visited
+        move. When pondering, the search runs until stop is called (or the
+        playout budget is used up without a think time).
+        Statistics of the search are stored in last_stats.
+        """
+        start = time.perf_counter()
+        edges = edges_of(self._backend)
+        score = self._backend.player_one_score - self._backend.player_two_score
+        deadline = start + self._think_ms / 1000 if self._think_ms is not None else None
+        budget = self._playouts if self._think_ms is None else None
+        if ponder:
+            deadline = None
+        if self._pool is not None and not ponder:
+            children, count = self._grow_parallel(deadline, budget)
+            depth = 1
+        else:
+            root, count, depth = self._grow(self._reused_root(edges, self._player_one, score), deadline, budget)
+            children = [(child.move, child.visits, child.wins, child.margin) for child in root.children]
+        # stop ends the running search (or the next one to start), not the ones after it
+        self._stopped = False
+        move, visits, _, margin = max(children, key=lambda child: child[1])
+        self._tree.edges = edges
+        self._tree.score = score
+        advantage = margin / visits if self._player_one else -margin / visits
+        self.last_stats = SearchStats(depth, count, time.perf_counter() - start, advantage)
+        return self._edges[move]
+
+    def expected_reply(self):
+        """Predicts the opponent's move in the current position (opponent to
+        move) from the tree of the previous search, or a random free edge.
+        """
+        score = self._backend.player_one_score - self._backend.player_two_score
+        root = self._reused_root(edges_of(self._backend), not self._player_one, score)
+        if root is not None and root.children:
+            return self._edges[max(root.children, key=lambda child: child.visits).move]
+        free = self._backend.legal_moves()
+        return self._rng.choice(free) if free else None
+
+    def _reused_root(self, edges, player_one, score):
+        """Returns: Node of the kept tree for the position with the edges, the
+        player to move and player one's score minus player two's, or None.
+        Boxes completed since the tree's root make the order of the moves
+        played matter, so the orders found in the tree are tried.
+        """
+        if self._tree.root is None or self._tree.edges & ~edges:
+            return None
+        return self._descend(self._tree.root, self._tree.edges, self._tree.score, edges, player_one, score)
+
+    def _descend(self, node, node_edges, node_score, edges, player_one, score):
+        if node_edges == edges:
+            return node if node.player_one == player_one and node_score == score else None
+        played = edges & ~node_edges
+        for child in node.children:
+            if played >> child.move & 1:
+                following, gained = self._play(node_edges, child.move)
+                found = self._descend(child, following, node_score + (gained if node.player_one else -gained),
+                    edges, player_one, score)
+                if found is not None:
+                    return found
+        return None
+
+    def _new_node(self, move, player_one, edges):
+        """Node whose untried moves are expanded (popped) in the playout policy's
+        order: boxes completed first, then edges giving no box a third side,
+        then the rest, each group shuffled.
+        """
+        free = self._full_mask ^ edges
+        groups = ([], [], [])
+        for edge in range(len(self._edges)):
+            if free >> edge & 1:
+                sides = [(edges & self._box_masks[box]).bit_count() for box in self._edge_boxes[edge]]
+                groups[0 if 3 in sides else 1 if all(taken < 2 for taken in sides) else 2].append(edge)
+        untried = []
+        for group in reversed(groups):
+            self._rng.shuffle(group)
+            untried.extend(group)
+        return _Node(move, player_one, untried)
+
+    def _grow(self, root, deadline, budget):
+        """Runs iterations on the tree (a new one if root is None) from the
+        current position until the budget or deadline is used up or the search
+        is stopped.
+        Returns: (root, iterations run, deepest path)
+        """
+        backend = self._backend
+        edges = edges_of(backend)
+        score = backend.player_one_score - backend.player_two_score
+        player_one = self._player_one
+        if root is None:
+            root = self._new_node(None, player_one, edges)
+        self._tree.root = root
+        count, deepest = 0, 0
+        # a playout costs far more than reading the clock, so the deadline is checked every iteration
+        while not self._stopped and (budget is None or count < budget) and (
+            deadline is None or time.perf_counter() < deadline):
+            depth = self._iterate(root, edges, score)
+            deepest = max(deepest, depth)
+            count += 1
+            # a finished position has nothing to search
+            if not root.untried and not root.children:
+                break
+        return root, count, deepest
+
+    def _iterate(self, root, edges, score):
+        """One selection, expansion, playout and backpropagation.
+        Returns: Length of the path from the root
+        """
+        node = root
+        path = [root]
+        # selection
+        while not node.untried and node.children:
+            parent = node
+            log_visits = math.log(parent.visits)
+            best, node = None, None
+            for child in parent.children:
+                wins = child.wins / child.visits
+                if not parent.player_one:
+                    wins = 1 - wins
+                value = wins + EXPLORATION * math.sqrt(log_visits / child.visits)
+                if best is None or value > best:
+                    best, node = value, child
+            edges, gained = self._play(edges, node.move)
+            score += gained if parent.player_one else -gained
+            path.append(node)
+        # expansion
+        if node.untried:
+            move = node.untried.pop()
+            edges, gained = self._play(edges, move)
+            score += gained if node.player_one else -gained
+            child = self._new_node(move, node.player_one if gained else not node.player_one, edges)
+            node.children.append(child)
+            node = child
+            path.append(node)
+        # playout and backpropagation
+        margin = score + self._playout(edges, node.player_one)
+        wins = 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+        for visited in path:
+            visited.visits += 1
+            visited.wins += wins
+            visited.margin += margin
+        return len(path) - 1
+
+    def _play(self, edges, move):
+        """Returns: (edges after the move, boxes it completes)"""
+        edges |= 1 << move
+        gained = 0
+        for box in self._edge_boxes[move]:
+            if edges & self._box_masks[box] == self._box_masks[box]:
+                gained += 1
+        return edges, gained
+
+    def _playout(self, edges, player_one):
+        """Finishes the game from the position with random or heuristic moves.
+        Returns: Boxes won by player one minus boxes won by player two
+        """
+        box_masks, box_edges, edge_boxes = self._box_masks, self._box_edges, self._edge_boxes
+        sides = [(edges & box_mask).bit_count() for box_mask in box_masks]
+        free = self._full_mask ^ edges
+        order = [edge for edge in range(len(self._edges)) if free >> edge & 1]
+        self._rng.shuffle(order)
+        heuristic = self._policy == 'heuristic'
+        capturable = [box for box, taken in enumerate(sides) if taken == 3] if heuristic else []
+        # edges skipped by a cursor stay taken or unsafe, as sides only grow
+        safe_cursor = any_cursor = 0
+        margin = 0
+        for _ in range(len(order)):
+            move = None
+            while capturable and move is None:
+                box = capturable.pop()
+                if sides[box] == 3:
+                    move = next(edge for edge in box_edges[box] if not edges >> edge & 1)
+            while move is None and heuristic and safe_cursor < len(order):
+                edge = order[safe_cursor]
+                safe_cursor += 1
+                if not edges >> edge & 1 and all(sides[box] < 2 for box in edge_boxes[edge]):
+                    move = edge
+            if move is None:
+                while edges >> order[any_cursor] & 1:
+                    any_cursor += 1
+                move = order[any_cursor]
+            edges |= 1 << move
+            gained = 0
+            for box in edge_boxes[move]:
+                sides[box] += 1
+                if sides[box] == 4:
+                    gained += 1
+                elif sides[box] == 3 and heuristic:
+                    capturable.append(box)
+            if gained:
+                margin += gained if player_one else -gained
+            else:
+                player_one = not player_one
+        return margin
+
+    def _grow_parallel(self, deadline, budget):
+        """Grows one tree per worker and sums their root children.
+        Returns: (merged (move, visits, wins, margin) of the root children, playouts run)
+        """
+        state = to_bytes(self._backend)
+        share = None if budget is None else -(-budget // self._workers)
+        futures = [self._pool.submit(_search_worker, state, self._player_one, share, deadline,
+            self._rng.getrandbits(32), self._policy) for _ in range(self._workers)]
+        merged, count = {}, 0
+        for future in futures:
+            children, playouts = future.result()
+            count += playouts
+            for move, visits, wins, margin in children:
+                total = merged.get(move, (0, 0.0, 0))
+                merged[move] = (total[0] + visits, total[1] + wins, total[2] + margin)
+        self._tree.root = None
+        return [(move,) + total for move, total in merged.items()], count
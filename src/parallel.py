@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Root-parallel search across worker processes.
+
+The root moves are split across a ProcessPoolExecutor. Each task receives the
+position in its compact binary encoding (see encoding.py), plays its root move and
+searches the reply with the shared lower bound (alpha) as its window, so moves
+searched later are pruned against the best move found so far by any worker.
+Workers keep their transposition table between tasks. stop reaches them
+through a shared event, which their searches check like Computer's stop flag.
+"""
+
+from .computer import Computer, _SearchTimeout
+from .encoding import to_bytes, from_bytes
+from .evaluation import ChainEvaluator
+from .transposition import TranspositionTable
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+# per process state set up by _init_worker
+_shared_alpha = None
+_worker_table = None
+_stop_event = None
+
+class _StopFlag:
+    """Stop flag of a worker's Computer, true once the shared event is set"""
+    def __init__(self, event):
+        self._event = event
+
+    def __bool__(self):
+        return self._event.is_set()
+
+def _init_worker(shared_alpha, table_entries, stop_event):
+    global _shared_alpha, _worker_table, _stop_event
+    _shared_alpha = shared_alpha
+    _worker_table = TranspositionTable(table_entries)
+    _stop_event = stop_event
+
+def _search_root_move(state, row, col, depth, deadline, player_one, evaluator, quiescence):
+    """Plays the root move for the computer and searches the reply.
+    Returns: (advantage, alpha used, nodes) or (None, None, nodes) on timeout
+    """
+    board = from_bytes(state)
+    computer = Computer(board, _worker_table, player_one=player_one, evaluator=evaluator, quiescence=quiescence)
+    _worker_table.new_search()
+    same_turn = board.move(row, col, player_one)
+    computer._start_search()
+    computer._deadline = deadline
+    computer._stopped = _StopFlag(_stop_event)
+    alpha = _shared_alpha.value
+    try:
+        # box aquired --> maximizer; else --> minimizer
+        advantage, _ = computer._alpha_beta_minimax(depth - 1, same_turn, alpha, float('inf'))
+    except _SearchTimeout:
+        return None, None, computer._nodes
+    with _shared_alpha.get_lock():
+        if advantage > _shared_alpha.value:
+            _shared_alpha.value = advantage
+    return advantage, alpha, computer._nodes
+
+class ParallelComputer(Computer):
+    """Computer whose root moves are searched by a pool of worker processes."""
+    def __init__(self, backend, workers, table=None, think_ms=None, table_entries=1 << 18, player_one=False,
+        book=None, instrument=False, solved=None, evaluator=ChainEvaluator, quiescence=True):
+        super().__init__(backend, table, think_ms, player_one, book=book, instrument=instrument, solved=solved,
+            evaluator=evaluator, quiescence=quiescence)
+        self._shared_alpha = multiprocessing.Value('d', float('-inf'))
+        self._stop_event = multiprocessing.Event()
+        self._pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+            initargs=(self._shared_alpha, table_entries, self._stop_event))
+
+    def close(self):
+        """Shuts down the worker processes"""
+        self._pool.shutdown(cancel_futures=True)
+
+    def stop(self):
+        """Ends the running search (or the next one), in the workers too"""
+        super().stop()
+        self._stop_event.set()
+
+    def choose_move(self, ponder=False):
+        try:
+            return super().choose_move(ponder)
+        finally:
+            self._stop_event.clear()
+
+    def _root_search(self, depth, first_move):
+        """Searches each root move in a worker.
+        A result above the alpha its worker started with is exact; the best
+        exact result is chosen, ties going to the earlier ordered move.
+        """
+        state = to_bytes(self._backend)
+        self._shared_alpha.value = float('-inf')
+        moves = self._ordered_moves(first_move)
+        futures = [self._pool.submit(_search_root_move, state, row, col, depth, self._deadline, self._player_one,
+            self._evaluation, self._quiescence) for row, col in moves]
+        optimal_advantage, optimal_move, timed_out = float('-inf'), None, False
+        for move, future in zip(moves, futures):
+            if future.cancelled():
+                continue
+            advantage, alpha, nodes = future.result()
+            self._nodes += nodes
+            if advantage is None:
+                if not timed_out:
+                    # the moves not started yet would give up at once
+                    for pending in futures:
+                        pending.cancel()
+                timed_out = True
+            elif (advantage > alpha or alpha == float('-inf')) and advantage > optimal_advantage:
+                optimal_advantage, optimal_move = advantage, move
+        if timed_out:
+            raise _SearchTimeout()
+        return optimal_advantage, optimal_move
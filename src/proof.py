@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Proof-number search deciding whether the computer wins, draws or loses.
+
+The search proves or disproves a goal, that the computer's final box advantage
+reaches a threshold, without valuing positions by how many boxes they are
+worth. It grows a game tree one node at a time, always expanding the node that
+is cheapest to settle. Every node keeps its proof number (the leaves still to
+be proven to prove it) and its disproof number (likewise to disprove it):
+    computer to move (OR)  --> proven by one child, disproven by all of them
+    opponent to move (AND) --> proven by all children, disproven by one
+Nodes are settled as they are created, without search, when
+    the boxes left cannot change the outcome,
+    at most oracle_edges edges are free (the exact solver, see solver.py), or
+    no safe edge is left and the position is a simple chain and loop endgame
+    (see endgame.py),
+and an unsettled node starts with one leaf to settle for its own player and
+one per free edge for the other. Move orders reaching the same edges with the
+same mover and advantage share their node, so the tree is a directed acyclic
+graph; the numbers of a node are refreshed when a later expansion passes
+through it, and the numbers of a node settled by all of its children are
+weak sums (see _weak_sum), which do not count shared descendants twice.
+A box whose edge gives no other box a third side is taken without trying the
+other moves: it keeps the turn and hands nothing over.
+decide proves a win (advantage of at least 1) and then, on boards with an even
+number of boxes, a draw (at least 0). The tree follows the board through push
+and pop, so the board is back in its position after every expansion.
+"""
+
+from . import endgame
+from .evaluation import ScoreEvaluator
+from .geometry import geometry
+from .solver import solver, edges_of
+import time
+
+# outcomes for the computer
+WIN, DRAW, LOSS = 1, 0, -1
+
+# nodes the search may create before giving up (about 350 bytes each)
+NODE_LIMIT = 500000
+
+_INFINITY = 1 << 62
+
+class _Node:
+    __slots__ = ('proof', 'disproof', 'maximizer', 'moves', 'children')
+
+    def __init__(self, maximizer):
+        self.proof = 1
+        self.disproof = 1
+        # whether the computer is to move
+        self.maximizer = maximizer
+        # moves to the children, once expanded
+        self.moves = None
+        self.children = None
+
+class ProofSearch:
+    """Proof-number search of the backend's position with the computer
+    (player one if player_one) to move. The search gives up once it created
+    node_limit nodes, the deadline (a time.perf_counter value) passes or
+    stopped() returns True.
+    """
+    def __init__(self, backend, player_one, oracle_edges, node_limit=NODE_LIMIT, deadline=None, stopped=None):
+        self._backend = backend
+        self._player_one = player_one
+        self._oracle_edges = oracle_edges
+        self._node_limit = node_limit
+        self._deadline = deadline
+        self._stopped = stopped
+        self._solver = solver(backend.columns, backend.rows)
+        self._evaluator = ScoreEvaluator(backend.columns, backend.rows)
+        shape = geometry(backend.columns, backend.rows)
+        self._edge_index, self._edge_boxes = shape.edge_index, shape.edge_boxes
+        self._boxes = backend.columns * backend.rows
+        self._threshold = 0
+        # (edges, whether the computer is to move, advantage) --> node
+        self._nodes = {}
+        # nodes created by the searches so far
+        self.nodes = 0
+
+    def decide(self):
+        """Returns: (WIN, DRAW or LOSS, move reaching the outcome or None for a
+        loss), or None if the search gave up
+        """
+        proven, move = self.prove(1)
+        if proven is None:
+            return None
+        if proven:
+            return WIN, move
+        # the final advantage has the parity of the number of boxes
+        if self._boxes % 2:
+            return LOSS, None
+        proven, move = self.prove(0)
+        if proven is None:
+            return None
+        return (DRAW, move) if proven else (LOSS, None)
+
+    def prove(self, threshold):
+        """Searches whether the computer's final advantage reaches threshold.
+        Returns: (True, proving move), (False, None) or (None, None) if the search gave up
+        """
+        self._threshold = threshold
+        self._evaluator.reset(self._backend)
+        self._nodes = {}
+        root = _Node(True)
+        self._expand(root)
+        while root.proof and root.disproof:
+            if (self.nodes >= self._node_limit
+                or self._deadline is not None and time.perf_counter() > self._deadline
+                or self._stopped is not None and self._stopped()):
+                return None, None
+            self._grow(root)
+        self._nodes = {}
+        if root.proof:
+            return False, None
+        return True, next(move for move, child in zip(root.moves, root.children) if not child.proof)
+
+    def _grow(self, root):
+        """Expands the most proving node and updates the numbers on its path"""
+        backend, evaluator = self._backend, self._evaluator
+        path = [root]
+        node = root
+        # a node reached through another parent may be settled already
+        while node.children is not None and node.proof and node.disproof:
+            parent = node
+            numbers = [child.proof if parent.maximizer else child.disproof for child in parent.children]
+            index = numbers.index(min(numbers))
+            node = parent.children[index]
+            row, col = parent.moves[index]
+            backend.push(row, col, self._player_one if parent.maximizer else not self._player_one)
+            evaluator.move(row, col)
+            path.append(node)
+        if node.children is None and node.proof and node.disproof:
+            self._expand(node)
+        for node in reversed(path[:-1]):
+            _update(node)
+            row, col = backend.pop()
+            evaluator.revert(row, col)
+
+    def _expand(self, node):
+        """Creates and settles the children of the node, stopping at the first
+        one that settles the node
+        """
+        backend, evaluator = self._backend, self._evaluator
+        player_one_turn = self._player_one if node.maximizer else not self._player_one
+        node.moves, node.children = [], []
+        for row, col in self._ordered_moves():
+            same_turn = backend.push(row, col, player_one_turn)
+            evaluator.move(row, col)
+            maximizer = node.maximizer if same_turn else not node.maximizer
+            key = (evaluator.edges, maximizer, self._advantage())
+            child = self._nodes.get(key)
+            if child is None:
+                child = _Node(maximizer)
+                self._settle(child)
+                self._nodes[key] = child
+                self.nodes += 1
+            backend.pop()
+            evaluator.revert(row, col)
+            node.moves.append((row, col))
+            node.children.append(child)
+            if not (child.proof if node.maximizer else child.disproof):
+                break
+        _update(node)
+
+    def _ordered_moves(self):
+        """Free edges: moves that complete a box, then safe moves, then sacrifices"""
+        sides, edge_boxes, edge_index = self._evaluator.sides, self._edge_boxes, self._edge_index
+        captures, safe, sacrifices = [], [], []
+        for edge in self._backend.legal_moves():
+            boxes = edge_boxes[edge_index[edge]]
+            most_sides = max(sides[box] for box in boxes)
+            if most_sides == 3:
+                # taking the box opens nothing, so it is as good as any move
+                if all(sides[box] != 2 for box in boxes):
+                    return [edge]
+                captures.append(edge)
+            elif most_sides == 2:
+                sacrifices.append(edge)
+            else:
+                safe.append(edge)
+        return captures + safe + sacrifices
+
+    def _advantage(self):
+        advantage = self._backend.player_two_score - self._backend.player_one_score
+        return -advantage if self._player_one else advantage
+
+    def _settle(self, node):
+        """Sets the numbers of a new node in the backend's position"""
+        backend = self._backend
+        advantage = self._advantage()
+        left = self._boxes - backend.player_one_score - backend.player_two_score
+        if advantage - left >= self._threshold:
+            node.proof, node.disproof = 0, _INFINITY
+            return
+        if advantage + left < self._threshold:
+            node.proof, node.disproof = _INFINITY, 0
+            return
+        value = None
+        if backend.edges_remaining <= self._oracle_edges:
+            value = self._solver.value(edges_of(backend))
+        elif not self._evaluator.safe:
+            solved = endgame.analyse(backend)
+            if solved is not None:
+                value = solved.value
+        if value is not None:
+            if (advantage + value if node.maximizer else advantage - value) >= self._threshold:
+                node.proof, node.disproof = 0, _INFINITY
+            else:
+                node.proof, node.disproof = _INFINITY, 0
+        elif node.maximizer:
+            node.disproof = backend.edges_remaining
+        else:
+            node.proof = backend.edges_remaining
+
+def _update(node):
+    """Sets the numbers of an expanded node from its children"""
+    if node.maximizer:
+        node.proof = min(child.proof for child in node.children)
+        node.disproof = _weak_sum([child.disproof for child in node.children])
+    else:
+        node.proof = _weak_sum([child.proof for child in node.children])
+        node.disproof = min(child.disproof for child in node.children)
+
+def _weak_sum(numbers):
+    """Leaves to settle every child: the largest number plus one per other
+    child still to settle, as children share descendants and a sum would
+    count them again
+    """
+    unsettled = [number for number in numbers if number]
+    if not unsettled:
+        return 0
+    return min(_INFINITY, max(unsettled) + len(unsettled) - 1)
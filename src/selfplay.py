@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Headless bot versus bot games for evaluating bots and generating training data.
+
+Games run without a Gui across worker processes, and each finished game is
+appended to the output file as one JSON line:
+    {"cols": 5, "rows": 4, "seed": 0, "players": ["computer", "random"],
+     "moves": [edge indices], "ms": [milliseconds per move], "score": [3, 17]}
+or, with the binary format, as a game record (see encoding.py) holding only
+the moves. Edge indices follow geometry.py. Run from the root directory:
+    python3 -m src.selfplay --games 100 --workers 4 --out games.jsonl
+
+An agent is any factory called as factory(backend, player_one, options) that
+returns an object whose choose_move() returns a free (row, col) edge. Built in
+agents are named in AGENTS; others are given as "package.module:factory".
+"""
+
+from .bitboard import BitBoard
+from .computer import Computer
+from .encoding import GameRecordWriter
+from .mcts import MctsComputer
+from .geometry import geometry
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+
+class RandomAgent:
+    """Plays a uniformly random free edge."""
+    def __init__(self, backend, player_one, options):
+        self._backend = backend
+        self._random = random.Random(options.get('seed'))
+
+    def choose_move(self):
+        """Returns: Random free edge"""
+        return self._random.choice(sorted(self._backend.legal_moves()))
+
+def _computer(backend, player_one, options):
+    return Computer(backend, think_ms=options.get('think_ms'), player_one=player_one)
+
+def _mcts(backend, player_one, options):
+    return MctsComputer(backend, think_ms=options.get('think_ms'), player_one=player_one, seed=options.get('seed'))
+
+AGENTS = {'computer': _computer, 'mcts': _mcts, 'random': RandomAgent}
+
+def load_agent(name):
+    """Agent factory by built in name or "package.module:factory" path"""
+    if name in AGENTS:
+        return AGENTS[name]
+    module, _, factory = name.partition(':')
+    return getattr(importlib.import_module(module), factory)
+
+def play_game(cols, rows, players, seed, opening_moves=0, think_ms=None):
+    """Plays one game between the named agents (player one first).
+    The first opening_moves moves are random so seeded games differ.
+    Returns: Game record (see the module docstring)
+    """
+    board = BitBoard(cols, rows)
+    edge_index = geometry(cols, rows).edge_index
+    opening = random.Random(seed)
+    agents = [load_agent(name)(board, player_one, {'seed': seed, 'think_ms': think_ms})
+        for name, player_one in zip(players, (True, False))]
+    moves, times = [], []
+    player_one_turn = True
+    while not board.game_over():
+        start = time.perf_counter()
+        if len(moves) < opening_moves:
+            row, col = opening.choice(sorted(board.legal_moves()))
+        else:
+            row, col = agents[0 if player_one_turn else 1].choose_move()
+        times.append(round((time.perf_counter() - start) * 1000, 3))
+        moves.append(edge_index[row, col])
+        if not board.move(row, col, player_one_turn):
+            player_one_turn = not player_one_turn
+    return {'cols': cols, 'rows': rows, 'seed': seed, 'players': list(players), 'moves': moves,
+        'ms': times, 'score': [board.player_one_score, board.player_two_score]}
+
+def run(games, workers, out, cols, rows, players, opening_moves=0, think_ms=None, first_seed=0,
+    binary=False):
+    """Plays the games across worker processes, appending each record to out
+    as it finishes. out is a text stream, or a binary stream if binary is set.
+    Returns: Games per second
+    """
+    writer = GameRecordWriter(out) if binary else None
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(play_game, cols, rows, players, seed, opening_moves, think_ms)
+            for seed in range(first_seed, first_seed + games)]
+        for future in as_completed(futures):
+            record = future.result()
+            if binary:
+                writer.write(record['cols'], record['rows'], record['moves'])
+            else:
+                out.write(json.dumps(record, separators=(',', ':')) + '\n')
+            out.flush()
+    return games / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser("Plays bots against each other without the GUI.")
+    parser.add_argument('--rows', dest='rows', default=4, type=int, help="number of rows on the board")
+    parser.add_argument('--cols', dest='cols', default=5, type=int, help="number of columns on the board")
+    parser.add_argument('--games', dest='games', default=100, type=int, help="number of games")
+    parser.add_argument('--workers', dest='workers', default=1, type=int, help="worker processes")
+    parser.add_argument('--out', dest='out', default='games.jsonl', help="file the game records are appended to")
+    parser.add_argument('--player-one', dest='player_one', default='computer', help="agent moving first")
+    parser.add_argument('--player-two', dest='player_two', default='computer', help="agent moving second")
+    parser.add_argument('--opening', dest='opening', default=4, type=int, help="random moves at the start")
+    parser.add_argument('--think-ms', dest='think_ms', default=100, type=int, help="computer think time per move")
+    parser.add_argument('--seed', dest='seed', default=0, type=int, help="seed of the first game")
+    parser.add_argument('--format', dest='format', default='jsonl', choices=['jsonl', 'binary'],
+        help="JSON lines with timing, or binary game records with moves only")
+    args = parser.parse_args()
+    binary = args.format == 'binary'
+    with open(args.out, 'ab' if binary else 'a') as out:
+        rate = run(args.games, args.workers, out, args.cols, args.rows, (args.player_one, args.player_two),
+            args.opening, args.think_ms, args.seed, binary)
+    print("{} games, {:.2f} games/s".format(args.games, rate), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
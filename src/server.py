@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Game server hosting many human versus bot games over asyncio.
+
+Clients connect over TCP or a Unix socket and exchange JSON lines. Each
+connection is a session owning one BitBoard, on which the client is player one
+and moves first:
+    {"op": "new", "cols": 5, "rows": 4, "bot": "computer"}
+        --> {"ok": true, "moves": [], "score": [0, 0], "over": false, "budget_ms": 30000}
+    {"op": "move", "edge": [row, col]}
+        --> {"ok": true, "moves": [[row, col], ...], "score": [0, 1], "over": false, "budget_ms": 29612}
+    {"op": "state"} --> the same fields for the current position, "moves" empty
+Errors are answered with {"ok": false, "error": "..."}. "moves" lists the
+bot's replies, several if it completed boxes. Edges are (row, col) pairs of the
+board matrix, bots are named as in selfplay.AGENTS.
+
+Bot moves run in a process pool of fixed size, one task per move, so a long
+search occupies one worker and the other sessions keep being served. Admission
+control bounds the sessions (further connections are refused), so at most one
+search per session is ever queued. Each game's bot has a time budget shared out
+over its remaining moves, and sessions idle for too long are closed. Run from
+the root directory:
+    python3 -m src --serve --port 8765 --workers 4
+"""
+
+from .bitboard import BitBoard
+from .encoding import to_bytes, from_bytes
+from .selfplay import AGENTS
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import json
+import multiprocessing
+import random
+import signal
+import time
+
+# largest board side accepted
+MAX_SIZE = 30
+# think time per move of the bot, and what it gets even once the game's budget is used up
+THINK_MS = 200
+MIN_THINK_MS = 10
+
+class ProtocolError(Exception):
+    """Request the server cannot serve; its message is sent to the client."""
+
+def _init_worker():
+    # Ctrl-C reaches the whole process group; the server shuts the workers down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _bot_move(state, bot, think_ms, seed):
+    """Searches the bot's move in a worker process.
+    Returns: (row, col, milliseconds spent searching)
+    """
+    backend = from_bytes(state)
+    agent = AGENTS[bot](backend, False, {'think_ms': think_ms, 'seed': seed})
+    start = time.perf_counter()
+    row, col = agent.choose_move()
+    return row, col, (time.perf_counter() - start) * 1000
+
+class _Session:
+    """Game of one connection; the client is player one."""
+    def __init__(self, cols, rows, bot, budget_ms, seed):
+        self.board = BitBoard(cols, rows)
+        self.bot = bot
+        self.budget_ms = budget_ms
+        self.seed = seed
+
+    def think_ms(self, limit):
+        """Think time of the bot's next move: the budget left split over the
+        bot's share of the remaining moves, at most limit and at least
+        MIN_THINK_MS.
+        """
+        moves_left = (self.board.edges_remaining + 1) // 2
+        return max(MIN_THINK_MS, min(limit, int(self.budget_ms / moves_left)))
+
+    def reply(self, moves):
+        return {'ok': True, 'moves': moves, 'score': [self.board.player_one_score, self.board.player_two_score],
+            'over': self.board.game_over(), 'budget_ms': round(self.budget_ms)}
+
+class GameServer:
+    """
+    Serves sessions (see the module docstring) with bot searches in a pool of
+    workers processes. At most max_games sessions are admitted at once; each
+    game's bot may spend budget_ms in total and at most think_ms per move.
+    """
+    def __init__(self, workers=2, max_games=64, think_ms=THINK_MS, budget_ms=30000, idle_s=300):
+        # workers are spawned rather than forked, so they do not inherit the open connections and keep
+        # them from closing
+        self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker)
+        self._max_games = max_games
+        self._think_ms = think_ms
+        self._budget_ms = budget_ms
+        self._idle_s = idle_s
+        self._seeds = random.Random()
+        self.sessions = 0
+
+    def close(self):
+        """Shuts down the worker processes"""
+        self._pool.shutdown(cancel_futures=True)
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """Listens on the Unix socket at path, or else on host and port.
+        Returns: asyncio.Server
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path=path)
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader, writer):
+        """Serves one connection until it closes or idles out"""
+        if self.sessions >= self._max_games:
+            await self._send(writer, {'ok': False, 'error': "server full"})
+            writer.close()
+            return
+        self.sessions += 1
+        session = None
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self._idle_s)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                try:
+                    session, response = await self._serve(session, line)
+                except ProtocolError as error:
+                    response = {'ok': False, 'error': str(error)}
+                await self._send(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def _serve(self, session, line):
+        """Returns: (session after the request, response)"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            raise ProtocolError("invalid JSON")
+        if not isinstance(request, dict):
+            raise ProtocolError("request must be an object")
+        op = request.get('op')
+        if op == 'new':
+            cols, rows, bot = request.get('cols', 5), request.get('rows', 4), request.get('bot', 'computer')
+            if not all(type(size) is int and 1 <= size <= MAX_SIZE for size in (cols, rows)):
+                raise ProtocolError("board sides must be 1 to {}".format(MAX_SIZE))
+            if bot not in AGENTS:
+                raise ProtocolError("unknown bot, expected one of " + ", ".join(sorted(AGENTS)))
+            session = _Session(cols, rows, bot, self._budget_ms, self._seeds.getrandbits(32))
+            return session, session.reply([])
+        if session is None:
+            raise ProtocolError("no game, send new first")
+        if op == 'state':
+            return session, session.reply([])
+        if op == 'move':
+            return session, session.reply(await self._play(session, request.get('edge')))
+        raise ProtocolError("unknown op")
+
+    async def _play(self, session, edge):
+        """Plays the client's move, then the bot's replies while it is to move.
+        Returns: The bot's moves
+        """
+        board = session.board
+        if board.game_over():
+            raise ProtocolError("game over")
+        try:
+            row, col = edge
+            legal = (row, col) in board.geometry.edge_index and not board.taken(row, col)
+        except (TypeError, ValueError):
+            legal = False
+        if not legal:
+            raise ProtocolError("illegal move")
+        moves = []
+        if board.move(row, col, True):
+            return moves
+        loop = asyncio.get_running_loop()
+        while not board.game_over():
+            row, col, elapsed = await loop.run_in_executor(self._pool, _bot_move, to_bytes(board), session.bot,
+                session.think_ms(self._think_ms), session.seed + board.edges_remaining)
+            session.budget_ms = max(0, session.budget_ms - elapsed)
+            moves.append([row, col])
+            if not board.move(row, col, False):
+                break
+        return moves
+
+    @staticmethod
+    async def _send(writer, response):
+        writer.write((json.dumps(response, separators=(',', ':')) + '\n').encode())
+        await writer.drain()
+
+async def serve(server, host='127.0.0.1', port=8765, path=None):
+    """Runs the server until it is cancelled"""
+    listener = await server.start(host, port, path)
+    async with listener:
+        await listener.serve_forever()
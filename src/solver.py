@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Exact values of positions by exhaustive search over edge bitmasks.
+
+The boxes still to be won from a position depend only on its edge set, so the
+value of a position is the net number of boxes the player to move wins from
+there on under perfect play:
+    value(full) = 0
+    value(edges) = max over free edges e of
+                   k + value(edges | e) if e completes k > 0 boxes
+                   -value(edges | e)    otherwise
+Solver memoizes this recursively and is used by the computer as an exact
+oracle once few edges remain. Boards with at most MAX_TABLE_EDGES edges (up to
+3x3) are solved completely by a retrograde pass over all 2^edges positions,
+one layer of taken edge counts at a time (this needs NumPy), and stored as a
+memory mapped table:
+    header --> magic b"DBS1", columns, rows, edge count
+    body   --> one signed byte per edge bitmask, the value of the position
+Build the tables from the root directory with:
+    python3 -m src.solver --sizes 2x2 2x3 3x3
+"""
+
+from .geometry import geometry
+from functools import lru_cache
+import argparse
+import mmap
+import os
+import struct
+
+MAGIC = b"DBS1"
+_HEADER = struct.Struct("<4sBBBx")
+
+# largest board solved into a table (2^24 bytes)
+MAX_TABLE_EDGES = 24
+# memoized values kept before the memo is cleared
+_MEMO_LIMIT = 1 << 21
+
+def default_path(cols, rows):
+    """Location of the solved table for the board size in the books directory"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'books',
+        '{}x{}.solved'.format(rows, cols))
+
+def edges_of(backend):
+    """Edge bitmask of any board engine, from its free edges"""
+    shape = geometry(backend.columns, backend.rows)
+    free = 0
+    for edge in backend.legal_moves():
+        free |= shape.edge_bits[edge]
+    return shape.full_mask ^ free
+
+class Solver:
+    """Memoized exact values of the positions of a board size."""
+    def __init__(self, cols, rows):
+        shape = geometry(cols, rows)
+        self._full_mask = shape.full_mask
+        # edge bit --> edge masks of its boxes
+        self._completions = {1 << edge: tuple(shape.box_masks[box] for box in boxes)
+            for edge, boxes in enumerate(shape.edge_boxes)}
+        self._values = {self._full_mask: 0}
+
+    def value(self, edges):
+        """Net boxes won by the player to move from the position"""
+        value = self._values.get(edges)
+        if value is not None:
+            return value
+        if len(self._values) > _MEMO_LIMIT:
+            self._values = {self._full_mask: 0}
+        best = -len(self._completions)
+        free = self._full_mask ^ edges
+        while free:
+            bit = free & -free
+            free ^= bit
+            following = edges | bit
+            gain = 0
+            for box_mask in self._completions[bit]:
+                if following & box_mask == box_mask:
+                    gain += 1
+            value = gain + self.value(following) if gain else -self.value(following)
+            if value > best:
+                best = value
+        self._values[edges] = best
+        return best
+
+    def best_move(self, edges):
+        """Returns: (value, edge index of an optimal move) of a position that is not over"""
+        return _best_move(edges, self._full_mask, self._completions, self.value)
+
+    def __len__(self):
+        return len(self._values)
+
+@lru_cache(maxsize=None)
+def solver(cols, rows):
+    """Shared Solver instance for the board size"""
+    return Solver(cols, rows)
+
+def _best_move(edges, full_mask, completions, value_of):
+    best, best_move = None, None
+    free = full_mask ^ edges
+    while free:
+        bit = free & -free
+        free ^= bit
+        following = edges | bit
+        gain = sum(1 for box_mask in completions[bit] if following & box_mask == box_mask)
+        value = gain + value_of(following) if gain else -value_of(following)
+        if best is None or value > best:
+            best, best_move = value, bit.bit_length() - 1
+    return best, best_move
+
+class SolvedTable:
+    """Read only view of a solved table file."""
+    def __init__(self, path):
+        with open(path, 'rb') as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.cols, self.rows, edge_count = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or edge_count != geometry(self.cols, self.rows).edge_count:
+            raise ValueError("not a solved table")
+        shape = geometry(self.cols, self.rows)
+        self._full_mask = shape.full_mask
+        self._completions = {1 << edge: tuple(shape.box_masks[box] for box in boxes)
+            for edge, boxes in enumerate(shape.edge_boxes)}
+
+    def close(self):
+        """Unmaps the file"""
+        self._map.close()
+
+    def value(self, edges):
+        """Net boxes won by the player to move from the position"""
+        value = self._map[_HEADER.size + edges]
+        return value - 256 if value > 127 else value
+
+    def best_move(self, edges):
+        """Returns: (value, edge index of an optimal move) of a position that is not over"""
+        return _best_move(edges, self._full_mask, self._completions, self.value)
+
+def build_table(cols, rows, path):
+    """Solves every position of the board size and writes the table to path"""
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("building solved tables requires NumPy (pip install numpy)")
+    shape = geometry(cols, rows)
+    count = shape.edge_count
+    if count > MAX_TABLE_EDGES:
+        raise ValueError("{}x{} has {} edges, more than {}".format(rows, cols, count, MAX_TABLE_EDGES))
+    masks = np.arange(1 << count, dtype=np.uint32)
+    taken = np.zeros(1 << count, dtype=np.uint8)
+    for edge in range(count):
+        taken += (masks >> edge & 1).astype(np.uint8)
+    del masks
+    values = np.zeros(1 << count, dtype=np.int8)
+    box_masks = [np.uint32(box_mask) for box_mask in shape.box_masks]
+    # positions with more taken edges are solved first
+    for layer_taken in range(count - 1, -1, -1):
+        layer = np.flatnonzero(taken == layer_taken).astype(np.uint32)
+        best = np.full(len(layer), -128, dtype=np.int8)
+        for edge in range(count):
+            bit = np.uint32(1 << edge)
+            free = layer & bit == 0
+            following = layer[free] | bit
+            gain = np.zeros(len(following), dtype=np.int8)
+            for box in shape.edge_boxes[edge]:
+                gain += (following & box_masks[box] == box_masks[box]).astype(np.int8)
+            following_values = values[following]
+            value = np.where(gain > 0, gain + following_values, -following_values)
+            best[free] = np.maximum(best[free], value)
+        values[layer] = best
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as stream:
+        stream.write(_HEADER.pack(MAGIC, cols, rows, count))
+        stream.write(values.tobytes())
+
+def main():
+    parser = argparse.ArgumentParser("Solves every position of small boards into memory mapped tables.")
+    parser.add_argument('--sizes', dest='sizes', nargs='+', default=['2x2', '2x3', '3x3'],
+        help="board sizes as ROWSxCOLS (at most {} edges)".format(MAX_TABLE_EDGES))
+    parser.add_argument('--dir', dest='dir', default=None, help="output directory (the books directory if not present)")
+    args = parser.parse_args()
+    for size in args.sizes:
+        rows, cols = (int(part) for part in size.split('x'))
+        path = default_path(cols, rows)
+        if args.dir is not None:
+            path = os.path.join(args.dir, os.path.basename(path))
+        build_table(cols, rows, path)
+        print("{} --> {}".format(size, path))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Symmetries of the board and canonical forms of positions.
+
+A rectangular board is unchanged by the identity, a vertical flip, a
+horizontal flip and a half turn; a square board also by the two diagonal
+reflections and the two quarter turns. Each symmetry maps edges to edges (see
+geometry.py for their numbering), so an edge bitmask can be transformed with
+per byte lookup tables. The canonical form of a position is the smallest edge
+bitmask among its transforms, and moves are mapped to and from the orientation
+that produced it.
+"""
+
+from .geometry import geometry
+from functools import lru_cache
+
+class Symmetries:
+    """Edge permutations of every symmetry of a board size."""
+    def __init__(self, cols, rows):
+        shape = geometry(cols, rows)
+        row_bound, column_bound = 2 * rows, 2 * cols
+        transforms = [
+            lambda row, col: (row, col),
+            lambda row, col: (row_bound - row, col),
+            lambda row, col: (row, column_bound - col),
+            lambda row, col: (row_bound - row, column_bound - col),
+        ]
+        if cols == rows:
+            transforms += [
+                lambda row, col: (col, row),
+                lambda row, col: (column_bound - col, row_bound - row),
+                lambda row, col: (col, row_bound - row),
+                lambda row, col: (column_bound - col, row),
+            ]
+        # forward[s] maps an edge coordinate to its image under symmetry s
+        self.forward = [{edge: transform(*edge) for edge in shape.edges} for transform in transforms]
+        self.inverse = [{image: edge for edge, image in forward.items()} for forward in self.forward]
+        # permutations[s][i] is the index of the image of edge i
+        self.permutations = [[shape.edge_index[forward[edge]] for edge in shape.edges] for forward in self.forward]
+        # tables[s][k][byte] is the image of the bits of byte k of an edge bitmask
+        self._tables = []
+        for permutation in self.permutations:
+            tables = []
+            for start in range(0, shape.edge_count, 8):
+                images = [1 << permutation[start + bit] if start + bit < shape.edge_count else 0 for bit in range(8)]
+                # each byte adds the image of its lowest bit to the entry without it
+                table = [0] * 256
+                for byte in range(1, 256):
+                    low = byte & -byte
+                    table[byte] = table[byte ^ low] | images[low.bit_length() - 1]
+                tables.append(table)
+            self._tables.append(tables)
+
+    def __len__(self):
+        return len(self.permutations)
+
+    def transform(self, edges, symmetry):
+        """Returns: Image of the edge bitmask under the symmetry"""
+        image = 0
+        for table in self._tables[symmetry]:
+            image |= table[edges & 0xff]
+            edges >>= 8
+        return image
+
+    def canonical(self, edges):
+        """Returns: (canonical edge bitmask, symmetry mapping the edges onto it)"""
+        best, best_symmetry = edges, 0
+        for symmetry in range(1, len(self._tables)):
+            image = self.transform(edges, symmetry)
+            if image < best:
+                best, best_symmetry = image, symmetry
+        return best, best_symmetry
+
+    def map_move(self, move, symmetry):
+        """Returns: Image of the (row, col) edge under the symmetry"""
+        return self.forward[symmetry][move]
+
+    def unmap_move(self, move, symmetry):
+        """Returns: (row, col) edge whose image under the symmetry is move"""
+        return self.inverse[symmetry][move]
+
+@lru_cache(maxsize=None)
+def symmetries(cols, rows):
+    """Shared Symmetries instance for the board size"""
+    return Symmetries(cols, rows)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Zobrist hashing and a transposition table for the computer's search.
+
+A position is hashed by XORing a random 64 bit key per taken edge, plus a key
+for the side to move, so the hash is updated with one XOR per move or undo.
+Packed keys hash all symmetric images of a position in one wide integer, so
+symmetric positions can share entries under the smallest of their hashes.
+Scores are not part of the hash: from a given edge set the boxes still to be
+won do not depend on who won the earlier ones, so the search stores values
+relative to the score difference at the node (see Computer).
+"""
+
+from .geometry import geometry
+from functools import lru_cache
+import random
+
+# bound types of stored values
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class ZobristKeys:
+    """Random keys for each edge and for the side to move."""
+    def __init__(self, cols, rows, seed=0x5eed):
+        rng = random.Random(seed)
+        self.edge_keys = {edge: rng.getrandbits(64) for edge in geometry(cols, rows).edges}
+        self.turn_key = rng.getrandbits(64)
+
+    def hash(self, backend):
+        """Hash of the backend's edge set computed from scratch"""
+        key = 0
+        for (row, col), edge_key in self.edge_keys.items():
+            if backend.taken(row, col):
+                key ^= edge_key
+        return key
+
+    def packed(self, symmetries):
+        """Keys hashing every symmetric image of a position at once: 64 bits
+        per symmetry, the chunk for symmetry s using the key of the edge's
+        image under s (see symmetry.py).
+        Returns: (edge keys, turn key)
+        """
+        edge_keys = {edge: sum(self.edge_keys[forward[edge]] << 64 * symmetry
+            for symmetry, forward in enumerate(symmetries.forward)) for edge in self.edge_keys}
+        turn_key = sum(self.turn_key << 64 * symmetry for symmetry in range(len(symmetries)))
+        return edge_keys, turn_key
+
+@lru_cache(maxsize=None)
+def zobrist_keys(cols, rows):
+    """Shared ZobristKeys instance for the board size"""
+    return ZobristKeys(cols, rows)
+
+class TranspositionTable:
+    """
+    Fixed number of slots indexed by the low bits of the hash. Each slot holds
+    one (key, depth, bound, value, move, generation) tuple, so memory is capped
+    by max_entries (roughly 150 bytes per filled slot).
+    A slot is replaced when it is empty, holds the same position, was written
+    during an earlier search, or holds a shallower search than the new entry.
+    """
+    def __init__(self, max_entries=1 << 18):
+        slots = 1
+        while slots * 2 <= max_entries:
+            slots *= 2
+        self._mask = slots - 1
+        self._slots = [None] * slots
+        self._generation = 0
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """Returns: (depth, bound, value, move) stored for the key or None"""
+        entry = self._slots[key & self._mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+        return None
+
+    def store(self, key, depth, bound, value, move):
+        """Stores a search result for the key if the replacement policy allows it"""
+        index = key & self._mask
+        entry = self._slots[index]
+        if (entry is None or entry[0] == key or entry[5] != self._generation
+            or depth >= entry[1]):
+            self._slots[index] = (key, depth, bound, value, move, self._generation)
+            self.stores += 1
+
+    def new_search(self):
+        """Marks existing entries as stale so deeper old entries can be replaced"""
+        self._generation += 1
+
+    def clear(self):
+        """Removes every entry"""
+        self._slots = [None] * len(self._slots)
+        self.hits = 0
+        self.stores = 0
+
+    @property
+    def capacity(self):
+        """Number of slots"""
+        return len(self._slots)
+
+    def __len__(self):
+        return sum(1 for entry in self._slots if entry is not None)
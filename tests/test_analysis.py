@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from src.analysis import ResultCache, Settings, canonical_key, notation, parse, read_positions, run
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.encoding import PositionWriter
+from src.symmetry import symmetries
+
+def mirrored_positions(seed, cols=3, rows=2, moves=9):
+    """A position after seeded random moves and its image under a symmetry"""
+    rng = random.Random(seed)
+    board, image = BitBoard(cols, rows), BitBoard(cols, rows)
+    images = symmetries(cols, rows)
+    player_one_turn = True
+    for _ in range(moves):
+        row, col = rng.choice(sorted(board.legal_moves()))
+        same_turn = board.move(row, col, player_one_turn)
+        image.move(*images.map_move((row, col), 1), player_one_turn)
+        if not same_turn:
+            player_one_turn = not player_one_turn
+    return board, image, player_one_turn
+
+def analysed(lines, cache, workers=1):
+    out = io.StringIO()
+    counts = run(io.BytesIO(''.join(line + '\n' for line in lines).encode()), out,
+        Settings(50, 'alphabeta', 'chain', True, 1 << 12), cache, workers)
+    return counts, sorted((json.loads(line) for line in out.getvalue().splitlines()), key=lambda result: result['index'])
+
+class TestAnalysis(unittest.TestCase):
+    def test_notation(self):
+        board, _, player_one = mirrored_positions(1)
+        parsed, parsed_player_one = parse(notation(board, player_one))
+        self.assertEqual(BitBoard.masks_of(board), BitBoard.masks_of(parsed))
+        self.assertEqual(player_one, parsed_player_one)
+        for text in ('0302 3', 'zz 1', '0302'):
+            self.assertRaises(ValueError, parse, text)
+        # text lines, skipping comments, or a binary position file
+        text = '# corpus\n\n{}\n'.format(notation(board, True)).encode()
+        self.assertEqual([notation(board, True)], list(read_positions(io.BytesIO(text))))
+        stream = io.BytesIO()
+        PositionWriter(stream).write(board, False)
+        stream.seek(0)
+        self.assertEqual([notation(board, False)], list(read_positions(stream)))
+
+    def test_principal_variation(self):
+        board, _, player_one = mirrored_positions(2, cols=3, rows=3, moves=8)
+        computer = Computer(board, think_ms=200, player_one=player_one)
+        move = computer.choose_move()
+        edges = board.edges
+        variation = computer.principal_variation(move)
+        self.assertEqual(edges, board.edges)
+        self.assertEqual(move, variation[0])
+        # the exact solver finishes the variation
+        self.assertEqual(board.edges_remaining, len(variation))
+        self.assertEqual(board.edges_remaining, len(set(variation)))
+
+    def test_caches_canonical_positions(self):
+        board, image, player_one = mirrored_positions(3)
+        self.assertEqual(canonical_key(board, player_one)[0], canonical_key(image, player_one)[0])
+        finished = BitBoard(1, 1)
+        for row, col in finished.legal_moves():
+            finished.move(row, col, False)
+        lines = [notation(board, player_one), 'nope', notation(image, player_one), notation(finished, True)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'analysis.sqlite')
+            cache = ResultCache(path)
+            # the mirrored position shares the search of the first
+            counts, results = analysed(lines, cache, workers=2)
+            cache.close()
+            self.assertEqual((4, 2), counts)
+            self.assertEqual([0, 1, 2, 3], [result['index'] for result in results])
+            self.assertIn('error', results[1])
+            first, mirrored = results[0], results[2]
+            self.assertEqual(first['value'], mirrored['value'])
+            self.assertFalse(board.taken(*first['move']))
+            self.assertEqual(symmetries(3, 2).map_move(tuple(first['move']), 1), tuple(mirrored['move']))
+            self.assertEqual(first['move'], first['pv'][0])
+            self.assertEqual((None, -1, []), (results[3]['move'], results[3]['value'], results[3]['pv']))
+            # a later run reads every result from the file
+            cache = ResultCache(path)
+            counts, again = analysed(lines, cache)
+            self.assertEqual(2, len(cache))
+            cache.close()
+            self.assertEqual((4, 0), counts)
+            self.assertTrue(all(result['cached'] for result in again if 'error' not in result))
+            self.assertEqual([result.get('move') for result in results], [result.get('move') for result in again])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from src.background import BackgroundComputer
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.encoding import to_bytes, from_bytes
+from tests.test_computer import random_position
+
+class TestBackgroundComputer(unittest.TestCase):
+    def test_move_matches_computer(self):
+        for seed in range(5):
+            board = random_position(seed, cols=3, rows=3, moves=12)
+            expected = Computer(from_bytes(to_bytes(board)))
+            expected.choose_move()
+            background = BackgroundComputer(Computer(board))
+            edges_remaining = board.edges_remaining
+            background.move()
+            self.assertEqual(edges_remaining - 1, board.edges_remaining)
+            self.assertEqual(expected.last_stats.value, background.last_stats.value)
+
+    def test_ponder_hit(self):
+        board = random_position(2, cols=3, rows=3, moves=10)
+        background = BackgroundComputer(Computer(board, think_ms=50))
+        background.ponder()
+        expected = Computer(from_bytes(to_bytes(board))).expected_reply()
+        board.move(*expected, True)
+        background.think()
+        self.assertEqual(1, background.ponder_hits)
+        edges_remaining = board.edges_remaining
+        background.finish()
+        self.assertEqual(edges_remaining - 1, board.edges_remaining)
+
+    def test_ponder_miss(self):
+        board = random_position(2, cols=3, rows=3, moves=10)
+        background = BackgroundComputer(Computer(board))
+        background.ponder()
+        expected = Computer(from_bytes(to_bytes(board))).expected_reply()
+        other = next(move for move in board.legal_moves() if move != expected)
+        board.move(*other, True)
+        background.think()
+        self.assertEqual(1, background.ponder_misses)
+        expected = Computer(from_bytes(to_bytes(board)))
+        expected.choose_move()
+        background.finish()
+        self.assertEqual(expected.last_stats.value, background.last_stats.value)
+
+    def test_close_stops_pondering(self):
+        board = BitBoard(4, 4)
+        background = BackgroundComputer(Computer(board, think_ms=60000))
+        background.ponder()
+        self.assertTrue(background.thinking())
+        background.close()
+        self.assertFalse(background.thinking())
+        self.assertEqual(BitBoard(4, 4).edges, board.edges)
+
+class TestStop(unittest.TestCase):
+    def test_stopped_ponder_completes_first_iteration(self):
+        board = BitBoard(3, 3)
+        computer = Computer(board)
+        computer.stop()
+        move = computer.choose_move(ponder=True)
+        self.assertFalse(board.taken(*move))
+        self.assertEqual(1, computer.last_stats.depth)
+        self.assertEqual(BitBoard(3, 3).edges, board.edges)
+
+if __name__ == '__main__':
+    unittest.main()
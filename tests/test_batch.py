@@ -0,0 +1,61 @@
+import unittest
+from src.bitboard import BitBoard
+from tests.test_computer import random_position
+
+try:
+    import numpy as np
+    from src.batch import BatchBoard
+except ImportError:
+    np = None
+
+@unittest.skipIf(np is None, "the batch engine requires NumPy")
+class TestBatchBoard(unittest.TestCase):
+    def test_random_games_match_bitboard(self):
+        for cols, rows in [(3, 2), (4, 4)]:
+            count = 50
+            batch = BatchBoard(cols, rows, count)
+            boards = [BitBoard(cols, rows) for _ in range(count)]
+            turns = [True] * count
+            edges = boards[0].geometry.edges
+            rng = np.random.default_rng(0)
+            while not batch.game_over().all():
+                moves = batch.random_moves(rng)
+                gained = batch.move(moves)
+                for index, move in enumerate(moves):
+                    if move < 0:
+                        self.assertTrue(boards[index].game_over())
+                        continue
+                    before = boards[index].player_one_score + boards[index].player_two_score
+                    if not boards[index].move(*edges[move], turns[index]):
+                        turns[index] = not turns[index]
+                    after = boards[index].player_one_score + boards[index].player_two_score
+                    self.assertEqual(after - before, gained[index])
+                for index, board in enumerate(boards):
+                    self.assertEqual(board.edges, batch.board(index).edges)
+                    self.assertEqual(turns[index], batch.player_one_turn[index])
+                    self.assertEqual((board.player_one_score, board.player_two_score), tuple(batch.scores[index]))
+                    self.assertEqual(board.player_one_score - board.player_two_score, batch.advantage()[index])
+            for index, board in enumerate(boards):
+                other = batch.board(index)
+                self.assertEqual((board.player_one_boxes, board.player_two_boxes),
+                    (other.player_one_boxes, other.player_two_boxes))
+
+    def test_from_boards(self):
+        boards = [random_position(seed, cols=3, rows=3, moves=12) for seed in range(10)]
+        batch = BatchBoard.from_boards(boards)
+        shape = boards[0].geometry
+        for index, board in enumerate(boards):
+            other = batch.board(index)
+            self.assertEqual(BitBoard.masks_of(board), BitBoard.masks_of(other))
+            self.assertEqual([not board.taken(*edge) for edge in shape.edges], list(batch.legal_mask()[index]))
+            self.assertEqual([board.sides_taken(*box) for box in shape.boxes], list(batch.sides[index, :-1]))
+
+    def test_playout_finishes_every_position(self):
+        batch = BatchBoard(3, 3, 20)
+        steps = batch.playout(np.random.default_rng(1))
+        self.assertEqual(20 * 24, steps)
+        self.assertTrue(batch.game_over().all())
+        self.assertTrue((batch.scores.sum(axis=1) == 9).all())
+
+if __name__ == '__main__':
+    unittest.main()
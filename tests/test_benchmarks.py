@@ -0,0 +1,43 @@
+import unittest
+from benchmarks.corpus import CORPUS_VERSION, generate, load, board_of
+from benchmarks.suite import compare
+
+def document(calibration, **results):
+    return {'corpus_version': CORPUS_VERSION, 'calibration': calibration, 'results': results}
+
+class TestCorpus(unittest.TestCase):
+    def test_checked_in_corpus_matches_generator(self):
+        # a change to the generator must come with a new corpus version
+        self.assertEqual(generate(), load())
+
+    def test_positions_decode(self):
+        for entry in load():
+            board = board_of(entry)
+            self.assertEqual((entry['rows'], entry['cols']), (board.rows, board.columns))
+            self.assertFalse(board.game_over())
+
+class TestCompare(unittest.TestCase):
+    def test_search_changes_are_regressions(self):
+        baseline = document(1.0, **{'search/a': {'nodes': 10, 'value': 1, 'seconds': 1.0}})
+        self.assertEqual([], compare(baseline, baseline, 0.25))
+        changed = document(1.0, **{'search/a': {'nodes': 11, 'value': 1, 'seconds': 1.0}})
+        self.assertEqual(1, len(compare(changed, baseline, 0.25)))
+        self.assertEqual(1, len(compare(document(1.0), baseline, 0.25)))
+
+    def test_kernel_results_are_optional(self):
+        baseline = document(1.0, **{'kernel/a': {'nodes': 10, 'value': 1, 'rate': 100.0}})
+        # a run without the compiled kernel has nothing to compare
+        self.assertEqual([], compare(document(1.0), baseline, 0.25))
+        built = document(1.0)
+        built['kernel'] = True
+        self.assertEqual(1, len(compare(built, baseline, 0.25)))
+
+    def test_timings_are_scaled_by_calibration(self):
+        baseline = document(1.0, **{'move/a': {'seconds': 1.0}, 'board/a': {'rate': 100.0}})
+        slower_code = document(1.0, **{'move/a': {'seconds': 1.5}, 'board/a': {'rate': 60.0}})
+        self.assertEqual(2, len(compare(slower_code, baseline, 0.25)))
+        slower_machine = document(2.0, **{'move/a': {'seconds': 2.0}, 'board/a': {'rate': 50.0}})
+        self.assertEqual([], compare(slower_machine, baseline, 0.25))
+
+if __name__ == '__main__':
+    unittest.main()
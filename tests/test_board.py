@@ -1,10 +1,15 @@
+import random
 import unittest
 from src.board import Board
+from src.bitboard import BitBoard
+from src.kernel import AVAILABLE, KernelBoard
 
 class TestBoard(unittest.TestCase):
+    board_class = Board
+
     def test_move(self):
         def one_box_filled_with_vertical_edge():
-            board = Board(3, 2)
+            board = self.board_class(3, 2)
             board.move(0, 1, True)
             board.move(2, 1, True)
             board.move(1, 2, True)
@@ -18,7 +23,7 @@ class TestBoard(unittest.TestCase):
             self.assertEqual(1, board.player_one_score)
             self.assertEqual(0, board.player_two_score)
         def two_boxes_filled_with_vertical_edge():
-            board = Board(3, 2)
+            board = self.board_class(3, 2)
             board.move(0, 3, True)
             board.move(0, 5, True)
             board.move(2, 3, True)
@@ -39,7 +44,7 @@ class TestBoard(unittest.TestCase):
             self.assertEqual(2, board.player_one_score)
             self.assertEqual(0, board.player_two_score)
         def one_box_filled_with_horizontal_edge():
-            board = Board(3, 2)
+            board = self.board_class(3, 2)
             board.move(3, 0, False)
             board.move(3, 2, False)
             board.move(2, 1, False)
@@ -53,7 +58,7 @@ class TestBoard(unittest.TestCase):
             self.assertEqual(0, board.player_one_score)
             self.assertEqual(1, board.player_two_score)
         def two_boxes_filled_with_horizontal_edge():
-            board = Board()
+            board = self.board_class()
             board.move(1, 0, False)
             board.move(3, 0, False)
             board.move(1, 2, False)
@@ -79,7 +84,7 @@ class TestBoard(unittest.TestCase):
         two_boxes_filled_with_horizontal_edge()
     
     def test_game_over(self):
-        board = Board(1, 1)
+        board = self.board_class(1, 1)
         self.assertFalse(board.game_over())
         board.move(1, 0, True)
         board.move(1, 2, True)
@@ -90,7 +95,7 @@ class TestBoard(unittest.TestCase):
 
     def test_revert_move(self):
         def revert_one_box():
-            board = Board(3, 2)
+            board = self.board_class(3, 2)
             board.move(0, 1, True)
             board.move(2, 1, True)
             board.move(1, 2, True)
@@ -115,7 +120,7 @@ class TestBoard(unittest.TestCase):
             self.assertEqual(0, board.player_one_score)
             self.assertEqual(0, board.player_two_score)
         def revert_two_horizontal_boxes():
-            board = Board(3, 2)
+            board = self.board_class(3, 2)
             board.move(0, 3, True)
             board.move(0, 5, True)
             board.move(2, 3, True)
@@ -137,7 +142,7 @@ class TestBoard(unittest.TestCase):
             self.assertEqual(0, board.player_one_score)
             self.assertEqual(0, board.player_two_score)
         def revert_two_vertical_boxes():
-            board = Board()
+            board = self.board_class()
             board.move(1, 0, False)
             board.move(3, 0, False)
             board.move(1, 2, False)
@@ -162,5 +167,131 @@ class TestBoard(unittest.TestCase):
         revert_two_horizontal_boxes()
         revert_two_vertical_boxes()
 
+    def test_legal_moves(self):
+        board = self.board_class(1, 1)
+        self.assertEqual([(0, 1), (1, 0), (1, 2), (2, 1)], sorted(board.legal_moves()))
+        board.move(1, 0, True)
+        board.move(0, 1, True)
+        self.assertEqual([(1, 2), (2, 1)], sorted(board.legal_moves()))
+        self.assertEqual(2, board.sides_taken(0, 0))
+        board.revert_move(1, 0)
+        self.assertEqual([(1, 0), (1, 2), (2, 1)], sorted(board.legal_moves()))
+        self.assertEqual(1, board.sides_taken(0, 0))
+        self.assertEqual(((0, 0), (0, 2)), self.board_class(2, 1).adjacent_boxes(1, 2))
+
+    def test_push_pop(self):
+        rng = random.Random(7)
+        board = self.board_class(3, 2)
+        # a move played on the board before the search starts
+        board.move(0, 1, False)
+        twin = self.board_class(3, 2)
+        twin.move(0, 1, False)
+        order = sorted(board.legal_moves())
+        rng.shuffle(order)
+        states = []
+        player_one_turn = True
+        for row, col in order:
+            states.append((board.board, board.player_one_score, board.player_two_score, board.edges_remaining,
+                sorted(board.legal_moves())))
+            same_turn = board.push(row, col, player_one_turn)
+            # push plays like move
+            self.assertEqual(same_turn, twin.move(row, col, player_one_turn))
+            self.assertEqual(twin.board, board.board)
+            if not same_turn:
+                player_one_turn = not player_one_turn
+        self.assertTrue(board.game_over())
+        self.assertEqual(len(order), board.stack_depth)
+        # undoes in reverse order, restoring each position exactly
+        for (row, col), state in zip(reversed(order), reversed(states)):
+            self.assertEqual((row, col), board.pop())
+            self.assertEqual(state, (board.board, board.player_one_score, board.player_two_score,
+                board.edges_remaining, sorted(board.legal_moves())))
+        self.assertEqual(0, board.stack_depth)
+        self.assertTrue(board.taken(0, 1))
+
+class TestBitBoard(TestBoard):
+    board_class = BitBoard
+
+    def test_matches_board(self):
+        board, bitboard = Board(3, 2), BitBoard(3, 2)
+        for row, col in [(1, 0), (0, 1), (1, 2), (2, 1), (3, 4), (2, 3), (1, 4), (0, 3)]:
+            self.assertEqual(board.move(row, col, row % 4 == 1), bitboard.move(row, col, row % 4 == 1))
+            self.assertEqual(board.board, bitboard.board)
+        self.assertEqual(board.player_one_score, bitboard.player_one_score)
+        self.assertEqual(board.player_two_score, bitboard.player_two_score)
+        self.assertEqual(board.edges_remaining, bitboard.edges_remaining)
+        board.revert_move(0, 3)
+        bitboard.revert_move(0, 3)
+        self.assertEqual(board.board, bitboard.board)
+        self.assertEqual(board.player_one_score, bitboard.player_one_score)
+    def test_random_games_match_board(self):
+        for cols, rows in [(1, 1), (3, 2), (2, 3), (5, 4)]:
+            edges = [(row, col) for row in range(2 * rows + 1) for col in range(2 * cols + 1)
+                if row % 2 != col % 2]
+            rng = random.Random(cols * 10 + rows)
+            for _ in range(5):
+                order = list(edges)
+                rng.shuffle(order)
+                board, bitboard = Board(cols, rows), BitBoard(cols, rows)
+                player_one_turn = True
+                for row, col in order:
+                    same_turn = board.move(row, col, player_one_turn)
+                    self.assertEqual(same_turn, bitboard.move(row, col, player_one_turn))
+                    self.assert_same_state(board, bitboard)
+                    if not same_turn:
+                        player_one_turn = not player_one_turn
+                for row, col in reversed(order):
+                    board.revert_move(row, col)
+                    bitboard.revert_move(row, col)
+                    self.assert_same_state(board, bitboard)
+
+    def assert_same_state(self, board, bitboard):
+        self.assertEqual(board.board, bitboard.board)
+        self.assertEqual(board.player_one_score, bitboard.player_one_score)
+        self.assertEqual(board.player_two_score, bitboard.player_two_score)
+        self.assertEqual(board.edges_remaining, bitboard.edges_remaining)
+        self.assertEqual(board.game_over(), bitboard.game_over())
+        self.assertEqual(sorted(board.legal_moves()), sorted(bitboard.legal_moves()))
+
+@unittest.skipUnless(AVAILABLE, "the compiled kernel is not built")
+class TestKernelBoard(TestBoard):
+    board_class = KernelBoard
+
+    def test_random_games_match_bitboard(self):
+        for cols, rows in [(1, 1), (3, 2), (5, 4)]:
+            rng = random.Random(cols * 10 + rows)
+            for _ in range(5):
+                board, kernel = BitBoard(cols, rows), KernelBoard(cols, rows)
+                order = board.legal_moves()
+                rng.shuffle(order)
+                player_one_turn = True
+                for row, col in order:
+                    same_turn = board.push(row, col, player_one_turn)
+                    self.assertEqual(same_turn, kernel.push(row, col, player_one_turn))
+                    self.assertEqual(BitBoard.masks_of(board), kernel.masks())
+                    self.assertEqual(sorted(board.legal_moves()), kernel.legal_moves())
+                    if not same_turn:
+                        player_one_turn = not player_one_turn
+                    # a copy from the bitmasks has the same state
+                    twin = KernelBoard.from_masks(cols, rows, *kernel.masks())
+                    self.assertEqual(kernel.board, twin.board)
+                    self.assertEqual((kernel.player_one_score, kernel.player_two_score, kernel.edges_remaining),
+                        (twin.player_one_score, twin.player_two_score, twin.edges_remaining))
+                for _ in order:
+                    self.assertEqual(board.pop(), kernel.pop())
+                self.assertEqual(0, kernel.edges)
+
+    def test_rejects_invalid_moves(self):
+        board = self.board_class(2, 1)
+        board.move(0, 1, True)
+        with self.assertRaises(ValueError):
+            board.move(0, 1, False)
+        with self.assertRaises(ValueError):
+            board.push(1, 1, False)
+        with self.assertRaises(ValueError):
+            board.revert_move(2, 1)
+        with self.assertRaises(IndexError):
+            board.pop()
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
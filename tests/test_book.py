@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from src.bitboard import BitBoard
+from src.book import OpeningBook, build
+from src.computer import Computer
+from src.symmetry import symmetries
+
+class TestOpeningBook(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, '2x2.book')
+        cls.count = build(2, 2, 1, 20, cls.path)
+        cls.book = OpeningBook(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.book.close()
+        cls.directory.cleanup()
+
+    def test_covers_canonical_positions(self):
+        # the empty board and the two kinds of first move (outer and inner edge)
+        self.assertEqual(3, self.count)
+        self.assertEqual(3, len(self.book))
+        self.assertEqual((2, 2), (self.book.cols, self.book.rows))
+
+    def test_lookup_maps_moves_back(self):
+        shape = symmetries(2, 2)
+        for first in BitBoard(2, 2).geometry.edges:
+            board = BitBoard(2, 2)
+            board.move(*first, True)
+            entry = self.book.lookup(board)
+            self.assertIsNotNone(entry)
+            self.assertFalse(board.taken(*entry.move))
+            # symmetric positions get the symmetric move
+            for symmetry in range(len(shape)):
+                image = BitBoard(2, 2)
+                image.move(*shape.map_move(first, symmetry), True)
+                image_entry = self.book.lookup(image)
+                self.assertEqual(entry.value, image_entry.value)
+                self.assertFalse(image.taken(*image_entry.move))
+        board = BitBoard(2, 2)
+        for move in [(0, 1), (0, 3), (1, 0)]:
+            board.move(*move, True)
+        self.assertIsNone(self.book.lookup(board))
+        self.assertIsNone(self.book.lookup(BitBoard(3, 2)))
+
+    def test_computer_plays_book_moves(self):
+        board = BitBoard(2, 2)
+        computer = Computer(board, book=self.book)
+        self.assertEqual(self.book.lookup(board).move, computer.choose_move())
+        self.assertEqual(0, computer.last_stats.nodes)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+import unittest
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.evaluation import ScoreEvaluator
+from src.parallel import ParallelComputer
+from src.transposition import TranspositionTable, zobrist_keys, EXACT, LOWER
+
+def random_position(seed, cols=3, rows=2, moves=8):
+    """BitBoard after a seeded sequence of random moves"""
+    rng = random.Random(seed)
+    board = BitBoard(cols, rows)
+    edges = list(board.geometry.edges)
+    rng.shuffle(edges)
+    player_one_turn = True
+    for row, col in edges[:moves]:
+        if not board.move(row, col, player_one_turn):
+            player_one_turn = not player_one_turn
+    return board
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_store_and_probe(self):
+        table = TranspositionTable(16)
+        self.assertEqual(16, table.capacity)
+        self.assertIsNone(table.probe(5))
+        table.store(5, 3, EXACT, 2, (0, 1))
+        self.assertEqual((3, EXACT, 2, (0, 1)), table.probe(5))
+        # same slot, shallower search from the same generation is kept out
+        table.store(21, 2, LOWER, 1, (1, 0))
+        self.assertIsNone(table.probe(21))
+        self.assertEqual((3, EXACT, 2, (0, 1)), table.probe(5))
+        # stale entries are replaced
+        table.new_search()
+        table.store(21, 2, LOWER, 1, (1, 0))
+        self.assertEqual((2, LOWER, 1, (1, 0)), table.probe(21))
+        self.assertIsNone(table.probe(5))
+
+    def test_hash_is_incremental(self):
+        board = BitBoard(3, 2)
+        keys = zobrist_keys(3, 2)
+        edges = list(keys.edge_keys)
+        random.Random(0).shuffle(edges)
+        key = 0
+        player_one_turn = True
+        for row, col in edges:
+            if not board.move(row, col, player_one_turn):
+                player_one_turn = not player_one_turn
+            key ^= keys.edge_keys[row, col]
+            self.assertEqual(keys.hash(board), key)
+        for row, col in reversed(edges):
+            board.revert_move(row, col)
+            key ^= keys.edge_keys[row, col]
+            self.assertEqual(keys.hash(board), key)
+        self.assertEqual(0, key)
+
+class TestComputer(unittest.TestCase):
+    def test_alpha_beta_matches_minimax(self):
+        for seed in range(10):
+            board = random_position(seed, moves=9)
+            computer = Computer(board, oracle_edges=0, evaluator=ScoreEvaluator, quiescence=False)
+            computer._start_search()
+            for depth in (2, 3):
+                expected, _ = computer._minimax(depth, True)
+                computer._table.new_search()
+                actual, _ = computer._alpha_beta_minimax(depth, True, float('-inf'), float('inf'))
+                self.assertEqual(expected, actual)
+
+    def test_null_window_searches_match_alpha_beta(self):
+        for seed in range(10):
+            board = random_position(seed, cols=3, rows=3, moves=8)
+            values = {}
+            for search in ('alphabeta', 'pvs', 'mtdf'):
+                computer = Computer(board, search=search)
+                computer._start_search()
+                values[search], move = computer._root_search(4, None)
+                self.assertFalse(board.taken(*move))
+            self.assertEqual(values['alphabeta'], values['pvs'])
+            self.assertEqual(values['alphabeta'], values['mtdf'])
+        with self.assertRaises(ValueError):
+            Computer(board, search='negascout')
+
+    def test_move_ordering(self):
+        board = BitBoard(3, 1)
+        # left box has three sides, middle box none and right box two
+        for row, col in [(0, 1), (2, 1), (1, 0), (0, 5), (2, 5)]:
+            board.move(row, col, True)
+        computer = Computer(board)
+        moves = computer._ordered_moves(None)
+        self.assertEqual((1, 2), moves[0])
+        self.assertEqual({(0, 3), (2, 3)}, set(moves[1:3]))
+        self.assertEqual({(1, 4), (1, 6)}, set(moves[3:]))
+        self.assertEqual((1, 6), computer._ordered_moves((1, 6))[0])
+
+    def test_search_restores_hash(self):
+        for symmetry in (False, True):
+            for seed in range(5):
+                board = random_position(seed, moves=7)
+                computer = Computer(board, symmetry=symmetry)
+                computer._start_search()
+                computer._alpha_beta_minimax(4, True, float('-inf'), float('inf'))
+                self.assertEqual(computer._position_hash(), computer._hash)
+        keys = zobrist_keys(3, 2)
+        self.assertEqual(keys.hash(board), Computer(board, symmetry=False)._position_hash())
+
+    def test_iterative_deepening(self):
+        def finishes_small_game():
+            board = random_position(1, moves=10)
+            computer = Computer(board, think_ms=10000)
+            row, col = computer.choose_move()
+            self.assertFalse(board.taken(row, col))
+            self.assertEqual(board.edges_remaining, computer.last_stats.depth)
+            expected, _ = computer._minimax(board.edges_remaining, True)
+            self.assertEqual(expected, computer.last_stats.value)
+        def stops_at_deadline():
+            board = BitBoard(5, 5)
+            computer = Computer(board, think_ms=50)
+            row, col = computer.choose_move()
+            self.assertFalse(board.taken(row, col))
+            self.assertLess(computer.last_stats.elapsed, 1)
+            self.assertLess(computer.last_stats.depth, board.edges_remaining)
+            # the aborted iteration left the board untouched
+            self.assertEqual(60, board.edges_remaining)
+            self.assertEqual(0, board.edges)
+        def bounds_first_iteration():
+            # a single iteration does not fit in the think time on a 30x30 board
+            board = random_position(2, cols=30, rows=30, moves=600)
+            edges = board.edges
+            computer = Computer(board, TranspositionTable(1 << 10), think_ms=20)
+            row, col = computer.choose_move()
+            self.assertFalse(board.taken(row, col))
+            self.assertEqual(0, computer.last_stats.depth)
+            self.assertLess(computer.last_stats.elapsed, 1)
+            self.assertEqual(edges, board.edges)
+        finishes_small_game()
+        stops_at_deadline()
+        bounds_first_iteration()
+
+    def test_stop_ends_one_search(self):
+        board = BitBoard(4, 4)
+        computer = Computer(board, think_ms=10000)
+        pondering = threading.Thread(target=computer.choose_move, args=(True,))
+        pondering.start()
+        time.sleep(0.05)
+        computer.stop()
+        pondering.join()
+        # the next search runs for its think time again
+        computer._think_ms = 300
+        computer.choose_move()
+        self.assertGreater(computer.last_stats.depth, 1)
+        self.assertGreater(computer.last_stats.elapsed, 0.2)
+class TestParallelComputer(unittest.TestCase):
+    def test_matches_sequential_search(self):
+        computer = ParallelComputer(random_position(0, cols=3, rows=3, moves=8), 2)
+        try:
+            for seed in range(3):
+                board = random_position(seed, cols=3, rows=3, moves=8)
+                sequential = Computer(board)
+                sequential._start_search()
+                expected, _ = sequential._root_search(4, None)
+                computer._backend = board
+                computer._start_search()
+                actual, move = computer._root_search(4, None)
+                self.assertEqual(expected, actual)
+                self.assertFalse(board.taken(*move))
+        finally:
+            computer.close()
+
+    def test_stop_reaches_workers(self):
+        computer = ParallelComputer(BitBoard(5, 5), 2, think_ms=60000)
+        try:
+            thinking = threading.Thread(target=computer.choose_move)
+            start = time.perf_counter()
+            thinking.start()
+            time.sleep(0.5)
+            computer.stop()
+            thinking.join(10)
+            self.assertFalse(thinking.is_alive())
+            self.assertLess(time.perf_counter() - start, 5)
+            # the next search runs for its think time again
+            computer._think_ms = 300
+            computer.choose_move()
+            self.assertGreater(computer.last_stats.depth, 1)
+        finally:
+            computer.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import io
+import unittest
+from src.board import Board
+from src.encoding import (GameRecordReader, GameRecordWriter, PositionReader, PositionWriter, encode_varint,
+    read_varint, from_bytes, from_int, replay, to_bytes, to_int)
+from tests.test_computer import random_position
+
+class TestEncoding(unittest.TestCase):
+    def test_varint(self):
+        for value in (0, 1, 127, 128, 300, 1 << 40):
+            self.assertEqual(value, read_varint(io.BytesIO(encode_varint(value))))
+        self.assertEqual(b"\xac\x02", encode_varint(300))
+        self.assertIsNone(read_varint(io.BytesIO(b"")))
+        self.assertRaises(ValueError, read_varint, io.BytesIO(b"\x80"))
+
+    def test_position_round_trip(self):
+        for seed in range(10):
+            board = random_position(seed, cols=5, rows=4, moves=seed * 4)
+            data = to_bytes(board)
+            # 2 header bytes, 49 edges and 2 x 20 boxes in 12 bytes
+            self.assertEqual(14, len(data))
+            copy = from_bytes(data)
+            self.assertEqual(board.board, copy.board)
+            self.assertEqual(board.player_one_score, copy.player_one_score)
+            self.assertEqual(board.player_two_score, copy.player_two_score)
+            self.assertEqual(board.edges_remaining, copy.edges_remaining)
+            self.assertEqual(sorted(board.legal_moves()), sorted(copy.legal_moves()))
+            self.assertEqual(board.board, from_int(5, 4, to_int(board)).board)
+
+    def test_matrix_board_encoding(self):
+        board = Board(2, 1)
+        for row, col in [(0, 1), (2, 1), (1, 0), (1, 2)]:
+            board.move(row, col, False)
+        copy = from_bytes(to_bytes(board))
+        self.assertEqual(board.board, copy.board)
+        self.assertEqual(1, copy.player_two_score)
+
+    def test_game_records(self):
+        stream = io.BytesIO()
+        writer = GameRecordWriter(stream)
+        writer.write(1, 1, [0, 3, 1, 2])
+        writer.write(5, 4, list(range(49)))
+        # appending to an existing file does not repeat the header
+        GameRecordWriter(stream).write(2, 1, [6, 0])
+        stream.seek(0)
+        records = list(GameRecordReader(stream))
+        self.assertEqual([(1, 1, [0, 3, 1, 2]), (5, 4, list(range(49))), (2, 1, [6, 0])], records)
+        board = replay(records[0])
+        self.assertTrue(board.game_over())
+        self.assertEqual(1, board.player_two_score)
+        self.assertRaises(ValueError, GameRecordReader, io.BytesIO(b"nope"))
+
+    def test_position_files(self):
+        boards = [random_position(seed, cols=5, rows=4, moves=seed * 9) for seed in range(3)]
+        stream = io.BytesIO()
+        writer = PositionWriter(stream)
+        for index, board in enumerate(boards):
+            writer.write(board, index % 2 == 0)
+        stream.seek(0)
+        positions = list(PositionReader(stream))
+        self.assertEqual([to_bytes(board) for board in boards], [to_bytes(board) for board, _ in positions])
+        self.assertEqual([True, False, True], [player_one for _, player_one in positions])
+        self.assertRaises(ValueError, list, PositionReader(io.BytesIO(stream.getvalue()[:-1])))
+
+if __name__ == "__main__":
+    unittest.main()
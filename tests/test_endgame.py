@@ -0,0 +1,79 @@
+import random
+import unittest
+from functools import lru_cache
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.endgame import analyse, components
+
+def exhaustive_value(board):
+    """Net boxes for the player to move under perfect play, by brute force"""
+    shape = board.geometry
+    @lru_cache(maxsize=None)
+    def value(edges):
+        if edges == shape.full_mask:
+            return 0
+        best = float('-inf')
+        for edge in range(shape.edge_count):
+            if edges >> edge & 1:
+                continue
+            following = edges | 1 << edge
+            gain = sum(1 for box in shape.edge_boxes[edge]
+                if following & shape.box_masks[box] == shape.box_masks[box])
+            best = max(best, gain + value(following) if gain else -value(following))
+        return best
+    return value
+
+def play(board, moves):
+    player_one_turn = True
+    for row, col in moves:
+        if not board.move(row, col, player_one_turn):
+            player_one_turn = not player_one_turn
+
+class TestEndgame(unittest.TestCase):
+    def test_components(self):
+        # 1x3 board with only the inner vertical edges free: one chain of three
+        board = BitBoard(3, 1)
+        play(board, [(0, 1), (0, 3), (0, 5), (2, 1), (2, 3), (2, 5), (1, 0), (1, 6)])
+        found = components(board)
+        self.assertEqual(1, len(found))
+        self.assertEqual([0, 1, 2], found[0].boxes)
+        self.assertEqual([None, (1, 2), (1, 4), None], found[0].edges)
+        self.assertEqual(2, found[0].capturable)
+        # an inner box with four free edges does not qualify
+        self.assertIsNone(components(BitBoard(3, 3)))
+
+    def test_matches_exhaustive_search(self):
+        for cols, rows in [(3, 2), (2, 3), (3, 3)]:
+            value = exhaustive_value(BitBoard(cols, rows))
+            for seed in range(40):
+                rng = random.Random(seed)
+                board = BitBoard(cols, rows)
+                edges = list(board.geometry.edges)
+                rng.shuffle(edges)
+                player_one_turn = True
+                for row, col in edges:
+                    if not board.move(row, col, player_one_turn):
+                        player_one_turn = not player_one_turn
+                    solved = analyse(board)
+                    if solved is not None and not board.game_over():
+                        break
+                if solved is None or board.game_over():
+                    continue
+                self.assertEqual(value(board.edges), solved.value)
+                edge = board.geometry.edge_index[solved.move]
+                following = board.edges | 1 << edge
+                gain = sum(1 for box in board.geometry.edge_boxes[edge]
+                    if following & board.geometry.box_masks[box] == board.geometry.box_masks[box])
+                self.assertEqual(solved.value, gain + value(following) if gain else -value(following))
+
+    def test_computer_uses_endgame(self):
+        # 1x3 chain of three opened at both ends: the computer takes a box
+        board = BitBoard(3, 1)
+        play(board, [(0, 1), (0, 3), (0, 5), (2, 1), (2, 3), (2, 5), (1, 0), (1, 6)])
+        computer = Computer(board)
+        self.assertIn(computer.choose_move(), [(1, 2), (1, 4)])
+        self.assertEqual(0, computer.last_stats.nodes)
+        self.assertEqual(3, computer.last_stats.value)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import random
+import unittest
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.evaluation import ChainEvaluator, ScoreEvaluator
+from src.solver import solver, edges_of
+from tests.test_computer import random_position
+
+def quiet_endgame(seed):
+    """3x3 BitBoard of closed chains and loops only (see endgame.py), or None"""
+    rng = random.Random(seed)
+    board = BitBoard(3, 3)
+    while True:
+        safe = [edge for edge in board.legal_moves()
+            if all(board.sides_taken(*box) < 2 for box in board.geometry.adjacent_boxes[edge])]
+        if not safe:
+            break
+        board.move(*rng.choice(sorted(safe)), True)
+    if any(board.sides_taken(*box) != 2 for box in board.geometry.boxes):
+        return None
+    return board
+
+class TestEvaluator(unittest.TestCase):
+    def test_incremental_counts(self):
+        board = random_position(0, cols=3, rows=3, moves=6)
+        evaluator = ChainEvaluator(3, 3)
+        evaluator.reset(board)
+        counts = lambda evaluator: (evaluator.edges, list(evaluator.sides), evaluator.threes, evaluator.safe)
+        expected = counts(evaluator)
+        played = []
+        for row, col in board.legal_moves():
+            board.move(row, col, True)
+            evaluator.move(row, col)
+            played.append((row, col))
+            fresh = ChainEvaluator(3, 3)
+            fresh.reset(board)
+            self.assertEqual(counts(fresh), counts(evaluator))
+        for row, col in reversed(played):
+            board.revert_move(row, col)
+            evaluator.revert(row, col)
+            fresh = ChainEvaluator(3, 3)
+            fresh.reset(board)
+            self.assertEqual(counts(fresh), counts(evaluator))
+        self.assertEqual(expected, counts(evaluator))
+
+    def test_capture(self):
+        board = BitBoard(3, 1)
+        for row, col in [(0, 1), (2, 1), (1, 0)]:
+            board.move(row, col, True)
+        evaluator = ChainEvaluator(3, 1)
+        evaluator.reset(board)
+        self.assertEqual((1, 2), evaluator.capture())
+        # the left box is taken; three safe edges are too many to trust their parity
+        self.assertEqual(1, evaluator.evaluate())
+        # when trusted, an odd number of safe edges leaves the opponent to open the two chain
+        evaluator.control_safe_edges = 3
+        self.assertEqual(3, evaluator.evaluate())
+        board.move(1, 2, True)
+        evaluator.reset(board)
+        self.assertIsNone(evaluator.capture())
+
+    def test_chain_endgames_are_exact(self):
+        checked = 0
+        for seed in range(20):
+            board = quiet_endgame(seed)
+            if board is None:
+                continue
+            evaluator = ChainEvaluator(3, 3)
+            evaluator.reset(board)
+            self.assertEqual(solver(3, 3).value(edges_of(board)), evaluator.evaluate())
+            checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_closer_to_exact_than_score(self):
+        errors = {ChainEvaluator: 0, ScoreEvaluator: 0}
+        for seed in range(50):
+            board = random_position(seed, cols=3, rows=3, moves=12)
+            exact = solver(3, 3).value(edges_of(board))
+            for evaluation in errors:
+                evaluator = evaluation(3, 3)
+                evaluator.reset(board)
+                errors[evaluation] += abs(evaluator.evaluate() - exact)
+        self.assertLess(errors[ChainEvaluator], errors[ScoreEvaluator])
+
+class TestQuiescence(unittest.TestCase):
+    def test_search_restores_evaluator(self):
+        for quiescence in (False, True):
+            board = random_position(3, cols=3, rows=3, moves=10)
+            computer = Computer(board, oracle_edges=0, quiescence=quiescence)
+            computer._start_search()
+            evaluator = computer._evaluator
+            expected = (evaluator.edges, list(evaluator.sides), evaluator.threes, evaluator.safe)
+            computer._alpha_beta_minimax(3, True, float('-inf'), float('inf'))
+            self.assertEqual(expected, (evaluator.edges, evaluator.sides, evaluator.threes, evaluator.safe))
+
+    def test_leaf_captures_are_resolved(self):
+        board = BitBoard(3, 1)
+        for row, col in [(0, 1), (2, 1), (1, 0)]:
+            board.move(row, col, True)
+        # the computer (player two) can take the left box at the depth limit
+        computer = Computer(board, oracle_edges=0, evaluator=ScoreEvaluator, quiescence=True)
+        computer._start_search()
+        value, _ = computer._alpha_beta_minimax(0, True, float('-inf'), float('inf'))
+        self.assertEqual(1, value)
+        computer = Computer(board, oracle_edges=0, evaluator=ScoreEvaluator, quiescence=False)
+        computer._start_search()
+        value, _ = computer._alpha_beta_minimax(0, True, float('-inf'), float('inf'))
+        self.assertEqual(0, value)
+
+if __name__ == '__main__':
+    unittest.main()
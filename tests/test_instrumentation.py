@@ -0,0 +1,52 @@
+import io
+import json
+import unittest
+from src.computer import Computer
+from src.instrumentation import MetricsWriter
+from src.transposition import TranspositionTable
+from tests.test_computer import random_position
+
+class TestInstrumentation(unittest.TestCase):
+    def test_metrics_are_consistent(self):
+        board = random_position(3, cols=4, rows=3, moves=6)
+        computer = Computer(board, think_ms=100, instrument=True)
+        computer.choose_move()
+        metrics = computer.metrics
+        stats = computer.last_stats
+        self.assertEqual(stats.nodes, metrics.nodes)
+        self.assertEqual(list(range(1, stats.depth + 1)), [depth for depth, _, _ in metrics.iterations])
+        self.assertGreaterEqual(metrics.max_depth, stats.depth)
+        self.assertLessEqual(metrics.first_move_cutoffs, metrics.cutoffs)
+        self.assertLessEqual(metrics.cutoffs, metrics.nodes)
+        self.assertLessEqual(metrics.table_hits, metrics.table_probes)
+        # every move is reverted
+        self.assertEqual(0, metrics.board_calls % 2)
+        self.assertGreater(metrics.board_calls, 0)
+        self.assertLessEqual(metrics.board_time, metrics.elapsed)
+
+    def test_instrumentation_does_not_change_search(self):
+        for seed in range(5):
+            # fresh boards: the order of the free edges changes as moves are made and reverted
+            plain = Computer(random_position(seed, cols=3, rows=3, moves=8), TranspositionTable())
+            board = random_position(seed, cols=3, rows=3, moves=8)
+            instrumented = Computer(board, TranspositionTable(), instrument=True)
+            self.assertEqual(plain.choose_move(), instrumented.choose_move())
+            self.assertEqual(plain.last_stats.nodes, instrumented.last_stats.nodes)
+            self.assertEqual(plain.last_stats.value, instrumented.last_stats.value)
+            self.assertIsNone(plain.metrics)
+            # the board is restored, not left wrapped
+            self.assertIs(board, instrumented._backend)
+
+    def test_writer(self):
+        board = random_position(0, cols=3, rows=3, moves=8)
+        computer = Computer(board, instrument=True)
+        computer.choose_move()
+        out = io.StringIO()
+        MetricsWriter(out).write(computer.metrics, move=1)
+        record = json.loads(out.getvalue())
+        self.assertEqual(1, record['move'])
+        self.assertEqual(computer.metrics.nodes, record['nodes'])
+        self.assertEqual(len(computer.metrics.iterations), len(record['iterations']))
+
+if __name__ == '__main__':
+    unittest.main()
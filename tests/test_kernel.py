@@ -0,0 +1,51 @@
+import unittest
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.evaluation import ScoreEvaluator
+from src.kernel import AVAILABLE, KernelBoard, KernelComputer
+from tests.test_computer import random_position
+
+@unittest.skipUnless(AVAILABLE, "the compiled kernel is not built")
+class TestKernelSearch(unittest.TestCase):
+    def test_matches_minimax(self):
+        for seed in range(10):
+            board = random_position(seed, cols=3, rows=3, moves=10)
+            kernel = KernelBoard.from_backend(board)
+            for player_one in (False, True):
+                computer = Computer(board, player_one=player_one, oracle_edges=0, evaluator=ScoreEvaluator,
+                    quiescence=False)
+                for depth in (1, 2, 3):
+                    expected, _ = computer._minimax(depth, True)
+                    value, move, nodes = kernel.search(depth, player_one)
+                    self.assertEqual(expected, value)
+                    self.assertFalse(board.taken(*move))
+                    self.assertGreater(nodes, 0)
+            # the search leaves the position as it was
+            self.assertEqual(BitBoard.masks_of(board), kernel.masks())
+
+    def test_gives_up(self):
+        kernel = KernelBoard(5, 5)
+        self.assertEqual((None, None), kernel.search(30, False, seconds=0.01)[:2])
+        kernel.stop()
+        self.assertIsNone(kernel.search(30, False)[0])
+        self.assertEqual(60, kernel.edges_remaining)
+
+class TestKernelComputer(unittest.TestCase):
+    def test_choose_move(self):
+        board = random_position(1, moves=10)
+        # without the exact solver, so the kernel searches the root
+        computer = KernelComputer(board, think_ms=2000, oracle_edges=0)
+        row, col = computer.choose_move()
+        self.assertFalse(board.taken(row, col))
+        # the game is searched to the end
+        self.assertEqual(board.edges_remaining, computer.last_stats.depth)
+        expected, _ = Computer(board, oracle_edges=0)._minimax(board.edges_remaining, True)
+        self.assertEqual(expected, computer.last_stats.value)
+        computer = KernelComputer(BitBoard(5, 5), think_ms=50)
+        computer.choose_move()
+        self.assertLess(computer.last_stats.elapsed, 1)
+        with self.assertRaises(ValueError):
+            KernelComputer(board, search='mtdf')
+
+if __name__ == "__main__":
+    unittest.main()
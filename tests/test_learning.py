@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.batch import BatchBoard
+from src.bitboard import BitBoard
+from src.learning import (Encoder, FEATURES, LearnedComputer, PolicyValueNet, batch_moves, examples, train,
+    win_rate)
+from src.selfplay import play_game
+
+class TestEncoder(unittest.TestCase):
+    def test_features(self):
+        board = BitBoard(2, 1)
+        # three sides of the left box: its right edge completes it
+        for row, col in ((0, 1), (2, 1), (1, 0)):
+            board.move(row, col, True)
+        encoder = Encoder(2, 1)
+        edge_index = board.geometry.edge_index
+        taken = encoder.taken_of(board)
+        self.assertEqual([edge_index[edge] for edge in ((0, 1), (1, 0), (2, 1))], list(np.flatnonzero(taken)))
+        features = encoder.encode(taken[None, :], [0])[0]
+        self.assertEqual((board.geometry.edge_count, FEATURES), features.shape)
+        middle = features[edge_index[1, 2]]
+        # boxes of 3 and 0 sides, the right box's three free edges are safe, a box to take
+        self.assertEqual([0, 0, 0, 1, 1, 0, 0, 0, 1], list(middle[:9]))
+        self.assertAlmostEqual(3 / 7, middle[12])
+        self.assertEqual(1, middle[13])
+        self.assertEqual(1, middle[14])
+        # border edges have a single box
+        self.assertEqual(0, features[edge_index[0, 3], 8])
+
+class TestPolicyValueNet(unittest.TestCase):
+    def test_gradients_match_finite_differences(self):
+        rng = np.random.default_rng(1)
+        encoder = Encoder(3, 2)
+        taken = rng.random((4, encoder.edge_count)) < 0.4
+        features = encoder.encode(taken, [0, 1, -1, 2]).astype(np.float64)
+        targets = np.array([rng.choice(np.flatnonzero(~row)) for row in taken])
+        outcomes = rng.uniform(-1, 1, 4)
+        network = PolicyValueNet({name: value.astype(np.float64) + rng.normal(0, 0.1, value.shape)
+            for name, value in PolicyValueNet.initial(hidden=4).weights.items()})
+        _, grads = network.gradients(features, ~taken, targets, outcomes)
+        for name, weights in network.weights.items():
+            for index in np.ndindex(weights.shape):
+                value = weights[index]
+                weights[index] = value + 1e-6
+                above, _ = network.gradients(features, ~taken, targets, outcomes)
+                weights[index] = value - 1e-6
+                below, _ = network.gradients(features, ~taken, targets, outcomes)
+                weights[index] = value
+                self.assertAlmostEqual((above - below) / 2e-6, grads[name][index], places=5)
+
+    def test_training_and_inference(self):
+        records = [play_game(3, 2, ('computer', 'computer'), seed, opening_moves=2, think_ms=5) for seed in range(6)]
+        grouped = examples(records, skip=2)
+        self.assertEqual(6 * 15, len(grouped[3, 2][0]))
+        network = PolicyValueNet.initial(seed=0)
+        losses = []
+        train(network, grouped, epochs=30, batch_size=32, rate=0.01, report=lambda epoch, loss: losses.append(loss))
+        self.assertLess(losses[-1], losses[0])
+        self.assertGreater(win_rate(network, 3, 2, 50), 0.8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'policy.npz')
+            network.save(path)
+            loaded = PolicyValueNet.load(path)
+        # the bot plays free edges with a single forward pass, on any board size
+        board = BitBoard(6, 5)
+        board.move(0, 1, True)
+        computer = LearnedComputer(board, loaded)
+        row, col = computer.choose_move()
+        self.assertFalse(board.taken(row, col))
+        self.assertEqual((0, 1), computer.last_stats[:2])
+        self.assertFalse(board.taken(*computer.expected_reply()))
+        # batched inference plays free edges and skips finished positions
+        batch = BatchBoard.from_boards([BitBoard(6, 5), board])
+        batch.edges[0] = True
+        moves = batch_moves(loaded, batch)
+        self.assertEqual(-1, moves[0])
+        self.assertFalse(batch.edges[1, moves[1]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from src.bitboard import BitBoard
+from src.mcts import MctsComputer
+from src.solver import edges_of
+from tests.test_computer import random_position
+import threading
+import time
+
+def capture_position():
+    # the computer (player two) can complete the top left box
+    board = BitBoard(3, 3)
+    board.move(0, 1, True)
+    board.move(1, 0, False)
+    board.move(1, 2, True)
+    return board
+
+class TestMctsComputer(unittest.TestCase):
+    def test_moves_are_legal(self):
+        board = BitBoard(4, 4)
+        computer = MctsComputer(board, playouts=200, seed=0)
+        player_one = True
+        while not board.game_over():
+            if player_one:
+                same_turn = board.move(*sorted(board.legal_moves())[0], True)
+            else:
+                edges_remaining = board.edges_remaining
+                same_turn = computer.move()
+                self.assertEqual(edges_remaining - 1, board.edges_remaining)
+            if not same_turn:
+                player_one = not player_one
+        self.assertEqual(16, board.player_one_score + board.player_two_score)
+
+    def test_takes_capture(self):
+        board = capture_position()
+        computer = MctsComputer(board, playouts=5000, seed=0)
+        self.assertEqual((2, 1), computer.choose_move())
+        self.assertEqual(5000, computer.last_stats.nodes)
+
+    def test_think_time(self):
+        board = BitBoard(8, 8)
+        computer = MctsComputer(board, think_ms=50, seed=0)
+        computer.choose_move()
+        self.assertLess(computer.last_stats.elapsed, 0.5)
+        self.assertGreater(computer.last_stats.nodes, 0)
+
+    def test_tree_is_reused(self):
+        board = random_position(1, cols=4, rows=4, moves=2)
+        computer = MctsComputer(board, playouts=300, seed=0)
+        move = computer.choose_move()
+        self.assertFalse(board.move(*move, False))
+        reply = computer.expected_reply()
+        self.assertFalse(board.move(*reply, True))
+        root = computer._reused_root(edges_of(board), False, 0)
+        self.assertIsNotNone(root)
+        visits = root.visits
+        computer.choose_move()
+        self.assertEqual(visits + 300, computer._tree.root.visits)
+
+    def test_ponder_until_stopped(self):
+        board = BitBoard(5, 5)
+        computer = MctsComputer(board, think_ms=10, seed=0)
+        moves = []
+        thread = threading.Thread(target=lambda: moves.append(computer.choose_move(ponder=True)))
+        thread.start()
+        time.sleep(0.2)
+        self.assertTrue(thread.is_alive())
+        computer.stop()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertIn(moves[0], board.legal_moves())
+        # the next search runs its playouts again
+        computer.choose_move()
+        self.assertGreater(computer.last_stats.nodes, 1)
+
+    def test_parallel_workers(self):
+        board = capture_position()
+        computer = MctsComputer(board, playouts=10000, workers=2, seed=0)
+        try:
+            self.assertEqual((2, 1), computer.choose_move())
+            self.assertEqual(10000, computer.last_stats.nodes)
+        finally:
+            computer.close()
+
+if __name__ == '__main__':
+    unittest.main()
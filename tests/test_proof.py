@@ -0,0 +1,59 @@
+import random
+import unittest
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.proof import ProofSearch, WIN, DRAW, LOSS
+from src.solver import solver, edges_of
+
+def random_position(seed, cols, rows):
+    """BitBoard after a seeded number of random moves by random players"""
+    rng = random.Random(seed)
+    board = BitBoard(cols, rows)
+    for _ in range(rng.randint(board.edges_remaining // 3, board.edges_remaining - 1)):
+        board.move(*rng.choice(sorted(board.legal_moves())), rng.random() < 0.5)
+    return board, rng.random() < 0.5
+
+def final_advantage(board, player_one, value):
+    """Computer's advantage at the end from the value of the player to move"""
+    advantage = board.player_one_score - board.player_two_score
+    return (advantage if player_one else -advantage) + value
+
+class TestProofSearch(unittest.TestCase):
+    def test_decides_like_the_solver(self):
+        for cols, rows in ((2, 2), (3, 2), (3, 3)):
+            exact = solver(cols, rows)
+            for seed in range(40):
+                board, player_one = random_position(seed, cols, rows)
+                edges = board.edges
+                # without the solver at the leaves, so the search itself decides
+                outcome, move = ProofSearch(board, player_one, 0).decide()
+                self.assertEqual(edges, board.edges)
+                final = final_advantage(board, player_one, exact.value(edges_of(board)))
+                self.assertEqual(WIN if final > 0 else DRAW if final == 0 else LOSS, outcome)
+                if outcome == LOSS:
+                    self.assertIsNone(move)
+                    continue
+                # the move reaches the outcome
+                same_turn = board.push(*move, player_one)
+                value = exact.value(edges_of(board))
+                self.assertGreaterEqual(final_advantage(board, player_one, value if same_turn else -value),
+                    outcome)
+                board.pop()
+
+    def test_gives_up_at_the_node_limit(self):
+        prover = ProofSearch(BitBoard(3, 3), False, 0, node_limit=100)
+        self.assertIsNone(prover.decide())
+        self.assertLess(prover.nodes, 200)
+
+    def test_computer_plays_the_proven_move(self):
+        board, player_one = random_position(31, 3, 3)
+        computer = Computer(board, search='proof', player_one=player_one, oracle_edges=0)
+        move = computer.choose_move()
+        self.assertEqual(WIN, computer.last_stats.value)
+        self.assertGreater(computer.last_stats.nodes, 0)
+        same_turn = board.push(*move, player_one)
+        value = solver(3, 3).value(edges_of(board))
+        self.assertGreater(final_advantage(board, player_one, value if same_turn else -value), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import io
+import json
+import unittest
+from src.bitboard import BitBoard
+from src.selfplay import play_game, run
+
+class TestSelfPlay(unittest.TestCase):
+    def test_play_game(self):
+        record = play_game(3, 2, ('computer', 'random'), seed=3, opening_moves=2, think_ms=10)
+        self.assertEqual(17, len(record['moves']))
+        self.assertEqual(17, len(set(record['moves'])))
+        self.assertEqual(len(record['moves']), len(record['ms']))
+        self.assertEqual(6, sum(record['score']))
+        # replaying the moves gives the recorded score
+        board = BitBoard(3, 2)
+        player_one_turn = True
+        for edge in record['moves']:
+            if not board.move(*board.geometry.edges[edge], player_one_turn):
+                player_one_turn = not player_one_turn
+        self.assertEqual(record['score'], [board.player_one_score, board.player_two_score])
+        # the computer beats a random player from a seeded opening
+        self.assertGreater(record['score'][0], record['score'][1])
+
+    def test_run_streams_records(self):
+        out = io.StringIO()
+        rate = run(3, 1, out, 2, 2, ('random', 'random'), first_seed=5)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([5, 6, 7], sorted(record['seed'] for record in records))
+        self.assertGreater(rate, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import random
+import unittest
+from src.bitboard import BitBoard
+from src.server import GameServer, MIN_THINK_MS, _Session
+
+async def connect(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    async def request(message):
+        writer.write((message if isinstance(message, str) else json.dumps(message)).encode() + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+    return reader, writer, request
+
+def serving(test, **options):
+    """Runs test(server, port) against a server on a free port"""
+    async def run():
+        server = GameServer(1, **options)
+        listener = await server.start()
+        try:
+            await test(server, listener.sockets[0].getsockname()[1])
+        finally:
+            listener.close()
+            server.close()
+    asyncio.run(run())
+
+class TestGameServer(unittest.TestCase):
+    def test_plays_a_game(self):
+        async def test(server, port):
+            _, writer, request = await connect(port)
+            response = await request({'op': 'new', 'cols': 3, 'rows': 2, 'bot': 'random'})
+            self.assertEqual({'ok': True, 'moves': [], 'score': [0, 0], 'over': False, 'budget_ms': 30000},
+                response)
+            # mirror of the game, kept from the client's and the bot's moves
+            board = BitBoard(3, 2)
+            rng = random.Random(1)
+            while not response['over']:
+                row, col = rng.choice(sorted(board.legal_moves()))
+                board.move(row, col, True)
+                response = await request({'op': 'move', 'edge': [row, col]})
+                self.assertTrue(response['ok'])
+                for row, col in response['moves']:
+                    board.move(row, col, False)
+                self.assertEqual([board.player_one_score, board.player_two_score], response['score'])
+            self.assertTrue(board.game_over())
+            self.assertEqual(6, sum(response['score']))
+            self.assertEqual({'ok': False, 'error': "game over"}, await request({'op': 'move', 'edge': [0, 1]}))
+            writer.close()
+        serving(test)
+
+    def test_rejects_bad_requests(self):
+        async def test(server, port):
+            _, writer, request = await connect(port)
+            self.assertEqual("invalid JSON", (await request("{"))['error'])
+            self.assertEqual("no game, send new first", (await request({'op': 'move', 'edge': [0, 1]}))['error'])
+            self.assertFalse((await request({'op': 'new', 'bot': 'src.selfplay:RandomAgent'}))['ok'])
+            self.assertFalse((await request({'op': 'new', 'cols': 100}))['ok'])
+            self.assertTrue((await request({'op': 'new', 'cols': 2, 'rows': 2, 'bot': 'random'}))['ok'])
+            # a vertex, an edge off the board and a malformed edge
+            for edge in ([0, 0], [9, 9], 'a'):
+                self.assertEqual("illegal move", (await request({'op': 'move', 'edge': edge}))['error'])
+            self.assertEqual("unknown op", (await request({'op': 'undo'}))['error'])
+            writer.close()
+        serving(test)
+
+    def test_admission_control(self):
+        async def test(server, port):
+            _, first, request = await connect(port)
+            self.assertEqual("no game, send new first", (await request({'op': 'state'}))['error'])
+            reader, second, _ = await connect(port)
+            self.assertEqual({'ok': False, 'error': "server full"}, json.loads(await reader.readline()))
+            self.assertEqual(b'', await reader.read())
+            second.close()
+            first.close()
+            await first.wait_closed()
+            # the closed game frees its slot
+            while server.sessions:
+                await asyncio.sleep(0.01)
+            _, third, request = await connect(port)
+            self.assertTrue((await request({'op': 'new', 'cols': 1, 'rows': 1, 'bot': 'random'}))['ok'])
+            third.close()
+        serving(test, max_games=1)
+
+    def test_think_time_shares_the_budget(self):
+        session = _Session(5, 4, 'computer', 5000, 0)
+        # 49 edges left, of which the bot plays 25
+        self.assertEqual(200, session.think_ms(1000))
+        self.assertEqual(100, session.think_ms(100))
+        session.budget_ms = 0
+        self.assertEqual(MIN_THINK_MS, session.think_ms(100))
+
+if __name__ == "__main__":
+    unittest.main()
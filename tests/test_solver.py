@@ -0,0 +1,88 @@
+import os
+import random
+import tempfile
+import unittest
+from src.bitboard import BitBoard
+from src.computer import Computer
+from src.solver import Solver, SolvedTable, build_table, edges_of
+from tests.test_endgame import exhaustive_value, play
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def random_board(cols, rows, moves, seed):
+    board = BitBoard(cols, rows)
+    edges = list(board.geometry.edges)
+    random.Random(seed).shuffle(edges)
+    play(board, edges[:moves])
+    return board
+
+class TestSolver(unittest.TestCase):
+    def test_matches_exhaustive_search(self):
+        for cols, rows in [(3, 2), (2, 3)]:
+            value = exhaustive_value(BitBoard(cols, rows))
+            solver = Solver(cols, rows)
+            for seed in range(20):
+                board = random_board(cols, rows, seed % 12, seed)
+                self.assertEqual(value(board.edges), solver.value(board.edges))
+
+    def test_oracle_plays_exactly(self):
+        # 4x3 positions with few free edges are solved at the root
+        for seed in range(5):
+            board = random_board(4, 3, 23, seed)
+            value = exhaustive_value(board)(board.edges)
+            computer = Computer(board)
+            row, col = computer.choose_move()
+            self.assertEqual(computer._computer_advantage() + value, computer.last_stats.value)
+            self.assertEqual(0, computer.last_stats.nodes)
+            # the move keeps the value
+            gain = board.move(row, col, False)
+            following = exhaustive_value(board)(board.edges)
+            self.assertEqual(computer.last_stats.value, computer._computer_advantage()
+                + (following if gain else -following))
+
+    def test_oracle_leaves(self):
+        # a search reaching few free edges returns exact values
+        board = random_board(3, 3, 11, 0)
+        computer = Computer(board, oracle_edges=11)
+        computer._start_search()
+        value, _ = computer._alpha_beta_minimax(2, True, float('-inf'), float('inf'))
+        self.assertEqual(exhaustive_value(board)(board.edges) + computer._computer_advantage(), value)
+
+@unittest.skipIf(numpy is None, "building solved tables requires NumPy")
+class TestSolvedTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, '2x3.solved')
+        build_table(3, 2, cls.path)
+        cls.table = SolvedTable(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.table.close()
+        cls.directory.cleanup()
+
+    def test_matches_solver(self):
+        solver = Solver(3, 2)
+        self.assertEqual((3, 2), (self.table.cols, self.table.rows))
+        for edges in range(0, 1 << 17, 97):
+            self.assertEqual(solver.value(edges), self.table.value(edges))
+
+    def test_computer_plays_from_table(self):
+        board = BitBoard(3, 2)
+        computer = Computer(board, solved=self.table)
+        computer.choose_move()
+        self.assertEqual(self.table.value(0), computer.last_stats.value)
+        self.assertEqual(0, computer.last_stats.nodes)
+        # tables of another size are ignored
+        self.assertIsNone(Computer(BitBoard(2, 3), solved=self.table)._solved)
+
+    def test_edges_of_any_engine(self):
+        board = random_board(3, 2, 7, 1)
+        self.assertEqual(board.edges, edges_of(board))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from src.geometry import geometry
+from src.symmetry import symmetries
+from tests.test_computer import random_position
+
+class TestSymmetry(unittest.TestCase):
+    def test_group_size(self):
+        self.assertEqual(4, len(symmetries(5, 4)))
+        self.assertEqual(8, len(symmetries(3, 3)))
+        for permutation in symmetries(3, 3).permutations:
+            self.assertEqual(list(range(24)), sorted(permutation))
+
+    def test_symmetric_positions_share_canonical_form(self):
+        for cols, rows in [(5, 4), (3, 3)]:
+            shape = symmetries(cols, rows)
+            for seed in range(5):
+                edges = random_position(seed, cols, rows, moves=10).edges
+                canonical, symmetry = shape.canonical(edges)
+                self.assertEqual(canonical, shape.transform(edges, symmetry))
+                for other in range(len(shape)):
+                    self.assertEqual(canonical, shape.canonical(shape.transform(edges, other))[0])
+
+    def test_moves_round_trip(self):
+        shape = symmetries(3, 3)
+        edge_bits = geometry(3, 3).edge_bits
+        # a quarter turn takes the top-left horizontal edge to a vertical edge
+        self.assertTrue(any(shape.map_move((0, 1), symmetry)[0] % 2 == 1 for symmetry in range(len(shape))))
+        for symmetry in range(len(shape)):
+            for move in [(0, 1), (1, 0), (3, 6), (6, 5)]:
+                image = shape.map_move(move, symmetry)
+                self.assertEqual(move, shape.unmap_move(image, symmetry))
+                self.assertEqual(edge_bits[image], shape.transform(edge_bits[move], symmetry))
+
+if __name__ == "__main__":
+    unittest.main()